@@ -0,0 +1,142 @@
+# vim: set fileencoding=utf-8
+"""
+benchmarks/import_time.py
+
+This script measures the cold import time of single classes of
+pythoneda.shared.iac.pulumi.azure.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Usage:
+    python benchmarks/import_time.py [--budget SECONDS] [--runs N] [Class ...]
+
+Each class is imported in a fresh interpreter. The script exits with a
+non-zero status if the best cold import exceeds the budget, or if the import
+loads pulumi_azure_native service submodules the class does not need.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Set
+
+PACKAGE = "pythoneda.shared.iac.pulumi.azure"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET = float(os.environ.get("PULUMI_AZURE_IMPORT_BUDGET", "1.5"))
+"""
+Maximum cold import time, in seconds, of a single class.
+"""
+
+EXPECTED_SERVICES: Dict[str, Set[str]] = {
+    "Outputs": set(),
+    "AzureResource": set(),
+    "ResourceGroup": {"resources"},
+    "StorageAccount": {"resources", "storage"},
+    "CosmosdbAccount": {"resources", "documentdb"},
+}
+"""
+The pulumi_azure_native service submodules each benchmarked class may load.
+"""
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from {package} import {name}
+elapsed = time.perf_counter() - start
+prefix = "pulumi_azure_native."
+services = sorted(
+    {{
+        module[len(prefix):].split(".")[0]
+        for module in sys.modules
+        if module.startswith(prefix)
+    }}
+)
+print(json.dumps({{"elapsed": elapsed, "services": services}}))
+"""
+
+
+def _is_service(name: str) -> bool:
+    """
+    Checks whether given pulumi_azure_native submodule is a service module.
+    :param name: The submodule name.
+    :type name: str
+    :return: True if it's an Azure service module, not SDK plumbing.
+    :rtype: bool
+    """
+    return not name.startswith("_") and name not in ("provider", "config")
+
+
+def measure(name: str) -> Dict:
+    """
+    Imports given class in a fresh interpreter.
+    :param name: The class name.
+    :type name: str
+    :return: The elapsed time and the loaded service submodules.
+    :rtype: Dict
+    """
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(package=PACKAGE, name=name)],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Runs the benchmark.
+    :param argv: The command-line arguments.
+    :type argv: List[str]
+    :return: The exit status.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description="Cold import benchmark.")
+    parser.add_argument("classes", nargs="*", default=list(EXPECTED_SERVICES))
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for name in args.classes:
+        samples = [measure(name) for _ in range(args.runs)]
+        best = min(sample["elapsed"] for sample in samples)
+        services = {
+            service for service in samples[0]["services"] if _is_service(service)
+        }
+        unexpected = sorted(services - EXPECTED_SERVICES.get(name, services))
+        status = "ok"
+        if best > args.budget:
+            status = f"over budget ({args.budget:.3f}s)"
+        elif unexpected:
+            status = f"unexpected submodules: {', '.join(unexpected)}"
+        if status != "ok":
+            failures += 1
+        print(
+            f"{name:<24} {best * 1000:9.1f} ms  "
+            f"[{', '.join(sorted(services))}]  {status}"
+        )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,426 @@
+# vim: set fileencoding=utf-8
+"""
+benchmarks/stack_build.py
+
+This script measures how long it takes to build stacks of
+pythoneda.shared.iac.pulumi.azure resources, offline.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Usage:
+    python benchmarks/stack_build.py [--sizes 1,10,100,1000] [--json PATH]
+                                     [--baseline PATH] [--tolerance RATIO]
+
+Every resource is built by calling its _create and _post_create hooks under
+pulumi.runtime.set_mocks, so no Azure endpoint is contacted. For each stack
+size it reports wall time, allocations, peak traced memory, and the number of
+registered resources, invokes and exports, and the hits and misses of the
+invoke cache and of the content-hash cache of blob sources. Blob sources are
+generated once in a temporary directory. Each size is deployed once, which
+hashes them and records the digests deployed, then measured as previews,
+which reuse the digests in the sidecar file. With --baseline, it exits with a non-zero status if wall time
+regresses beyond the tolerance, or if a stack registers more resources or
+performs more invokes than the baseline did.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pulumi  # noqa: E402
+from pythoneda.shared.iac.pulumi.azure import (  # noqa: E402
+    AppInsights,
+    AppServicePlan,
+    AzureResource,
+    Blob,
+    BlobContainer,
+    ContainerRegistry,
+    ContentHashCache,
+    CosmosdbAccount,
+    FunctionStorageAccount,
+    InvokeCache,
+    ResourceGroup,
+    WebApp,
+)
+
+STACK = "bench"
+PROJECT = "pulumi-azure"
+LOCATION = "westeurope"
+
+DEFAULT_SIZES = (1, 10, 100, 1000)
+
+BLOB_SOURCES = 8
+BLOB_SOURCE_BYTES = 4 * 1024 * 1024
+
+_INVOKE_RESULTS = {
+    "azure-native:containerregistry:listRegistryCredentials": {
+        "username": "bench",
+        "passwords": [{"name": "password", "value": "bench"}],
+    },
+    "azure-native:storage:listStorageAccountKeys": {
+        "keys": [{"keyName": "key1", "value": "bench", "permissions": "FULL"}],
+    },
+}
+
+
+class CountingMocks(pulumi.runtime.Mocks):
+    """
+    Pulumi mocks that count what a stack registers.
+
+    Class name: CountingMocks
+
+    Responsibilities:
+        - Fake Azure resources and invokes, without network access.
+        - Count registered resources and invokes.
+
+    Collaborators:
+        - pulumi.runtime.Mocks
+    """
+
+    def __init__(self):
+        """
+        Creates a new CountingMocks instance.
+        """
+        super().__init__()
+        self.resources = 0
+        self.invokes = 0
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs) -> Tuple[str, Dict]:
+        """
+        Fakes the creation of a resource.
+        :param args: The resource arguments.
+        :type args: pulumi.runtime.MockResourceArgs
+        :return: The resource id and its state.
+        :rtype: Tuple[str, Dict]
+        """
+        self.resources += 1
+        state = dict(args.inputs)
+        state.setdefault("name", args.name)
+        state.setdefault("loginServer", f"{args.name}.azurecr.io")
+        return f"{args.name}_id", state
+
+    def call(self, args: pulumi.runtime.MockCallArgs) -> Dict:
+        """
+        Fakes an invoke.
+        :param args: The invoke arguments.
+        :type args: pulumi.runtime.MockCallArgs
+        :return: The invoke result.
+        :rtype: Dict
+        """
+        self.invokes += 1
+        return _INVOKE_RESULTS.get(args.token, {})
+
+
+def _materialize(resource: AzureResource, index: int) -> Any:
+    """
+    Runs the creation hooks of given resource.
+    :param resource: The resource.
+    :type resource: pythoneda.shared.iac.pulumi.azure.AzureResource
+    :param index: A suffix to keep Pulumi names unique.
+    :type index: int
+    :return: The Pulumi resource.
+    :rtype: Any
+    """
+    name = f"{resource._resource_name(STACK, PROJECT, LOCATION)}{index}"
+    result = resource._create(name)
+    resource._post_create(result)
+    return result
+
+
+_TEMPLATE: Tuple[Tuple[str, Callable[[Dict[str, Any]], AzureResource]], ...] = (
+    (
+        "storage_account",
+        lambda d: FunctionStorageAccount(STACK, PROJECT, LOCATION, d["resource_group"]),
+    ),
+    (
+        "app_service_plan",
+        lambda d: AppServicePlan(
+            STACK, PROJECT, LOCATION, None, None, None, None, None, d["resource_group"]
+        ),
+    ),
+    (
+        "app_insights",
+        lambda d: AppInsights(STACK, PROJECT, LOCATION, None, None, d["resource_group"]),
+    ),
+    (
+        "container_registry",
+        lambda d: ContainerRegistry(
+            STACK, PROJECT, LOCATION, None, None, d["resource_group"]
+        ),
+    ),
+    (
+        "cosmosdb_account",
+        lambda d: CosmosdbAccount(
+            STACK, PROJECT, LOCATION, None, None, None, None, d["resource_group"]
+        ),
+    ),
+    (
+        "web_app",
+        lambda d: WebApp(
+            STACK,
+            PROJECT,
+            LOCATION,
+            "bench",
+            "latest",
+            d["container_registry"].login_server,
+            None,
+            d["app_insights"],
+            d["storage_account"],
+            d["app_service_plan"],
+            d["container_registry"],
+            d["resource_group"],
+        ),
+    ),
+    (
+        "blob_container",
+        lambda d: BlobContainer(
+            STACK, PROJECT, LOCATION, None, d["storage_account"], d["resource_group"]
+        ),
+    ),
+    (
+        "blob",
+        lambda d: Blob(
+            STACK,
+            PROJECT,
+            LOCATION,
+            "bench",
+            None,
+            pulumi.FileAsset(d["blob_sources"][d["index"] % len(d["blob_sources"])]),
+            d["blob_container"],
+            d["storage_account"],
+            d["resource_group"],
+            d["content_hash_cache"],
+        ),
+    ),
+)
+"""
+The resources a stack cycles through, in dependency order, after its
+resource group.
+"""
+
+
+def _blob_sources(directory: str) -> List[str]:
+    """
+    Writes the files blobs are uploaded from.
+    :param directory: The directory to write them into.
+    :type directory: str
+    :return: Their paths.
+    :rtype: List[str]
+    """
+    result = []
+    for index in range(BLOB_SOURCES):
+        path = os.path.join(directory, f"asset{index}.bin")
+        with open(path, "wb") as source:
+            source.write(os.urandom(BLOB_SOURCE_BYTES))
+        result.append(path)
+    return result
+
+
+def build_stack(size: int, blobSources: List[str], contentHashCache: ContentHashCache):
+    """
+    Builds a stack of given number of resources.
+    :param size: The number of resources.
+    :type size: int
+    :param blobSources: The files blobs are uploaded from.
+    :type blobSources: List[str]
+    :param contentHashCache: The cache of their digests.
+    :type contentHashCache: pythoneda.shared.iac.pulumi.azure.ContentHashCache
+    """
+    created = {
+        "resource_group": _materialize(ResourceGroup(STACK, PROJECT, LOCATION), 0),
+        "blob_sources": blobSources,
+        "content_hash_cache": contentHashCache,
+    }
+    for index in range(1, size):
+        key, factory = _TEMPLATE[(index - 1) % len(_TEMPLATE)]
+        created["index"] = index
+        created[key] = _materialize(factory(created), index)
+
+
+def _run(
+    size: int, blobSources: List[str], preview: bool = True
+) -> Tuple[CountingMocks, InvokeCache, ContentHashCache]:
+    """
+    Builds a stack under fresh mocks and fresh caches, waiting for all
+    registrations. The content-hash cache starts from the sidecar file the
+    last deployment saved.
+    :param size: The number of resources.
+    :type size: int
+    :param blobSources: The files blobs are uploaded from.
+    :type blobSources: List[str]
+    :param preview: Whether to preview, rather than deploy.
+    :type preview: bool
+    :return: The mocks, the invoke cache and the content-hash cache, with
+    their counters.
+    :rtype: Tuple[CountingMocks, pythoneda.shared.iac.pulumi.azure.InvokeCache, pythoneda.shared.iac.pulumi.azure.ContentHashCache]
+    """
+    mocks = CountingMocks()
+    pulumi.runtime.set_mocks(mocks, project=PROJECT, stack=STACK, preview=preview)
+    InvokeCache.reset()
+    content_hash_cache = ContentHashCache(
+        os.path.join(os.path.dirname(blobSources[0]), "digests.json")
+    )
+    pulumi.runtime.test(lambda: build_stack(size, blobSources, content_hash_cache))()
+    return mocks, InvokeCache.instance(), content_hash_cache
+
+
+def measure(size: int, blobSources: List[str]) -> Dict[str, Any]:
+    """
+    Measures the build of a stack of given size.
+    :param size: The number of resources.
+    :type size: int
+    :param blobSources: The files blobs are uploaded from.
+    :type blobSources: List[str]
+    :return: The metrics.
+    :rtype: Dict[str, Any]
+    """
+    exports = 0
+    original_export = pulumi.export
+
+    def counting_export(name: str, value: Any):
+        nonlocal exports
+        exports += 1
+        original_export(name, value)
+
+    _run(size, blobSources, False)
+    pulumi.export = counting_export
+    try:
+        start = time.perf_counter()
+        mocks, invoke_cache, content_hash_cache = _run(size, blobSources)
+        wall = time.perf_counter() - start
+        exports_per_run = exports
+
+        tracemalloc.start()
+        try:
+            _run(size, blobSources)
+            allocations = sum(
+                stat.count for stat in tracemalloc.take_snapshot().statistics("filename")
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        pulumi.export = original_export
+
+    return {
+        "size": size,
+        "wall_seconds": wall,
+        "allocations": allocations,
+        "peak_bytes": peak,
+        "resources": mocks.resources,
+        "invokes": mocks.invokes,
+        "exports": exports_per_run,
+        "invoke_cache_hits": invoke_cache.hits,
+        "invoke_cache_misses": invoke_cache.misses,
+        "content_hash_hits": content_hash_cache.hits,
+        "content_hash_misses": content_hash_cache.misses,
+    }
+
+
+def _regressions(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float
+) -> List[str]:
+    """
+    Compares results against a baseline.
+    :param results: The current results.
+    :type results: List[Dict[str, Any]]
+    :param baseline: The baseline results.
+    :type baseline: List[Dict[str, Any]]
+    :param tolerance: The allowed wall-time increase, as a ratio.
+    :type tolerance: float
+    :return: The regressions found.
+    :rtype: List[str]
+    """
+    previous = {entry["size"]: entry for entry in baseline}
+    found = []
+    for entry in results:
+        before = previous.get(entry["size"])
+        if before is None:
+            continue
+        if entry["wall_seconds"] > before["wall_seconds"] * (1 + tolerance):
+            found.append(
+                f"size {entry['size']}: wall time {entry['wall_seconds']:.3f}s "
+                f"> {before['wall_seconds']:.3f}s (+{tolerance:.0%})"
+            )
+        for counter in ("resources", "invokes"):
+            if entry[counter] > before[counter]:
+                found.append(
+                    f"size {entry['size']}: {counter} {entry[counter]} "
+                    f"> {before[counter]}"
+                )
+    return found
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Runs the benchmark.
+    :param argv: The command-line arguments.
+    :type argv: List[str]
+    :return: The exit status.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description="Offline stack build benchmark.")
+    parser.add_argument(
+        "--sizes", default=",".join(str(size) for size in DEFAULT_SIZES)
+    )
+    parser.add_argument("--json", help="Writes the results to given file.")
+    parser.add_argument("--baseline", help="Compares against a previous --json.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = []
+    print(
+        f"{'size':>6} {'wall ms':>10} {'allocs':>10} {'peak KiB':>10} "
+        f"{'resources':>10} {'invokes':>8} {'exports':>8} {'inv hit/miss':>13} "
+        f"{'hash hit/miss':>13}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        blob_sources = _blob_sources(directory)
+        for size in (int(value) for value in args.sizes.split(",")):
+            entry = measure(size, blob_sources)
+            results.append(entry)
+            print(
+                f"{entry['size']:>6} {entry['wall_seconds'] * 1000:>10.1f} "
+                f"{entry['allocations']:>10} {entry['peak_bytes'] / 1024:>10.1f} "
+                f"{entry['resources']:>10} {entry['invokes']:>8} "
+                f"{entry['exports']:>8} "
+                f"{entry['invoke_cache_hits']:>6}/{entry['invoke_cache_misses']:<6} "
+                f"{entry['content_hash_hits']:>6}/{entry['content_hash_misses']:<6}"
+            )
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(results, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as previous:
+            regressions = _regressions(results, json.load(previous), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
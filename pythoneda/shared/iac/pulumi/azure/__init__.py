@@ -21,35 +21,114 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 __path__ = __import__("pkgutil").extend_path(__path__, __name__)
 
-from .outputs import Outputs
-from .azure_resource import AzureResource
-from .resource_group import ResourceGroup
-from .cosmosdb_account import CosmosdbAccount
-from .cosmosdb_database import CosmosdbDatabase
-from .cosmosdb_container import CosmosdbContainer
-from .storage_account import StorageAccount
-from .databases_storage_account import DatabasesStorageAccount
-from .table import Table
-from .app_service_plan import AppServicePlan
-from .web_app import WebApp
-from .function_storage_account import FunctionStorageAccount
-from .api_management_service import ApiManagementService
-from .api import Api
-from .public_ip_address import PublicIpAddress
-from .dns_zone import DnsZone
-from .dns_record import DnsRecord
-from .network_security_group import NetworkSecurityGroup
-from .blob_container import BlobContainer
-from .blob import Blob
-from .front_door import FrontDoor
-from .frontend_endpoint import FrontendEndpoint
-from .web_app_deployment_slot import WebAppDeploymentSlot
-from .web_app_host_name_binding import WebAppHostNameBinding
-from .app_insights import AppInsights
-from .container_registry import ContainerRegistry
-from .role_definition import RoleDefinition
-from .role_assignment import RoleAssignment
-from .docker_pull_role_assignment import DockerPullRoleAssignment
-from .docker_pull_role_definition import DockerPullRoleDefinition
+import importlib
+
+_LAZY_ATTRIBUTES = {
+    "Outputs": ".outputs",
+    "AzureResource": ".azure_resource",
+    "AzureRegion": ".azure_regions",
+    "AzureRegions": ".azure_regions",
+    "NamingEngine": ".naming_engine",
+    "NamingRule": ".naming_engine",
+    "ResourceGroup": ".resource_group",
+    "CosmosdbAccount": ".cosmosdb_account",
+    "CosmosdbDatabase": ".cosmosdb_database",
+    "CosmosdbContainer": ".cosmosdb_container",
+    "CosmosdbIndexingPolicy": ".cosmosdb_indexing_policy",
+    "CosmosdbThroughput": ".cosmosdb_throughput",
+    "PartitionKeyReport": ".partition_key_simulator",
+    "PartitionKeySimulator": ".partition_key_simulator",
+    "RequestUnitEstimate": ".request_unit_estimator",
+    "RequestUnitEstimator": ".request_unit_estimator",
+    "StorageAccount": ".storage_account",
+    "DatabasesStorageAccount": ".databases_storage_account",
+    "Table": ".table",
+    "TablePartitionAnalysis": ".table_partition_analyzer",
+    "TablePartitionAnalyzer": ".table_partition_analyzer",
+    "TablePartitionReport": ".table_partition_analyzer",
+    "TablePartitionRewrite": ".table_partition_analyzer",
+    "AppServicePlan": ".app_service_plan",
+    "AppServicePlanAutoscale": ".app_service_plan_autoscale",
+    "AppServicePlanPlanner": ".app_service_plan_planner",
+    "AppServicePlanSku": ".app_service_plan_skus",
+    "AppServicePlanSkus": ".app_service_plan_skus",
+    "CapacityPlan": ".app_service_plan_planner",
+    "RequestProfile": ".app_service_plan_planner",
+    "AutoscalePolicy": ".autoscale_policy",
+    "AutoscaleRule": ".autoscale_policy",
+    "AutoscaleSchedule": ".autoscale_policy",
+    "WebApp": ".web_app",
+    "FunctionStorageAccount": ".function_storage_account",
+    "ApiManagementService": ".api_management_service",
+    "Api": ".api",
+    "PublicIpAddress": ".public_ip_address",
+    "DnsZone": ".dns_zone",
+    "DnsRecord": ".dns_record",
+    "DnsRecordSets": ".dns_record_sets",
+    "ZoneFileReader": ".zone_file_reader",
+    "ZoneRecord": ".zone_file_reader",
+    "ZoneRecordGroup": ".zone_file_reader",
+    "NetworkSecurityGroup": ".network_security_group",
+    "SecurityRule": ".security_rule",
+    "SecurityRuleSet": ".security_rule_set",
+    "BlobContainer": ".blob_container",
+    "Blob": ".blob",
+    "BlobDirectory": ".blob_directory",
+    "BlobLifecycleImpact": ".blob_lifecycle_policy",
+    "BlobLifecyclePolicy": ".blob_lifecycle_policy",
+    "BlobLifecycleRule": ".blob_lifecycle_policy",
+    "BlobManagementPolicy": ".blob_management_policy",
+    "ContentHashCache": ".content_hash_cache",
+    "FrontDoor": ".front_door",
+    "FrontendEndpoint": ".frontend_endpoint",
+    "WebAppDeploymentSlot": ".web_app_deployment_slot",
+    "PackageBuilder": ".package_builder",
+    "WebAppHostNameBinding": ".web_app_host_name_binding",
+    "AppInsights": ".app_insights",
+    "ContainerRegistry": ".container_registry",
+    "InvokeCache": ".invoke_cache",
+    "StackSpecLoader": ".stack_spec_loader",
+    "MultiRegionBuilder": ".multi_region_builder",
+    "DependencyGraph": ".dependency_graph",
+    "RoleDefinition": ".role_definition",
+    "RoleAssignment": ".role_assignment",
+    "DockerPullRoleAssignment": ".docker_pull_role_assignment",
+    "DockerPullRoleDefinition": ".docker_pull_role_definition",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    """
+    Imports the module defining given attribute on first access (PEP 562),
+    so importing a single class does not load every resource module, nor
+    every pulumi_azure_native submodule they depend upon.
+    :param name: The attribute name.
+    :type name: str
+    :return: The attribute.
+    :rtype: Any
+    """
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        module = importlib.import_module(module_name, __name__)
+    except AttributeError as error:
+        # otherwise "from ... import" reports the attribute as missing
+        raise ImportError(f"Cannot import {module_name}: {error}") from error
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """
+    Lists the module attributes, including the ones not loaded yet.
+    :return: The attribute names.
+    :rtype: List[str]
+    """
+    return sorted(set(globals()) | set(__all__))
+
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -19,6 +19,7 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from .app_service_plan_skus import AppServicePlanSku, AppServicePlanSkus
 from .azure_resource import AzureResource
 from .outputs import Outputs
 import pulumi
@@ -93,11 +94,15 @@ class AppServicePlan(AzureResource):
     @property
     def tier_type(self) -> str:
         """
-        Retrieves the tier type.
+        Retrieves the tier type. Defaults to the tier of the SKU named by the
+        tier name, or "Dynamic" if unknown.
         :return: Such type.
         :rtype: str
         """
-        return self._tier_type if self._tier_name is not None else "Dynamic"
+        if self._tier_type is not None:
+            return self._tier_type
+        sku = self.sku
+        return sku.tier if sku is not None else "Dynamic"
 
     @property
     def tier_name(self) -> str:
@@ -126,6 +131,15 @@ class AppServicePlan(AzureResource):
         """
         return self._target_worker_count if self._target_worker_count is not None else 1
 
+    @property
+    def sku(self) -> AppServicePlanSku:
+        """
+        Retrieves the vCPUs, memory and instance limit of the tier.
+        :return: Such SKU, or None if unknown.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AppServicePlanSku
+        """
+        return AppServicePlanSkus.sku(self.tier_name)
+
     @classmethod
     @property
     def type(cls) -> str:
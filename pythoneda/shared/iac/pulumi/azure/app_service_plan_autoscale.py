@@ -0,0 +1,174 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/app_service_plan_autoscale.py
+
+This script defines the AppServicePlanAutoscale class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .app_service_plan import AppServicePlan
+from .autoscale_policy import AutoscalePolicy
+from .azure_resource import AzureResource
+from .outputs import Outputs
+import pulumi
+import pulumi_azure_native
+from .resource_group import ResourceGroup
+from typing import Dict, Union
+
+
+class AppServicePlanAutoscale(AzureResource):
+    """
+    The autoscale settings of an App Service plan.
+
+    Class name: AppServicePlanAutoscale
+
+    Responsibilities:
+        - Scale an App Service plan on its metrics and on a schedule.
+        - Check the rules against the instances the plan tier allows.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.AppServicePlan
+        - pythoneda.shared.iac.pulumi.azure.AutoscalePolicy
+    """
+
+    max_instances = {
+        "Standard": 10,
+        "Premium": 20,
+        "PremiumV2": 30,
+        "PremiumV3": 30,
+        "Isolated": 100,
+        "IsolatedV2": 100,
+    }
+
+    def __init__(
+        self,
+        stackName: str,
+        projectName: str,
+        location: str,
+        policy: Union[AutoscalePolicy, Dict],
+        enabled: bool,
+        appServicePlan: AppServicePlan,
+        resourceGroup: ResourceGroup,
+    ):
+        """
+        Creates a new AppServicePlanAutoscale instance.
+        :param stackName: The name of the stack.
+        :type stackName: str
+        :param projectName: The name of the project.
+        :type projectName: str
+        :param location: The Azure location.
+        :type location: str
+        :param policy: The profiles and rules, or their description.
+        :type policy: pythoneda.shared.iac.pulumi.azure.AutoscalePolicy
+        :param enabled: Whether autoscale is enabled. Defaults to True.
+        :type enabled: bool
+        :param appServicePlan: The App Service plan.
+        :type appServicePlan: pythoneda.shared.iac.pulumi.azure.AppServicePlan
+        :param resourceGroup: The ResourceGroup.
+        :type resourceGroup: pythoneda.iac.pulumi.azure.ResourceGroup
+        """
+        if isinstance(policy, dict):
+            policy = AutoscalePolicy.from_dict(policy)
+        max_instances = self.max_instances.get(appServicePlan.tier_type)
+        if max_instances is None:
+            raise ValueError(
+                f"App Service plans of tier {appServicePlan.tier_type} do not "
+                f"support autoscale, only {', '.join(self.max_instances)}"
+            )
+        policy.validate(max_instances)
+        self._policy = policy
+        self._enabled = enabled
+        super().__init__(
+            stackName,
+            projectName,
+            location,
+            {"app_service_plan": appServicePlan, "resource_group": resourceGroup},
+        )
+
+    @property
+    def policy(self) -> AutoscalePolicy:
+        """
+        Retrieves the profiles and rules.
+        :return: Such policy.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AutoscalePolicy
+        """
+        return self._policy
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Checks whether autoscale is enabled.
+        :return: True in such case.
+        :rtype: bool
+        """
+        return self._enabled if self._enabled is not None else True
+
+    @classmethod
+    @property
+    def type(cls) -> str:
+        """
+        Retrieves the type of resource.
+        :return: Such type.
+        :rtype: str
+        """
+        return "Microsoft.Insights/autoscaleSettings"
+
+    # @override
+    @classmethod
+    def _resource_name(cls, stackName: str, projectName: str, location: str) -> str:
+        """
+        Builds the resource name.
+        :param stackName: The name of the stack.
+        :type stackName: str
+        :param projectName: The name of the project.
+        :type projectName: str
+        :param location: The Azure location.
+        :type location: str
+        :return: The resource name.
+        :rtype: str
+        """
+        return "appspas"
+
+    # @override
+    def _create(self, name: str) -> pulumi_azure_native.insights.AutoscaleSetting:
+        """
+        Creates the autoscale settings.
+        :param name: The name of the resource.
+        :type name: str
+        :return: The autoscale settings.
+        :rtype: pulumi_azure_native.insights.AutoscaleSetting
+        """
+        return pulumi_azure_native.insights.AutoscaleSetting(
+            name,
+            resource_group_name=self.resource_group.name,
+            location=self.location,
+            enabled=self.enabled,
+            target_resource_uri=self.app_service_plan.id,
+            profiles=self.policy.args(self.app_service_plan.id),
+        )
+
+    # @override
+    def _post_create(self, resource: pulumi_azure_native.insights.AutoscaleSetting):
+        """
+        Post-create hook.
+        :param resource: The resource.
+        :type resource: pulumi_azure_native.insights.AutoscaleSetting
+        """
+        pulumi.export(Outputs.APP_SERVICE_PLAN_AUTOSCALE.value, resource.name)
+        pulumi.export(Outputs.APP_SERVICE_PLAN_AUTOSCALE_ID.value, resource.id)
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
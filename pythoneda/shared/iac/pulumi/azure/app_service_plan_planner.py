@@ -0,0 +1,517 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/app_service_plan_planner.py
+
+This script defines the AppServicePlanPlanner class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .app_service_plan_skus import AppServicePlanSku, AppServicePlanSkus
+import csv
+import json
+import math
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+
+class RequestProfile(NamedTuple):
+    """
+    A kind of request, with its share of the traffic, the CPU seconds it
+    takes on one core and the memory it holds while in flight.
+    """
+
+    name: str
+    share: float
+    cpu_seconds: float
+    memory_mb: float
+
+
+class CapacityPlan(NamedTuple):
+    """
+    A SKU and instance count of an App Service plan, and the latency,
+    utilization and cost projected for a request-rate time series.
+    """
+
+    tier_type: str
+    tier_name: str
+    capacity: int
+    vcpus: int
+    mean_utilization: float
+    peak_utilization: float
+    peak_memory_utilization: float
+    p95_latency_ms: float
+    monthly_cost: float
+    meets_target: bool
+
+
+class AppServicePlanPlanner:
+    """
+    Offline capacity planner of App Service plans.
+
+    Each instance is an M/M/c queue with a server per vCPU: requests arrive
+    at an even share of the rate of each interval of the series, and take
+    the mean CPU seconds of the request profiles. The latency of an interval
+    follows from the Erlang C formula, in closed form, and the p95 latency
+    is that of the mixture of intervals, weighted by their requests. Peak
+    memory is the base memory of an instance plus the requests in flight at
+    the busiest interval (Little's law). A configuration meets the target
+    when its p95 latency does, without exceeding the CPU utilization allowed
+    nor the memory of its instances at the busiest interval.
+
+    The series is collapsed into a histogram of rates first, with bins 2%
+    wide, each one represented by its highest rate, so sweeping every SKU
+    and instance count costs a few operations per bin, regardless of the
+    length of the series.
+
+    Class name: AppServicePlanPlanner
+
+    Responsibilities:
+        - Project latency, utilization and cost of plan configurations.
+        - Find the cheapest configuration meeting a latency target.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.AppServicePlan
+        - pythoneda.shared.iac.pulumi.azure.AppServicePlanSkus
+    """
+
+    hours_per_month = 730
+    bin_ratio = 1.02
+
+    _tail = 0.05
+    _iterations = 60
+
+    def __init__(
+        self,
+        latencyTargetMs: float = None,
+        baseMemoryMb: float = None,
+        skus: Iterable[str] = None,
+        prices: Dict[str, float] = None,
+        maxInstances: int = None,
+        maxUtilization: float = None,
+    ):
+        """
+        Creates a new AppServicePlanPlanner instance.
+        :param latencyTargetMs: The p95 latency to meet, in milliseconds.
+        Defaults to 500.
+        :type latencyTargetMs: float
+        :param baseMemoryMb: The memory of an idle instance, in megabytes.
+        Defaults to 256.
+        :type baseMemoryMb: float
+        :param skus: The names of the SKUs to sweep. Defaults to every SKU
+        billed per instance.
+        :type skus: Iterable[str]
+        :param prices: The hourly cost of an instance of each SKU, by name,
+        overriding the indicative ones.
+        :type prices: Dict[str, float]
+        :param maxInstances: The instance counts to sweep, at most. Defaults
+        to the maximum of each SKU.
+        :type maxInstances: int
+        :param maxUtilization: The CPU utilization not to exceed at the
+        busiest interval, as a fraction. Defaults to 0.85.
+        :type maxUtilization: float
+        :raise ValueError: If a SKU is unknown, or has no price.
+        """
+        self._latency_target_ms = latencyTargetMs
+        self._base_memory_mb = baseMemoryMb
+        self._skus = []
+        for name in skus if skus is not None else ():
+            sku = AppServicePlanSkus.sku(name)
+            if sku is None:
+                raise ValueError(f"Unknown App Service plan SKU: {name}")
+            self._skus.append(sku)
+        self._prices = {name.lower(): price for name, price in (prices or {}).items()}
+        for sku in self._skus:
+            if self.price(sku) is None:
+                raise ValueError(
+                    f"App Service plan SKU {sku.name} has no instance price; "
+                    "pass one in prices"
+                )
+        self._max_instances = maxInstances
+        self._max_utilization = maxUtilization
+        self._profiles: List[RequestProfile] = []
+        self._bins: Dict[int, List[float]] = {}
+        self._intervals = 0
+
+    @property
+    def latency_target_ms(self) -> float:
+        """
+        Retrieves the p95 latency to meet.
+        :return: Such latency, in milliseconds.
+        :rtype: float
+        """
+        return self._latency_target_ms if self._latency_target_ms is not None else 500
+
+    @property
+    def base_memory_mb(self) -> float:
+        """
+        Retrieves the memory of an idle instance.
+        :return: Such memory, in megabytes.
+        :rtype: float
+        """
+        return self._base_memory_mb if self._base_memory_mb is not None else 256
+
+    @property
+    def max_utilization(self) -> float:
+        """
+        Retrieves the CPU utilization not to exceed at the busiest interval.
+        :return: Such utilization, as a fraction.
+        :rtype: float
+        """
+        return self._max_utilization if self._max_utilization is not None else 0.85
+
+    @property
+    def skus(self) -> List[AppServicePlanSku]:
+        """
+        Retrieves the SKUs to sweep.
+        :return: Such SKUs.
+        :rtype: List[pythoneda.shared.iac.pulumi.azure.AppServicePlanSku]
+        """
+        if self._skus:
+            return list(self._skus)
+        return [sku for sku in AppServicePlanSkus.skus if self.price(sku) is not None]
+
+    @property
+    def profiles(self) -> List[RequestProfile]:
+        """
+        Retrieves the request profiles.
+        :return: Such profiles.
+        :rtype: List[pythoneda.shared.iac.pulumi.azure.RequestProfile]
+        """
+        return list(self._profiles)
+
+    @property
+    def intervals(self) -> int:
+        """
+        Retrieves the number of intervals of the series added so far.
+        :return: Such number.
+        :rtype: int
+        """
+        return self._intervals
+
+    def price(self, sku: AppServicePlanSku) -> float:
+        """
+        Retrieves the hourly cost of an instance of a SKU.
+        :param sku: The SKU.
+        :type sku: pythoneda.shared.iac.pulumi.azure.AppServicePlanSku
+        :return: Such cost, or None if unknown.
+        :rtype: float
+        """
+        return self._prices.get(sku.name.lower(), sku.hourly_cost)
+
+    def profile(
+        self, name: str, share: float, cpuSeconds: float, memoryMb: float = 0
+    ) -> "AppServicePlanPlanner":
+        """
+        Adds a request profile.
+        :param name: The name of the profile, e.g. "search".
+        :type name: str
+        :param share: Its share of the requests, relative to the others.
+        :type share: float
+        :param cpuSeconds: The CPU seconds a request takes on one core.
+        :type cpuSeconds: float
+        :param memoryMb: The memory a request holds while in flight, in
+        megabytes.
+        :type memoryMb: float
+        :return: This planner.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AppServicePlanPlanner
+        """
+        if share <= 0 or cpuSeconds <= 0 or memoryMb < 0:
+            raise ValueError(
+                f"Request profile {name} needs a positive share and CPU seconds"
+            )
+        self._profiles.append(RequestProfile(name, share, cpuSeconds, memoryMb))
+        return self
+
+    @classmethod
+    def rates(cls, path: str, column: str = "rate") -> Iterator[float]:
+        """
+        Reads a request-rate time series.
+        :param path: The path of the file, CSV if it ends with ".csv", JSONL
+        otherwise.
+        :type path: str
+        :param column: The column with the requests per second.
+        :type column: str
+        :return: The rate of each interval.
+        :rtype: Iterator[float]
+        """
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            if path.lower().endswith(".csv"):
+                for row in csv.DictReader(file):
+                    yield float(row[column])
+            else:
+                decoder = json.JSONDecoder()
+                for line in file:
+                    line = line.strip()
+                    if line:
+                        yield float(decoder.decode(line)[column])
+
+    def add_rates(self, rates: Iterable[float]):
+        """
+        Adds intervals of the request-rate time series, all of the same
+        length.
+        :param rates: The requests per second of each interval.
+        :type rates: Iterable[float]
+        """
+        log_ratio = math.log(self.bin_ratio)
+        bins = self._bins
+        for rate in rates:
+            if rate < 0:
+                raise ValueError(f"Negative request rate: {rate}")
+            self._intervals += 1
+            if rate == 0:
+                continue
+            key = math.ceil(math.log(rate) / log_ratio - 1e-9)
+            entry = bins.get(key)
+            if entry is None:
+                bins[key] = [1, rate]
+            else:
+                entry[0] += 1
+                if rate > entry[1]:
+                    entry[1] = rate
+
+    def _service(self) -> Tuple[float, float]:
+        """
+        Retrieves the mean demand of a request.
+        :return: The mean CPU seconds and in-flight memory, in megabytes.
+        :rtype: Tuple[float, float]
+        """
+        if not self._profiles:
+            raise ValueError("At least one request profile is required")
+        total = sum(profile.share for profile in self._profiles)
+        return (
+            sum(p.share * p.cpu_seconds for p in self._profiles) / total,
+            sum(p.share * p.memory_mb for p in self._profiles) / total,
+        )
+
+    @classmethod
+    def _erlang_c(cls, servers: int, load: float) -> float:
+        """
+        Computes the probability that a request waits, in an M/M/c queue.
+        :param servers: The number of servers.
+        :type servers: int
+        :param load: The offered load, in servers busy.
+        :type load: float
+        :return: Such probability.
+        :rtype: float
+        """
+        blocking = 1.0
+        for server in range(1, servers + 1):
+            blocking = load * blocking / (server + load * blocking)
+        return servers * blocking / (servers - load * (1 - blocking))
+
+    def _tail_probability(
+        self, time: float, rate: float, base: float, terms: List[Tuple[float, float]]
+    ) -> float:
+        """
+        Computes the share of requests slower than a time.
+        :param time: The time, in seconds.
+        :type time: float
+        :param rate: The service rate of a server.
+        :type rate: float
+        :param base: The weight of the service time tail.
+        :type base: float
+        :param terms: The weight and decay of the waiting tail of each bin.
+        :type terms: List[Tuple[float, float]]
+        :return: Such share.
+        :rtype: float
+        """
+        return base * math.exp(-rate * time) - sum(
+            weight * math.exp(-decay * time) for weight, decay in terms
+        )
+
+    def plan(self, sku: AppServicePlanSku, instances: int) -> CapacityPlan:
+        """
+        Projects a configuration.
+        :param sku: The SKU.
+        :type sku: pythoneda.shared.iac.pulumi.azure.AppServicePlanSku
+        :param instances: The instance count.
+        :type instances: int
+        :return: The projection.
+        :rtype: pythoneda.shared.iac.pulumi.azure.CapacityPlan
+        :raise ValueError: If the SKU has no price.
+        """
+        cpu_seconds, memory_mb = self._service()
+        service_rate = 1 / cpu_seconds
+        servers = sku.vcpus
+        price = self.price(sku)
+        if price is None:
+            raise ValueError(
+                f"App Service plan SKU {sku.name} has no instance price; "
+                "pass one in prices"
+            )
+        monthly_cost = price * instances * self.hours_per_month
+        capacity = instances * servers * service_rate
+        requests = 0.0
+        peak = 0.0
+        for count, rate in self._bins.values():
+            requests += count * rate
+            peak = max(peak, rate)
+        mean_utilization = (
+            requests / self._intervals / capacity if self._intervals else 0.0
+        )
+        peak_utilization = peak / capacity
+        if peak_utilization >= 1:
+            return CapacityPlan(
+                sku.tier,
+                sku.name,
+                instances,
+                servers,
+                mean_utilization,
+                peak_utilization,
+                math.inf,
+                math.inf,
+                monthly_cost,
+                False,
+            )
+        base = 0.0
+        terms = []
+        peak_in_flight = 0.0
+        for count, rate in self._bins.values():
+            arrivals = rate / instances
+            waiting = self._erlang_c(servers, arrivals / service_rate)
+            decay = servers * service_rate - arrivals
+            if abs(decay - service_rate) < 1e-9 * service_rate:
+                decay = service_rate * (1 + 1e-6)
+            weight = count * rate / requests
+            base += weight * (1 - waiting + waiting * decay / (decay - service_rate))
+            if waiting > 1e-12:
+                terms.append(
+                    (weight * waiting * service_rate / (decay - service_rate), decay)
+                )
+            peak_in_flight = max(
+                peak_in_flight, arrivals * (waiting / decay + cpu_seconds)
+            )
+        p95 = (
+            self._quantile(service_rate, base, terms, cpu_seconds) if requests else 0.0
+        )
+        peak_memory_utilization = (self.base_memory_mb + peak_in_flight * memory_mb) / (
+            sku.memory_gb * 1024
+        )
+        return CapacityPlan(
+            sku.tier,
+            sku.name,
+            instances,
+            servers,
+            mean_utilization,
+            peak_utilization,
+            peak_memory_utilization,
+            p95 * 1000,
+            monthly_cost,
+            p95 * 1000 <= self.latency_target_ms
+            and peak_utilization <= self.max_utilization
+            and peak_memory_utilization <= 1,
+        )
+
+    def _quantile(
+        self,
+        rate: float,
+        base: float,
+        terms: List[Tuple[float, float]],
+        cpuSeconds: float,
+    ) -> float:
+        """
+        Finds the p95 latency, by bisection.
+        :param rate: The service rate of a server.
+        :type rate: float
+        :param base: The weight of the service time tail.
+        :type base: float
+        :param terms: The weight and decay of the waiting tail of each bin.
+        :type terms: List[Tuple[float, float]]
+        :param cpuSeconds: The mean CPU seconds of a request.
+        :type cpuSeconds: float
+        :return: Such latency, in seconds.
+        :rtype: float
+        """
+        low = 0.0
+        high = cpuSeconds * -math.log(self._tail)
+        while self._tail_probability(high, rate, base, terms) > self._tail:
+            low = high
+            high *= 2
+        for _ in range(self._iterations):
+            middle = (low + high) / 2
+            if self._tail_probability(middle, rate, base, terms) > self._tail:
+                low = middle
+            else:
+                high = middle
+            if high - low < 1e-4 * high:
+                break
+        return high
+
+    def sweep(self) -> List[CapacityPlan]:
+        """
+        Projects every SKU and instance count.
+        :return: The projections, those meeting the latency target first,
+        cheapest first.
+        :rtype: List[pythoneda.shared.iac.pulumi.azure.CapacityPlan]
+        """
+        result = []
+        for sku in self.skus:
+            limit = sku.max_instances
+            if self._max_instances is not None:
+                limit = min(limit, self._max_instances)
+            result.extend(
+                self.plan(sku, instances) for instances in range(1, limit + 1)
+            )
+        result.sort(
+            key=lambda plan: (
+                not plan.meets_target,
+                plan.monthly_cost,
+                plan.p95_latency_ms,
+            )
+        )
+        return result
+
+    def best(self) -> CapacityPlan:
+        """
+        Finds the cheapest configuration meeting the latency target.
+        :return: Such configuration, or None if none does.
+        :rtype: pythoneda.shared.iac.pulumi.azure.CapacityPlan
+        """
+        plans = self.sweep()
+        return plans[0] if plans and plans[0].meets_target else None
+
+    @classmethod
+    def plan_trace(
+        cls,
+        ratesPath: str,
+        profiles: Iterable[Dict[str, Any]],
+        latencyTargetMs: float = None,
+        column: str = "rate",
+        **kwargs,
+    ) -> List[CapacityPlan]:
+        """
+        Sweeps the configurations for a request-rate time series in a file.
+        :param ratesPath: The path of the series, as read by rates().
+        :type ratesPath: str
+        :param profiles: The request profiles, with the arguments of
+        profile(), e.g. [{"name": "api", "share": 1, "cpuSeconds": 0.05}].
+        :type profiles: Iterable[Dict[str, Any]]
+        :param latencyTargetMs: The p95 latency to meet, in milliseconds.
+        :type latencyTargetMs: float
+        :param column: The column with the requests per second.
+        :type column: str
+        :param kwargs: Other arguments of the planner.
+        :type kwargs: Dict[str, Any]
+        :return: The projections, as sweep() sorts them.
+        :rtype: List[pythoneda.shared.iac.pulumi.azure.CapacityPlan]
+        """
+        planner = cls(latencyTargetMs, **kwargs)
+        for profile in profiles:
+            planner.profile(**profile)
+        planner.add_rates(cls.rates(ratesPath, column))
+        return planner.sweep()
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,105 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/app_service_plan_skus.py
+
+This script defines the AppServicePlanSkus class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
+
+
+class AppServicePlanSku(NamedTuple):
+    """
+    A pricing tier of App Service plans, with the resources of each instance.
+    """
+
+    name: str
+    tier: str
+    vcpus: int
+    memory_gb: float
+    max_instances: int
+    hourly_cost: Optional[float]
+
+
+_SKUS: Tuple[AppServicePlanSku, ...] = (
+    AppServicePlanSku("Y1", "Dynamic", 1, 1.5, 200, None),
+    AppServicePlanSku("B1", "Basic", 1, 1.75, 3, 0.018),
+    AppServicePlanSku("B2", "Basic", 2, 3.5, 3, 0.034),
+    AppServicePlanSku("B3", "Basic", 4, 7, 3, 0.067),
+    AppServicePlanSku("S1", "Standard", 1, 1.75, 10, 0.095),
+    AppServicePlanSku("S2", "Standard", 2, 3.5, 10, 0.19),
+    AppServicePlanSku("S3", "Standard", 4, 7, 10, 0.38),
+    AppServicePlanSku("P0v3", "PremiumV3", 1, 4, 30, 0.077),
+    AppServicePlanSku("P1v3", "PremiumV3", 2, 8, 30, 0.155),
+    AppServicePlanSku("P2v3", "PremiumV3", 4, 16, 30, 0.31),
+    AppServicePlanSku("P3v3", "PremiumV3", 8, 32, 30, 0.62),
+    AppServicePlanSku("EP1", "ElasticPremium", 1, 3.5, 100, 0.173),
+    AppServicePlanSku("EP2", "ElasticPremium", 2, 7, 100, 0.346),
+    AppServicePlanSku("EP3", "ElasticPremium", 4, 14, 100, 0.692),
+)
+
+
+class AppServicePlanSkus:
+    """
+    The pricing tiers of App Service plans, with the vCPUs, memory and
+    maximum instances of each one.
+
+    Costs are indicative Linux pay-as-you-go rates, in US dollars per
+    instance and hour; they vary by region and over time, so planners accept
+    their own. Consumption plans are billed per execution, and have none.
+
+    Class name: AppServicePlanSkus
+
+    Responsibilities:
+        - Resolve SKU names to their resources.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.AppServicePlan
+        - pythoneda.shared.iac.pulumi.azure.AppServicePlanPlanner
+    """
+
+    skus: Tuple[AppServicePlanSku, ...] = _SKUS
+
+    _by_name: Mapping[str, AppServicePlanSku] = MappingProxyType(
+        {sku.name.lower(): sku for sku in _SKUS}
+    )
+
+    @classmethod
+    def sku(cls, name: str) -> Optional[AppServicePlanSku]:
+        """
+        Retrieves a SKU by name.
+        :param name: The name, e.g. "P1v3", in any case.
+        :type name: str
+        :return: The SKU, or None if unknown.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AppServicePlanSku
+        """
+        return cls._by_name.get((name or "").lower())
+
+    @classmethod
+    def tier(cls, tier: str) -> Tuple[AppServicePlanSku, ...]:
+        """
+        Retrieves the SKUs of a tier.
+        :param tier: The tier, e.g. "PremiumV3".
+        :type tier: str
+        :return: Such SKUs, from the smallest.
+        :rtype: Tuple[pythoneda.shared.iac.pulumi.azure.AppServicePlanSku, ...]
+        """
+        return tuple(sku for sku in cls.skus if sku.tier == tier)
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,756 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/autoscale_policy.py
+
+This script defines the AutoscalePolicy class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import pulumi_azure_native
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+
+class AutoscaleRule(NamedTuple):
+    """
+    A pair of scale rules on a metric: instances are added when it goes above
+    a threshold, and removed when it goes below a lower one.
+    """
+
+    metric: str
+    scale_out_above: float
+    scale_in_below: float
+    scale_out_by: int
+    scale_in_by: int
+    statistic: str
+    time_window_minutes: int
+    scale_out_cooldown_minutes: int
+    scale_in_cooldown_minutes: int
+
+
+class AutoscaleSchedule(NamedTuple):
+    """
+    A weekly window with its own instance counts, e.g. business hours.
+    """
+
+    name: str
+    days: Tuple[str, ...]
+    start: str
+    end: str
+    minimum: int
+    maximum: int
+    default: int
+
+
+class AutoscalePolicy:
+    """
+    A builder of autoscale settings for App Service plans.
+
+    Metric rules scale on CPU, memory or HTTP queue length, and apply to
+    every profile: the default one and each schedule. Schedules are weekly
+    windows with their own instance counts; Azure keeps a recurring profile
+    until the next one starts, so a profile restoring the default counts is
+    added when each window ends.
+
+    Rules are checked locally for flapping: the load of the instances left
+    after a scale-in must stay below the scale-out threshold, and the load
+    spread over the instances added by a scale-out must stay above the
+    scale-in threshold, for every instance count of every profile. The load
+    is assumed to be spread evenly, as it is for CPU, memory and queues.
+
+    Class name: AutoscalePolicy
+
+    Responsibilities:
+        - Build and validate autoscale profiles and rules.
+        - Detect rules which would scale out and in endlessly.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.AppServicePlanAutoscale
+    """
+
+    metrics = (
+        "CpuPercentage",
+        "MemoryPercentage",
+        "HttpQueueLength",
+        "DiskQueueLength",
+        "BytesReceived",
+        "BytesSent",
+    )
+    percentage_metrics = ("CpuPercentage", "MemoryPercentage")
+    statistics = ("Average", "Min", "Max", "Sum")
+    days = (
+        "Monday",
+        "Tuesday",
+        "Wednesday",
+        "Thursday",
+        "Friday",
+        "Saturday",
+        "Sunday",
+    )
+    max_profiles = 20
+    max_rules = 10
+    min_time_window_minutes = 5
+    max_time_window_minutes = 720
+    max_cooldown_minutes = 10080
+    default_profile = "default"
+
+    _time_aggregations = {
+        "Average": "Average",
+        "Min": "Minimum",
+        "Max": "Maximum",
+        "Sum": "Total",
+    }
+    _time = re.compile(r"([01]\d|2[0-3]):([0-5]\d)")
+    _week = 7 * 1440
+
+    def __init__(
+        self,
+        minimum: int = None,
+        maximum: int = None,
+        default: int = None,
+        timeZone: str = None,
+    ):
+        """
+        Creates a new AutoscalePolicy instance.
+        :param minimum: The minimum instance count. Defaults to 1.
+        :type minimum: int
+        :param maximum: The maximum instance count.
+        :type maximum: int
+        :param default: The instance count when metrics are not available.
+        Defaults to the minimum.
+        :type default: int
+        :param timeZone: The time zone of the schedules, e.g.
+        "W. Europe Standard Time". Defaults to "UTC".
+        :type timeZone: str
+        """
+        self._minimum = minimum
+        self._maximum = maximum
+        self._default = default
+        self._time_zone = timeZone
+        self._rules: List[AutoscaleRule] = []
+        self._schedules: List[AutoscaleSchedule] = []
+
+    @property
+    def minimum(self) -> int:
+        """
+        Retrieves the minimum instance count.
+        :return: Such count.
+        :rtype: int
+        """
+        return self._minimum if self._minimum is not None else 1
+
+    @property
+    def maximum(self) -> int:
+        """
+        Retrieves the maximum instance count.
+        :return: Such count, or None if not set.
+        :rtype: int
+        """
+        return self._maximum
+
+    @property
+    def default(self) -> int:
+        """
+        Retrieves the instance count when metrics are not available.
+        :return: Such count.
+        :rtype: int
+        """
+        return self._default if self._default is not None else self.minimum
+
+    @property
+    def time_zone(self) -> str:
+        """
+        Retrieves the time zone of the schedules.
+        :return: Such time zone.
+        :rtype: str
+        """
+        return self._time_zone if self._time_zone is not None else "UTC"
+
+    @property
+    def rules(self) -> List[AutoscaleRule]:
+        """
+        Retrieves the metric rules.
+        :return: Such rules.
+        :rtype: List[pythoneda.shared.iac.pulumi.azure.AutoscaleRule]
+        """
+        return list(self._rules)
+
+    @property
+    def schedules(self) -> List[AutoscaleSchedule]:
+        """
+        Retrieves the schedules.
+        :return: Such schedules.
+        :rtype: List[pythoneda.shared.iac.pulumi.azure.AutoscaleSchedule]
+        """
+        return list(self._schedules)
+
+    def scale_on(
+        self,
+        metric: str,
+        scaleOutAbove: float = None,
+        scaleInBelow: float = None,
+        scaleOutBy: int = 1,
+        scaleInBy: int = 1,
+        statistic: str = "Average",
+        timeWindowMinutes: int = 10,
+        scaleOutCooldownMinutes: int = 5,
+        scaleInCooldownMinutes: int = 10,
+    ) -> "AutoscalePolicy":
+        """
+        Adds rules on a metric.
+        :param metric: The metric, e.g. "CpuPercentage" or "HttpQueueLength".
+        :type metric: str
+        :param scaleOutAbove: The threshold to add instances above, if any.
+        :type scaleOutAbove: float
+        :param scaleInBelow: The threshold to remove instances below, if any.
+        :type scaleInBelow: float
+        :param scaleOutBy: The instances added each time.
+        :type scaleOutBy: int
+        :param scaleInBy: The instances removed each time.
+        :type scaleInBy: int
+        :param statistic: How the metric is aggregated, e.g. "Average".
+        :type statistic: str
+        :param timeWindowMinutes: The minutes the metric is aggregated over.
+        :type timeWindowMinutes: int
+        :param scaleOutCooldownMinutes: The minutes to wait after adding
+        instances.
+        :type scaleOutCooldownMinutes: int
+        :param scaleInCooldownMinutes: The minutes to wait after removing
+        instances.
+        :type scaleInCooldownMinutes: int
+        :return: This policy.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AutoscalePolicy
+        """
+        self._rules.append(
+            AutoscaleRule(
+                metric,
+                scaleOutAbove,
+                scaleInBelow,
+                scaleOutBy,
+                scaleInBy,
+                statistic,
+                timeWindowMinutes,
+                scaleOutCooldownMinutes,
+                scaleInCooldownMinutes,
+            )
+        )
+        return self
+
+    def schedule(
+        self,
+        name: str,
+        days: Iterable[str],
+        start: str,
+        end: str,
+        minimum: int,
+        maximum: int,
+        default: int = None,
+    ) -> "AutoscalePolicy":
+        """
+        Adds a weekly window with its own instance counts.
+        :param name: The name of the window, e.g. "business hours".
+        :type name: str
+        :param days: The days it starts, e.g. ["Monday", "Friday"].
+        :type days: Iterable[str]
+        :param start: The time it starts, e.g. "08:00".
+        :type start: str
+        :param end: The time it ends, e.g. "18:00". Windows ending before
+        they start end the following day.
+        :type end: str
+        :param minimum: The minimum instance count.
+        :type minimum: int
+        :param maximum: The maximum instance count.
+        :type maximum: int
+        :param default: The instance count when metrics are not available.
+        Defaults to the minimum.
+        :type default: int
+        :return: This policy.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AutoscalePolicy
+        """
+        self._schedules.append(
+            AutoscaleSchedule(
+                name,
+                tuple(days),
+                start,
+                end,
+                minimum,
+                maximum,
+                default if default is not None else minimum,
+            )
+        )
+        return self
+
+    @classmethod
+    def from_dict(cls, value: Dict) -> "AutoscalePolicy":
+        """
+        Builds a policy from its description in a stack spec, e.g.
+        {"minimum": 2, "maximum": 10, "rules": [{"metric": "CpuPercentage",
+        "scaleOutAbove": 70, "scaleInBelow": 30}], "schedules": [...]}.
+        :param value: The description, with the arguments of scale_on and
+        schedule.
+        :type value: Dict
+        :return: The policy.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AutoscalePolicy
+        """
+        result = cls(
+            value.get("minimum"),
+            value.get("maximum"),
+            value.get("default"),
+            value.get("timeZone"),
+        )
+        for rule in value.get("rules", []):
+            result.scale_on(**rule)
+        for schedule in value.get("schedules", []):
+            result.schedule(**schedule)
+        return result
+
+    @classmethod
+    def _minutes(cls, time: str) -> int:
+        """
+        Parses a time of day.
+        :param time: The time, e.g. "08:30".
+        :type time: str
+        :return: The minutes since midnight, or None if not valid.
+        :rtype: int
+        """
+        match = cls._time.fullmatch(time or "")
+        if match is None:
+            return None
+        return int(match.group(1)) * 60 + int(match.group(2))
+
+    def _profiles(self) -> Iterator[Tuple[str, int, int, int]]:
+        """
+        Retrieves the instance counts of each profile.
+        :return: The name, minimum, maximum and default count of each one.
+        :rtype: Iterator[Tuple[str, int, int, int]]
+        """
+        yield self.default_profile, self.minimum, self.maximum, self.default
+        for schedule in self._schedules:
+            yield schedule.name, schedule.minimum, schedule.maximum, schedule.default
+
+    def _windows(self, schedule: AutoscaleSchedule) -> List[Tuple[int, int]]:
+        """
+        Retrieves the minutes of the week a schedule spans.
+        :param schedule: The schedule.
+        :type schedule: pythoneda.shared.iac.pulumi.azure.AutoscaleSchedule
+        :return: The start and end minute of each window, split at the end
+        of the week.
+        :rtype: List[Tuple[int, int]]
+        """
+        start = self._minutes(schedule.start)
+        end = self._minutes(schedule.end)
+        if start is None or end is None or start == end:
+            return []
+        result = []
+        for day in set(schedule.days) & set(self.days):
+            begin = self.days.index(day) * 1440 + start
+            finish = begin + (end - start) % 1440
+            if finish > self._week:
+                result.append((begin, self._week))
+                result.append((0, finish - self._week))
+            else:
+                result.append((begin, finish))
+        return result
+
+    def _endings(self, schedule: AutoscaleSchedule) -> List[str]:
+        """
+        Retrieves the days a schedule ends, but another one starts then.
+        :param schedule: The schedule.
+        :type schedule: pythoneda.shared.iac.pulumi.azure.AutoscaleSchedule
+        :return: Such days.
+        :rtype: List[str]
+        """
+        start = self._minutes(schedule.start)
+        end = self._minutes(schedule.end)
+        starts = {(day, other.start) for other in self._schedules for day in other.days}
+        result = []
+        for day in self.days:
+            if day not in schedule.days:
+                continue
+            ending = self.days[(self.days.index(day) + (end <= start)) % 7]
+            if (ending, schedule.end) not in starts and ending not in result:
+                result.append(ending)
+        return result
+
+    @classmethod
+    def _capacity_problems(
+        cls, profile: str, minimum: int, maximum: int, default: int, maxInstances: int
+    ) -> List[str]:
+        """
+        Describes why the instance counts of a profile are not valid.
+        :param profile: The name of the profile.
+        :type profile: str
+        :param minimum: The minimum instance count.
+        :type minimum: int
+        :param maximum: The maximum instance count.
+        :type maximum: int
+        :param default: The default instance count.
+        :type default: int
+        :param maxInstances: The instances the plan allows, if known.
+        :type maxInstances: int
+        :return: The problems found, if any.
+        :rtype: List[str]
+        """
+        if maximum is None:
+            return [f"Profile {profile} has no maximum instance count"]
+        result = []
+        if not 1 <= minimum <= default <= maximum:
+            result.append(
+                f"Profile {profile} instance counts must be 1 <= minimum "
+                f"({minimum}) <= default ({default}) <= maximum ({maximum})"
+            )
+        if maxInstances is not None and maximum > maxInstances:
+            result.append(
+                f"Profile {profile} maximum ({maximum}) exceeds the "
+                f"{maxInstances} instances of the plan"
+            )
+        return result
+
+    @classmethod
+    def _flapping(cls, rule: AutoscaleRule, minimum: int, maximum: int) -> List[str]:
+        """
+        Describes the instance counts a rule would flap at.
+        :param rule: The rule.
+        :type rule: pythoneda.shared.iac.pulumi.azure.AutoscaleRule
+        :param minimum: The minimum instance count.
+        :type minimum: int
+        :param maximum: The maximum instance count.
+        :type maximum: int
+        :return: The problems found, if any.
+        :rtype: List[str]
+        """
+        result = []
+        out_above = rule.scale_out_above
+        in_below = rule.scale_in_below
+        for count in range(minimum + 1, maximum + 1):
+            fewer = max(minimum, count - rule.scale_in_by)
+            projected = in_below * count / fewer
+            if projected >= out_above:
+                result.append(
+                    f"{rule.metric} scale-in from {count} to {fewer} instances "
+                    f"raises {in_below} to {projected:g}, above the scale-out "
+                    f"threshold {out_above}"
+                )
+                break
+        for count in range(minimum, maximum):
+            more = min(maximum, count + rule.scale_out_by)
+            projected = out_above * count / more
+            if projected <= in_below:
+                result.append(
+                    f"{rule.metric} scale-out from {count} to {more} instances "
+                    f"lowers {out_above} to {projected:g}, below the scale-in "
+                    f"threshold {in_below}"
+                )
+                break
+        return result
+
+    def _rule_problems(self, rule: AutoscaleRule) -> List[str]:
+        """
+        Describes why a rule is not valid, regardless of the profile.
+        :param rule: The rule.
+        :type rule: pythoneda.shared.iac.pulumi.azure.AutoscaleRule
+        :return: The problems found, if any.
+        :rtype: List[str]
+        """
+        result = []
+        if rule.metric not in self.metrics:
+            result.append(
+                f"Unknown metric {rule.metric}, expected one of "
+                f"{', '.join(self.metrics)}"
+            )
+        if rule.statistic not in self.statistics:
+            result.append(f"Unknown statistic {rule.statistic} of {rule.metric}")
+        thresholds = [
+            value
+            for value in (rule.scale_out_above, rule.scale_in_below)
+            if value is not None
+        ]
+        if not thresholds:
+            result.append(f"{rule.metric} has no threshold")
+        upper = 100 if rule.metric in self.percentage_metrics else float("inf")
+        if any(not 0 <= value <= upper for value in thresholds):
+            result.append(f"{rule.metric} thresholds must be 0 to {upper:g}")
+        if len(thresholds) == 2 and rule.scale_in_below >= rule.scale_out_above:
+            result.append(
+                f"{rule.metric} scale-in threshold {rule.scale_in_below} must be "
+                f"below the scale-out threshold {rule.scale_out_above}"
+            )
+        if rule.scale_out_by < 1 or rule.scale_in_by < 1:
+            result.append(f"{rule.metric} must scale by one instance at least")
+        if not (
+            self.min_time_window_minutes
+            <= rule.time_window_minutes
+            <= self.max_time_window_minutes
+        ):
+            result.append(
+                f"{rule.metric} time window must be {self.min_time_window_minutes} "
+                f"to {self.max_time_window_minutes} minutes"
+            )
+        for cooldown in (
+            rule.scale_out_cooldown_minutes,
+            rule.scale_in_cooldown_minutes,
+        ):
+            if not 1 <= cooldown <= self.max_cooldown_minutes:
+                result.append(
+                    f"{rule.metric} cooldowns must be 1 to "
+                    f"{self.max_cooldown_minutes} minutes"
+                )
+                break
+        return result
+
+    def problems(self, maxInstances: int = None) -> List[str]:
+        """
+        Describes why the policy is not valid.
+        :param maxInstances: The instances the plan allows, if known.
+        :type maxInstances: int
+        :return: The problems found, if any.
+        :rtype: List[str]
+        """
+        result = []
+        metrics = set()
+        rule_count = 0
+        for rule in self._rules:
+            if rule.metric in metrics:
+                result.append(f"Duplicated rules on {rule.metric}")
+            metrics.add(rule.metric)
+            result.extend(self._rule_problems(rule))
+            rule_count += (rule.scale_out_above is not None) + (
+                rule.scale_in_below is not None
+            )
+        if rule_count > self.max_rules:
+            result.append(f"Profiles have at most {self.max_rules} rules")
+        names = set()
+        windows = []
+        for schedule in self._schedules:
+            if not schedule.name or schedule.name in names:
+                result.append(f"Schedule name {schedule.name!r} must be unique")
+            names.add(schedule.name)
+            unknown = [day for day in schedule.days if day not in self.days]
+            if unknown or not schedule.days:
+                result.append(
+                    f"Schedule {schedule.name} days must be some of "
+                    f"{', '.join(self.days)}"
+                )
+            for time in (schedule.start, schedule.end):
+                if self._minutes(time) is None:
+                    result.append(
+                        f"Schedule {schedule.name} time {time!r} must be HH:MM"
+                    )
+            if schedule.start == schedule.end:
+                result.append(f"Schedule {schedule.name} must end after it starts")
+            for begin, finish in self._windows(schedule):
+                for other, other_begin, other_finish in windows:
+                    if begin < other_finish and other_begin < finish:
+                        result.append(f"Schedules {other} and {schedule.name} overlap")
+                windows.append((schedule.name, begin, finish))
+        profiles = 0
+        for profile, minimum, maximum, default in self._profiles():
+            profiles += 1
+            problems = self._capacity_problems(
+                profile, minimum, maximum, default, maxInstances
+            )
+            result.extend(problems)
+            if problems:
+                continue
+            for rule in self._rules:
+                if rule.scale_out_above is None or rule.scale_in_below is None:
+                    continue
+                if rule.scale_in_below >= rule.scale_out_above:
+                    continue
+                result.extend(
+                    f"Profile {profile} flaps: {problem}"
+                    for problem in self._flapping(rule, minimum, maximum)
+                )
+        profiles += sum(
+            1
+            for schedule in self._schedules
+            if self._minutes(schedule.start) is not None
+            and self._minutes(schedule.end) is not None
+            and self._endings(schedule)
+        )
+        if profiles > self.max_profiles:
+            result.append(f"Policies have at most {self.max_profiles} profiles")
+        return list(dict.fromkeys(result))
+
+    def validate(self, maxInstances: int = None):
+        """
+        Checks the policy is valid.
+        :param maxInstances: The instances the plan allows, if known.
+        :type maxInstances: int
+        :raise ValueError: If the policy is not valid.
+        """
+        problems = self.problems(maxInstances)
+        if problems:
+            raise ValueError("; ".join(problems))
+
+    def _rule_args(
+        self, resourceUri: str
+    ) -> List[pulumi_azure_native.insights.ScaleRuleArgs]:
+        """
+        Builds the scale rules.
+        :param resourceUri: The id of the App Service plan.
+        :type resourceUri: str
+        :return: Such rules.
+        :rtype: List[pulumi_azure_native.insights.ScaleRuleArgs]
+        """
+        insights = pulumi_azure_native.insights
+        result = []
+        for rule in self._rules:
+            for operator, threshold, direction, count, cooldown in (
+                (
+                    "GreaterThan",
+                    rule.scale_out_above,
+                    "Increase",
+                    rule.scale_out_by,
+                    rule.scale_out_cooldown_minutes,
+                ),
+                (
+                    "LessThan",
+                    rule.scale_in_below,
+                    "Decrease",
+                    rule.scale_in_by,
+                    rule.scale_in_cooldown_minutes,
+                ),
+            ):
+                if threshold is None:
+                    continue
+                result.append(
+                    insights.ScaleRuleArgs(
+                        metric_trigger=insights.MetricTriggerArgs(
+                            metric_name=rule.metric,
+                            metric_resource_uri=resourceUri,
+                            operator=operator,
+                            statistic=rule.statistic,
+                            threshold=threshold,
+                            time_aggregation=self._time_aggregations[rule.statistic],
+                            time_grain="PT1M",
+                            time_window=f"PT{rule.time_window_minutes}M",
+                        ),
+                        scale_action=insights.ScaleActionArgs(
+                            direction=direction,
+                            type="ChangeCount",
+                            value=str(count),
+                            cooldown=f"PT{cooldown}M",
+                        ),
+                    )
+                )
+        return result
+
+    def _recurrence(
+        self, days: Iterable[str], time: str
+    ) -> pulumi_azure_native.insights.RecurrenceArgs:
+        """
+        Builds a weekly recurrence.
+        :param days: The days.
+        :type days: Iterable[str]
+        :param time: The time of day, e.g. "08:00".
+        :type time: str
+        :return: Such recurrence.
+        :rtype: pulumi_azure_native.insights.RecurrenceArgs
+        """
+        minutes = self._minutes(time)
+        return pulumi_azure_native.insights.RecurrenceArgs(
+            frequency="Week",
+            schedule=pulumi_azure_native.insights.RecurrentScheduleArgs(
+                days=list(days),
+                hours=[minutes // 60],
+                minutes=[minutes % 60],
+                time_zone=self.time_zone,
+            ),
+        )
+
+    @classmethod
+    def _profile_args(
+        cls,
+        name: str,
+        minimum: int,
+        maximum: int,
+        default: int,
+        rules: List[pulumi_azure_native.insights.ScaleRuleArgs],
+        recurrence: pulumi_azure_native.insights.RecurrenceArgs = None,
+    ) -> pulumi_azure_native.insights.AutoscaleProfileArgs:
+        """
+        Builds an autoscale profile.
+        :param name: The name of the profile.
+        :type name: str
+        :param minimum: The minimum instance count.
+        :type minimum: int
+        :param maximum: The maximum instance count.
+        :type maximum: int
+        :param default: The default instance count.
+        :type default: int
+        :param rules: The scale rules.
+        :type rules: List[pulumi_azure_native.insights.ScaleRuleArgs]
+        :param recurrence: When the profile starts, if not the default one.
+        :type recurrence: pulumi_azure_native.insights.RecurrenceArgs
+        :return: Such profile.
+        :rtype: pulumi_azure_native.insights.AutoscaleProfileArgs
+        """
+        return pulumi_azure_native.insights.AutoscaleProfileArgs(
+            name=name,
+            capacity=pulumi_azure_native.insights.ScaleCapacityArgs(
+                minimum=str(minimum), maximum=str(maximum), default=str(default)
+            ),
+            rules=rules,
+            recurrence=recurrence,
+        )
+
+    def args(
+        self, resourceUri: str
+    ) -> List[pulumi_azure_native.insights.AutoscaleProfileArgs]:
+        """
+        Builds the autoscale profiles.
+        :param resourceUri: The id of the App Service plan.
+        :type resourceUri: str
+        :return: Such profiles.
+        :rtype: List[pulumi_azure_native.insights.AutoscaleProfileArgs]
+        """
+        rules = self._rule_args(resourceUri)
+        result = [
+            self._profile_args(
+                self.default_profile, self.minimum, self.maximum, self.default, rules
+            )
+        ]
+        for schedule in self._schedules:
+            result.append(
+                self._profile_args(
+                    schedule.name,
+                    schedule.minimum,
+                    schedule.maximum,
+                    schedule.default,
+                    rules,
+                    self._recurrence(schedule.days, schedule.start),
+                )
+            )
+            endings = self._endings(schedule)
+            if endings:
+                result.append(
+                    self._profile_args(
+                        json.dumps(
+                            {"name": self.default_profile, "for": schedule.name}
+                        ),
+                        self.minimum,
+                        self.maximum,
+                        self.default,
+                        rules,
+                        self._recurrence(endings, schedule.end),
+                    )
+                )
+        return result
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,275 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/azure_regions.py
+
+This script defines the AzureRegions class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
+
+
+class AzureRegion(NamedTuple):
+    """
+    A region of the Azure public cloud.
+    """
+
+    name: str
+    display_name: str
+    abbreviation: str
+    paired_region: Optional[str]
+    geography: str
+
+
+_REGIONS: Tuple[AzureRegion, ...] = (
+    AzureRegion("eastus", "East US", "eus", "westus", "United States"),
+    AzureRegion("eastus2", "East US 2", "eus2", "centralus", "United States"),
+    AzureRegion("centralus", "Central US", "cus", "eastus2", "United States"),
+    AzureRegion(
+        "northcentralus", "North Central US", "ncus", "southcentralus", "United States"
+    ),
+    AzureRegion(
+        "southcentralus", "South Central US", "scus", "northcentralus", "United States"
+    ),
+    AzureRegion("westcentralus", "West Central US", "wcus", "westus2", "United States"),
+    AzureRegion("westus", "West US", "wus", "eastus", "United States"),
+    AzureRegion("westus2", "West US 2", "wus2", "westcentralus", "United States"),
+    AzureRegion("westus3", "West US 3", "wus3", "eastus", "United States"),
+    AzureRegion("canadacentral", "Canada Central", "cnc", "canadaeast", "Canada"),
+    AzureRegion("canadaeast", "Canada East", "cne", "canadacentral", "Canada"),
+    AzureRegion("mexicocentral", "Mexico Central", "mxc", None, "Mexico"),
+    AzureRegion("brazilsouth", "Brazil South", "brs", "southcentralus", "Brazil"),
+    AzureRegion("brazilsoutheast", "Brazil Southeast", "bse", "brazilsouth", "Brazil"),
+    AzureRegion("northeurope", "North Europe", "ne", "westeurope", "Europe"),
+    AzureRegion("westeurope", "West Europe", "we", "northeurope", "Europe"),
+    AzureRegion("uksouth", "UK South", "uks", "ukwest", "United Kingdom"),
+    AzureRegion("ukwest", "UK West", "ukw", "uksouth", "United Kingdom"),
+    AzureRegion("francecentral", "France Central", "frc", "francesouth", "France"),
+    AzureRegion("francesouth", "France South", "frs", "francecentral", "France"),
+    AzureRegion(
+        "germanywestcentral",
+        "Germany West Central",
+        "gwc",
+        "germanynorth",
+        "Germany",
+    ),
+    AzureRegion("germanynorth", "Germany North", "gn", "germanywestcentral", "Germany"),
+    AzureRegion(
+        "switzerlandnorth",
+        "Switzerland North",
+        "szn",
+        "switzerlandwest",
+        "Switzerland",
+    ),
+    AzureRegion(
+        "switzerlandwest",
+        "Switzerland West",
+        "szw",
+        "switzerlandnorth",
+        "Switzerland",
+    ),
+    AzureRegion("norwayeast", "Norway East", "nwe", "norwaywest", "Norway"),
+    AzureRegion("norwaywest", "Norway West", "nww", "norwayeast", "Norway"),
+    AzureRegion("swedencentral", "Sweden Central", "sdc", "swedensouth", "Sweden"),
+    AzureRegion("swedensouth", "Sweden South", "sds", "swedencentral", "Sweden"),
+    AzureRegion("polandcentral", "Poland Central", "plc", None, "Poland"),
+    AzureRegion("italynorth", "Italy North", "itn", None, "Italy"),
+    AzureRegion("spaincentral", "Spain Central", "spc", None, "Spain"),
+    AzureRegion("israelcentral", "Israel Central", "ilc", None, "Israel"),
+    AzureRegion("qatarcentral", "Qatar Central", "qac", None, "Qatar"),
+    AzureRegion("uaenorth", "UAE North", "uan", "uaecentral", "UAE"),
+    AzureRegion("uaecentral", "UAE Central", "uac", "uaenorth", "UAE"),
+    AzureRegion(
+        "southafricanorth",
+        "South Africa North",
+        "san",
+        "southafricawest",
+        "South Africa",
+    ),
+    AzureRegion(
+        "southafricawest",
+        "South Africa West",
+        "saw",
+        "southafricanorth",
+        "South Africa",
+    ),
+    AzureRegion("eastasia", "East Asia", "ea", "southeastasia", "Asia Pacific"),
+    AzureRegion("southeastasia", "Southeast Asia", "sea", "eastasia", "Asia Pacific"),
+    AzureRegion("japaneast", "Japan East", "jpe", "japanwest", "Japan"),
+    AzureRegion("japanwest", "Japan West", "jpw", "japaneast", "Japan"),
+    AzureRegion("koreacentral", "Korea Central", "krc", "koreasouth", "Korea"),
+    AzureRegion("koreasouth", "Korea South", "krs", "koreacentral", "Korea"),
+    AzureRegion("centralindia", "Central India", "inc", "southindia", "India"),
+    AzureRegion("southindia", "South India", "ins", "centralindia", "India"),
+    AzureRegion("westindia", "West India", "inw", "southindia", "India"),
+    AzureRegion("jioindiacentral", "Jio India Central", "jic", "jioindiawest", "India"),
+    AzureRegion("jioindiawest", "Jio India West", "jiw", "jioindiacentral", "India"),
+    AzureRegion(
+        "australiaeast", "Australia East", "ae", "australiasoutheast", "Australia"
+    ),
+    AzureRegion(
+        "australiasoutheast",
+        "Australia Southeast",
+        "ase",
+        "australiaeast",
+        "Australia",
+    ),
+    AzureRegion(
+        "australiacentral",
+        "Australia Central",
+        "acl",
+        "australiacentral2",
+        "Australia",
+    ),
+    AzureRegion(
+        "australiacentral2",
+        "Australia Central 2",
+        "acl2",
+        "australiacentral",
+        "Australia",
+    ),
+    AzureRegion("newzealandnorth", "New Zealand North", "nzn", None, "New Zealand"),
+)
+
+
+def _normalize(location: str) -> str:
+    """
+    Normalizes a location: lowercase, without blanks, hyphens or underscores,
+    so "West Europe", "west-europe" and "westeurope" are the same.
+    :param location: The location.
+    :type location: str
+    :return: The normalized location.
+    :rtype: str
+    """
+    return "".join(char for char in location.lower() if char not in " -_")
+
+
+def _index() -> Tuple[Mapping[str, AzureRegion], Mapping[str, AzureRegion]]:
+    """
+    Builds the lookup tables, once.
+    :return: The regions by name, display name and their normalized forms,
+    and the regions by abbreviation.
+    :rtype: Tuple[Mapping[str, AzureRegion], Mapping[str, AzureRegion]]
+    """
+    by_alias = {}
+    by_abbreviation = {}
+    names = {region.name for region in _REGIONS}
+    for region in _REGIONS:
+        for alias in (
+            region.name,
+            region.display_name,
+            _normalize(region.display_name),
+        ):
+            if by_alias.setdefault(alias, region) is not region:
+                raise ValueError(f"Duplicated Azure region alias: {alias}")
+        if by_abbreviation.setdefault(region.abbreviation, region) is not region:
+            raise ValueError(
+                f"Duplicated Azure region abbreviation: {region.abbreviation}"
+            )
+        if region.paired_region is not None and region.paired_region not in names:
+            raise ValueError(f"Unknown paired region of {region.name}")
+    return MappingProxyType(by_alias), MappingProxyType(by_abbreviation)
+
+
+class AzureRegions:
+    """
+    The regions of the Azure public cloud, with their abbreviations, display
+    names and paired regions.
+
+    The lookup tables are built once, when the module is loaded, and are
+    read-only: names and display names resolve with a single dictionary
+    access, and so do abbreviations back to regions. Other spellings of
+    display names ("west-europe", "WestEurope") are normalized first.
+
+    Class name: AzureRegions
+
+    Responsibilities:
+        - Resolve locations, display names and abbreviations to regions.
+        - Abbreviate locations for resource names.
+        - Know the paired region of each region.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.AzureResource
+    """
+
+    unknown_abbreviation = "unk"
+
+    regions: Tuple[AzureRegion, ...] = _REGIONS
+
+    _by_alias, _by_abbreviation = _index()
+
+    abbreviations: Mapping[str, str] = MappingProxyType(
+        {
+            **{region.name: region.abbreviation for region in _REGIONS},
+            "unknown": unknown_abbreviation,
+        }
+    )
+
+    @classmethod
+    def region(cls, location: str) -> Optional[AzureRegion]:
+        """
+        Retrieves a region by name or display name.
+        :param location: The location, e.g. "westeurope" or "West Europe".
+        :type location: str
+        :return: The region, or None if unknown.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AzureRegion
+        """
+        result = cls._by_alias.get(location)
+        if result is None and location:
+            result = cls._by_alias.get(_normalize(location))
+        return result
+
+    @classmethod
+    def abbreviation(cls, location: str) -> str:
+        """
+        Abbreviates a location.
+        :param location: The location, e.g. "westeurope" or "West Europe".
+        :type location: str
+        :return: The abbreviation, or "unk" if unknown.
+        :rtype: str
+        """
+        result = cls.region(location)
+        return result.abbreviation if result is not None else cls.unknown_abbreviation
+
+    @classmethod
+    def from_abbreviation(cls, abbreviation: str) -> Optional[AzureRegion]:
+        """
+        Retrieves the region of an abbreviation.
+        :param abbreviation: The abbreviation, e.g. "we".
+        :type abbreviation: str
+        :return: The region, or None if unknown.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AzureRegion
+        """
+        return cls._by_abbreviation.get(abbreviation)
+
+    @classmethod
+    def paired_region(cls, location: str) -> Optional[AzureRegion]:
+        """
+        Retrieves the paired region of a location.
+        :param location: The location.
+        :type location: str
+        :return: The paired region, or None if the region is unknown or has
+        no pair.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AzureRegion
+        """
+        region = cls.region(location)
+        if region is None or region.paired_region is None:
+            return None
+        return cls._by_alias[region.paired_region]
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
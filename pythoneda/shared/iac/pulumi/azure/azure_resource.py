@@ -19,6 +19,8 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from .azure_regions import AzureRegions
+from .naming_engine import NamingEngine
 from pythoneda.shared.iac import Resource
 import abc
 from typing import Any, Dict
@@ -32,12 +34,13 @@ class AzureResource(Resource, abc.ABC):
 
     Responsibilities:
         - Represent an infrastructure resource in Azure.
+        - Validate the names reaching Azure, before deploying them.
 
     Collaborators:
-        - None
+        - pythoneda.shared.iac.pulumi.azure.NamingEngine
     """
 
-    _location_abbrevs = {"westeurope": "we", "unknown": "unk"}
+    _location_abbrevs = AzureRegions.abbreviations
 
     def __init__(
         self,
@@ -57,28 +60,54 @@ class AzureResource(Resource, abc.ABC):
         :param dependencies: The dependencies.
         :type dependencies: Dict[str, Any]
         """
+        self._dependencies = dependencies
         super().__init__(stackName, projectName, location, dependencies)
 
+    @property
+    def dependencies(self) -> Dict[str, Any]:
+        """
+        Retrieves the dependencies.
+        :return: Such dependencies.
+        :rtype: Dict[str, Any]
+        """
+        return self._dependencies
+
     @classmethod
     @property
     def max_length(cls) -> int:
         """
-        The maximum length of the resource name.
+        The maximum length of the resource name: 16, or less if Azure allows
+        fewer characters for the type.
         :return: The maximum length.
         :rtype: int
         """
-        return 16
+        return min(16, NamingEngine.rule(cls.type).max_length)
 
     @classmethod
     def _location_abbrev(cls, location: str) -> str:
         """
-        Abbreaviates the location.
-        :param location: The location.
+        Abbreviates the location.
+        :param location: The location, either its name or display name.
         :type location: str
-        :return: The abbreviated location.
+        :return: The abbreviated location, or "unk" if unknown.
         :rtype: str
         """
-        return cls._location_abbrevs.get(location, cls._location_abbrevs["unknown"])
+        result = cls._location_abbrevs.get(location)
+        if result is None:
+            result = AzureRegions.abbreviation(location)
+        return result
+
+    @classmethod
+    def _validate_name(cls, name: str):
+        """
+        Checks a name built for this type of resource is valid in Azure. The
+        resources whose name reaches Azure as is, rather than as the prefix
+        of a generated one, call it before creating the resource.
+        :param name: The name.
+        :type name: str
+        :raise ValueError: If the name is not valid.
+        """
+        NamingEngine.instance().validate(cls.type, name)
 
     @classmethod
     @property
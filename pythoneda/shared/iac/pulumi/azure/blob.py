@@ -20,23 +20,32 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from .azure_resource import AzureResource
+from .content_hash_cache import ContentHashCache
 from .outputs import Outputs
 import pulumi
+import os
 import pulumi_azure_native
 from .resource_group import ResourceGroup
+from typing import List, Optional, Tuple
 
 
 class Blob(AzureResource):
     """
     A blob in Azure.
 
+    With a ContentHashCache, the digest of the source is recorded once the
+    blob is deployed, outside previews. While the source matches that digest,
+    changes to it are ignored, so the engine neither hashes nor uploads it
+    again. The digest is only recomputed when the size or modification time
+    of the file change, and sources never deployed are left to the engine.
+
     Class name: Blob
 
     Responsibilities:
         - Declares an Azure blob.
 
     Collaborators:
-        - None
+        - pythoneda.shared.iac.pulumi.azure.ContentHashCache
     """
 
     def __init__(
@@ -50,6 +59,7 @@ class Blob(AzureResource):
         blobContainer: pulumi_azure_native.storage.BlobContainer,
         storageAccount: pulumi_azure_native.storage.StorageAccount,
         resourceGroup: pulumi_azure_native.resources.ResourceGroup,
+        contentHashCache: ContentHashCache = None,
     ):
         """
         Creates a new Blob instance.
@@ -71,10 +81,15 @@ class Blob(AzureResource):
         :type storageAccount: pulumi_azure_native.storage.StorageAccount
         :param resourceGroup: The ResourceGroup.
         :type resourceGroup: pulumi_azure_native.resources.ResourceGroup
+        :param contentHashCache: The cache of file digests, if any.
+        :type contentHashCache: pythoneda.shared.iac.pulumi.azure.ContentHashCache
         """
         self._name = name
         self._blob_type = blobType
         self._source = source
+        self._content_hash_cache = contentHashCache
+        self._pulumi_name: Optional[str] = None
+        self._source_stat: Optional[Tuple[int, int]] = None
         super().__init__(
             stackName,
             projectName,
@@ -113,6 +128,56 @@ class Blob(AzureResource):
         """
         return self._source
 
+    @property
+    def content_hash_cache(self) -> ContentHashCache:
+        """
+        Retrieves the cache of file digests.
+        :return: Such cache, or None.
+        :rtype: pythoneda.shared.iac.pulumi.azure.ContentHashCache
+        """
+        return self._content_hash_cache
+
+    @property
+    def source_path(self) -> Optional[str]:
+        """
+        Retrieves the path of the source file, when cached.
+        :return: Such path, or None if there is no cache or the source is not
+        a file.
+        :rtype: str
+        """
+        if self.content_hash_cache is None:
+            return None
+        return getattr(self.source, "path", None)
+
+    def _unchanged(self, name: str) -> bool:
+        """
+        Checks whether the source matches the digest last deployed.
+        :param name: The name of the resource.
+        :type name: str
+        :return: True in such case.
+        :rtype: bool
+        """
+        deployed = self.content_hash_cache.deployed(name)
+        return (
+            deployed is not None
+            and self.content_hash_cache.digest(self.source_path) == deployed
+        )
+
+    def _record(self, ids: List[str] = None):
+        """
+        Records the digest of the source deployed, unless the file changed
+        since declared.
+        :param ids: The id of the blob, once deployed.
+        :type ids: List[str]
+        """
+        stat = os.stat(self.source_path)
+        if (stat.st_size, stat.st_mtime_ns) != self._source_stat:
+            return
+        self.content_hash_cache.record(
+            self._pulumi_name, self.content_hash_cache.digest(self.source_path)
+        )
+        self.content_hash_cache.save()
+
     @classmethod
     @property
     def type(cls) -> str:
@@ -148,6 +213,12 @@ class Blob(AzureResource):
         :return: The resource.
         :rtype: pulumi_azure_native.storage.Blob
         """
+        self._pulumi_name = name
+        unchanged = False
+        if self.source_path:
+            stat = os.stat(self.source_path)
+            self._source_stat = (stat.st_size, stat.st_mtime_ns)
+            unchanged = self._unchanged(name)
         return pulumi_azure_native.storage.Blob(
             name,
             resource_group_name=self.resource_group.name,
@@ -155,15 +226,21 @@ class Blob(AzureResource):
             container_name=self.blob_container.name,
             type=self.blob_type,
             source=self.source,
+            opts=(
+                pulumi.ResourceOptions(ignore_changes=["source"]) if unchanged else None
+            ),
         )
 
     # @override
     def _post_create(self, resource: pulumi_azure_native.storage.Blob):
         """
-        Post-create hook.
+        Post-create hook. Records the digest of the source once the blob is
+        deployed, unless previewing.
         :param resource: The resource.
         :type resource: pulumi_azure_native.storage.Blob
         """
+        if self.source_path and not pulumi.runtime.is_dry_run():
+            pulumi.Output.all(resource.id).apply(self._record)
         pulumi.export(Outputs.BLOB.value, resource.name)
         pulumi.export(Outputs.BLOB_ID.value, resource.id)
 
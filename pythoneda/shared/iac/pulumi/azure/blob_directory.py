@@ -0,0 +1,381 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/blob_directory.py
+
+This script defines the BlobDirectory class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .azure_resource import AzureResource
+from .blob_container import BlobContainer
+from .content_hash_cache import ContentHashCache
+from .outputs import Outputs
+from .resource_group import ResourceGroup
+from .storage_account import StorageAccount
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import json
+import mimetypes
+import os
+import pulumi
+import pulumi_azure_native
+from typing import Dict, Iterator, List, Tuple
+
+
+class BlobDirectory(AzureResource):
+    """
+    The files of a local directory, synced as blobs of a container.
+
+    Files are found by a generator walking the tree in name order, and hashed
+    in a thread pool. Files whose digest matches the manifest of the last
+    deployment are still declared, since Pulumi would otherwise delete their
+    blobs, but changes to their source are ignored, so they are not hashed by
+    the engine nor uploaded again. The manifest is only written once every
+    blob is deployed.
+
+    Class name: BlobDirectory
+
+    Responsibilities:
+        - Declare a blob per file, with its content type and Content-MD5.
+        - Keep a manifest of the digests deployed.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.BlobContainer
+        - pythoneda.shared.iac.pulumi.azure.ContentHashCache
+    """
+
+    _default_content_type = "application/octet-stream"
+
+    def __init__(
+        self,
+        stackName: str,
+        projectName: str,
+        location: str,
+        directory: str,
+        prefix: str,
+        manifestPath: str,
+        maxWorkers: int,
+        contentHashCache: ContentHashCache,
+        blobContainer: BlobContainer,
+        storageAccount: StorageAccount,
+        resourceGroup: ResourceGroup,
+    ):
+        """
+        Creates a new BlobDirectory instance.
+        :param stackName: The name of the stack.
+        :type stackName: str
+        :param projectName: The name of the project.
+        :type projectName: str
+        :param location: The Azure location.
+        :type location: str
+        :param directory: The local directory.
+        :type directory: str
+        :param prefix: The prefix of the blob names, if any, e.g. "static/".
+        :type prefix: str
+        :param manifestPath: The path of the manifest. Defaults to
+        ".<directory name>.blob-manifest.json", next to the directory.
+        :type manifestPath: str
+        :param maxWorkers: The number of threads hashing files. Defaults to
+        the number of CPUs plus four, at most 32.
+        :type maxWorkers: int
+        :param contentHashCache: The cache of file digests, if any.
+        :type contentHashCache: pythoneda.shared.iac.pulumi.azure.ContentHashCache
+        :param blobContainer: The blob container.
+        :type blobContainer: pulumi_azure_native.storage.BlobContainer
+        :param storageAccount: The storage account.
+        :type storageAccount: pulumi_azure_native.storage.StorageAccount
+        :param resourceGroup: The ResourceGroup.
+        :type resourceGroup: pulumi_azure_native.resources.ResourceGroup
+        """
+        self._directory = directory
+        self._prefix = prefix
+        self._manifest_path = manifestPath
+        self._max_workers = maxWorkers
+        self._content_hash_cache = contentHashCache
+        self._digests: Dict[str, str] = {}
+        self._unchanged = 0
+        super().__init__(
+            stackName,
+            projectName,
+            location,
+            {
+                "blob_container": blobContainer,
+                "storage_account": storageAccount,
+                "resource_group": resourceGroup,
+            },
+        )
+
+    @property
+    def directory(self) -> str:
+        """
+        Retrieves the local directory.
+        :return: Such directory.
+        :rtype: str
+        """
+        return self._directory
+
+    @property
+    def prefix(self) -> str:
+        """
+        Retrieves the prefix of the blob names.
+        :return: Such prefix.
+        :rtype: str
+        """
+        return self._prefix if self._prefix is not None else ""
+
+    @property
+    def manifest_path(self) -> str:
+        """
+        Retrieves the path of the manifest.
+        :return: Such path.
+        :rtype: str
+        """
+        if self._manifest_path is not None:
+            return self._manifest_path
+        directory = os.path.abspath(self.directory)
+        return os.path.join(
+            os.path.dirname(directory),
+            f".{os.path.basename(directory)}.blob-manifest.json",
+        )
+
+    @property
+    def max_workers(self) -> int:
+        """
+        Retrieves the number of threads hashing files.
+        :return: Such number.
+        :rtype: int
+        """
+        if self._max_workers is not None:
+            return self._max_workers
+        return min(32, (os.cpu_count() or 1) + 4)
+
+    @property
+    def content_hash_cache(self) -> ContentHashCache:
+        """
+        Retrieves the cache of file digests.
+        :return: Such cache, or None.
+        :rtype: pythoneda.shared.iac.pulumi.azure.ContentHashCache
+        """
+        return self._content_hash_cache
+
+    @property
+    def unchanged(self) -> int:
+        """
+        Retrieves the number of files matching the manifest, once created.
+        :return: Such number.
+        :rtype: int
+        """
+        return self._unchanged
+
+    @classmethod
+    @property
+    def type(cls) -> str:
+        """
+        Retrieves the type of resource.
+        :return: Such type.
+        :rtype: str
+        """
+        return "Microsoft.Storage/storageAccounts/blobServices"
+
+    # @override
+    @classmethod
+    def _resource_name(cls, stackName: str, projectName: str, location: str) -> str:
+        """
+        Builds the resource name.
+        :param stackName: The name of the stack.
+        :type stackName: str
+        :param projectName: The name of the project.
+        :type projectName: str
+        :param location: The Azure location.
+        :type location: str
+        :return: The resource name.
+        :rtype: str
+        """
+        return "bd"
+
+    @classmethod
+    def walk(cls, directory: str) -> Iterator[Tuple[str, str]]:
+        """
+        Walks a directory tree, in name order, files before subdirectories,
+        without following links to directories.
+        :param directory: The directory.
+        :type directory: str
+        :return: The path of each file, and its path relative to the
+        directory, with "/" separators.
+        :rtype: Iterator[Tuple[str, str]]
+        """
+        pending = [(directory, "")]
+        while pending:
+            current, relative = pending.pop()
+            with os.scandir(current) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+            subdirectories = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append((entry.path, f"{relative}{entry.name}/"))
+                elif entry.is_file():
+                    yield entry.path, f"{relative}{entry.name}"
+            pending.extend(reversed(subdirectories))
+
+    @classmethod
+    def content_type(cls, path: str) -> str:
+        """
+        Infers the content type of a file from its extension.
+        :param path: The path of the file.
+        :type path: str
+        :return: The content type.
+        :rtype: str
+        """
+        guessed, encoding = mimetypes.guess_type(path, strict=False)
+        if guessed is None or encoding is not None:
+            return cls._default_content_type
+        return guessed
+
+    def _digest(self, path: str) -> str:
+        """
+        Computes the digest of a file, through the cache if any.
+        :param path: The path of the file.
+        :type path: str
+        :return: The base64-encoded MD5 digest.
+        :rtype: str
+        """
+        if self.content_hash_cache is not None:
+            return self.content_hash_cache.digest(path)
+        return ContentHashCache.compute(path)
+
+    def _load_manifest(self) -> Dict[str, str]:
+        """
+        Loads the manifest of the last deployment.
+        :return: The digests, by blob name.
+        :rtype: Dict[str, str]
+        """
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as manifest:
+                return json.load(manifest)
+        except FileNotFoundError:
+            return {}
+
+    def _save_manifest(self, ids: List[str] = None):
+        """
+        Writes the manifest of the blobs declared, and the cached digests.
+        :param ids: The ids of the blobs, once deployed.
+        :type ids: List[str]
+        """
+        temporary = f"{self.manifest_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as manifest:
+            json.dump(self._digests, manifest, separators=(",", ":"), sort_keys=True)
+        os.replace(temporary, self.manifest_path)
+        if self.content_hash_cache is not None:
+            self.content_hash_cache.save()
+
+    @classmethod
+    def _pulumi_name(cls, name: str, blobName: str) -> str:
+        """
+        Builds the Pulumi name of a blob.
+        :param name: The name of this resource.
+        :type name: str
+        :param blobName: The name of the blob.
+        :type blobName: str
+        :return: The Pulumi name.
+        :rtype: str
+        """
+        return f"{name}-{blobName}"
+
+    def _hashed(
+        self, executor: ThreadPoolExecutor
+    ) -> Iterator[Tuple[str, str, str]]:
+        """
+        Walks the directory, hashing files ahead in the pool. At most a few
+        digests per thread are pending at any time, so the tree is never held
+        in memory.
+        :param executor: The thread pool.
+        :type executor: concurrent.futures.ThreadPoolExecutor
+        :return: The path, the relative path and the digest of each file, in
+        walk order.
+        :rtype: Iterator[Tuple[str, str, str]]
+        """
+        ahead = 4 * self.max_workers
+        pending = deque()
+        for path, relative in self.walk(self.directory):
+            pending.append((path, relative, executor.submit(self._digest, path)))
+            if len(pending) >= ahead:
+                path, relative, future = pending.popleft()
+                yield path, relative, future.result()
+        while pending:
+            path, relative, future = pending.popleft()
+            yield path, relative, future.result()
+
+    # @override
+    def _create(self, name: str) -> List[pulumi_azure_native.storage.Blob]:
+        """
+        Creates a blob per file.
+        :param name: The name of the resource.
+        :type name: str
+        :return: The blobs.
+        :rtype: List[pulumi_azure_native.storage.Blob]
+        """
+        manifest = self._load_manifest()
+        result = []
+        self._digests = {}
+        self._unchanged = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for path, relative, digest in self._hashed(executor):
+                blob_name = f"{self.prefix}{relative}"
+                unchanged = manifest.get(blob_name) == digest
+                if unchanged:
+                    self._unchanged += 1
+                self._digests[blob_name] = digest
+                result.append(
+                    pulumi_azure_native.storage.Blob(
+                        self._pulumi_name(name, blob_name),
+                        resource_group_name=self.resource_group.name,
+                        account_name=self.storage_account.name,
+                        container_name=self.blob_container.name,
+                        blob_name=blob_name,
+                        type="Block",
+                        content_type=self.content_type(path),
+                        content_md5=digest,
+                        source=pulumi.FileAsset(path),
+                        opts=(
+                            pulumi.ResourceOptions(ignore_changes=["source"])
+                            if unchanged
+                            else None
+                        ),
+                    )
+                )
+        return result
+
+    # @override
+    def _post_create(self, resource: List[pulumi_azure_native.storage.Blob]):
+        """
+        Post-create hook. Writes the manifest and the cached digests once
+        every blob is deployed, so a failed or interrupted update leaves the
+        previous ones, and unless previewing.
+        :param resource: The blobs.
+        :type resource: List[pulumi_azure_native.storage.Blob]
+        """
+        if not pulumi.runtime.is_dry_run():
+            pulumi.Output.all(*[blob.id for blob in resource]).apply(
+                self._save_manifest
+            )
+        pulumi.log.info(
+            f"{len(resource)} blobs in {self.directory}, "
+            f"{len(resource) - self.unchanged} changed"
+        )
+        pulumi.export(Outputs.BLOB_DIRECTORY.value, len(resource))
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,464 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/blob_lifecycle_policy.py
+
+This script defines the BlobLifecyclePolicy class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import csv
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import json
+import pulumi_azure_native
+import re
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+
+class BlobLifecycleRule(NamedTuple):
+    """
+    A lifecycle rule: blobs matching its prefixes and index tags move to
+    cooler tiers, and are deleted, some days after their last modification.
+    """
+
+    name: str
+    prefixes: Tuple[str, ...]
+    tags: Tuple[Tuple[str, str], ...]
+    blob_types: Tuple[str, ...]
+    cool_after_days: int
+    cold_after_days: int
+    archive_after_days: int
+    delete_after_days: int
+
+    def matches(self, path: str, blobType: str, tags: Dict[str, str]) -> bool:
+        """
+        Checks whether a blob matches the filters of the rule.
+        :param path: The container name and blob name, e.g. "logs/2024/a.txt".
+        :type path: str
+        :param blobType: The blob type, e.g. "BlockBlob".
+        :type blobType: str
+        :param tags: The blob index tags.
+        :type tags: Dict[str, str]
+        :return: True in such case.
+        :rtype: bool
+        """
+        if blobType and blobType.lower() not in (
+            blob_type.lower() for blob_type in self.blob_types
+        ):
+            return False
+        if self.prefixes and not path.startswith(self.prefixes):
+            return False
+        return all(tags.get(name) == value for name, value in self.tags)
+
+    def actions(self) -> List[Tuple[str, int]]:
+        """
+        Retrieves the actions of the rule, from the mildest.
+        :return: Each action, and the days after modification it applies.
+        :rtype: List[Tuple[str, int]]
+        """
+        return [
+            (action, days)
+            for action, days in zip(
+                BlobLifecyclePolicy.actions,
+                (
+                    self.cool_after_days,
+                    self.cold_after_days,
+                    self.archive_after_days,
+                    self.delete_after_days,
+                ),
+            )
+            if days is not None
+        ]
+
+
+class BlobLifecycleImpact(NamedTuple):
+    """
+    The blobs of an inventory a rule would act on today.
+    """
+
+    rule: str
+    action: str
+    blobs: int
+    bytes: int
+
+
+class BlobLifecyclePolicy:
+    """
+    A builder of blob lifecycle management policies.
+
+    Each rule filters blobs by prefix ("container/path/") and blob index
+    tags, and moves them to the cool, cold or archive tier, or deletes them,
+    some days after their last modification. When several rules match a
+    blob, the most drastic action wins, as Azure does.
+
+    The policy can be evaluated offline against a blob inventory report, to
+    know how many bytes each rule would move or delete before applying it.
+    Inventories are read as CSV; Parquet reports have to be exported to CSV
+    first.
+
+    Class name: BlobLifecyclePolicy
+
+    Responsibilities:
+        - Build and validate lifecycle management rules.
+        - Evaluate them against a blob inventory.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.BlobManagementPolicy
+    """
+
+    actions = ("tierToCool", "tierToCold", "tierToArchive", "delete")
+    max_rules = 100
+    max_prefixes = 10
+    max_tags = 10
+    max_days = 99999
+
+    _tiers = {"tierToCool": "Cool", "tierToCold": "Cold", "tierToArchive": "Archive"}
+    _tier_order = {"Hot": 0, "Cool": 1, "Cold": 2, "Archive": 3}
+    _rule_name = re.compile(r"[A-Za-z0-9]{1,256}")
+
+    def __init__(self):
+        """
+        Creates a new BlobLifecyclePolicy instance.
+        """
+        self._rules: List[BlobLifecycleRule] = []
+
+    @property
+    def rules(self) -> List[BlobLifecycleRule]:
+        """
+        Retrieves the rules.
+        :return: Such rules.
+        :rtype: List[pythoneda.shared.iac.pulumi.azure.BlobLifecycleRule]
+        """
+        return list(self._rules)
+
+    def rule(
+        self,
+        name: str,
+        prefixes: Iterable[str] = None,
+        tags: Dict[str, str] = None,
+        coolAfterDays: int = None,
+        coldAfterDays: int = None,
+        archiveAfterDays: int = None,
+        deleteAfterDays: int = None,
+        blobTypes: Iterable[str] = None,
+    ) -> "BlobLifecyclePolicy":
+        """
+        Adds a rule.
+        :param name: The name of the rule, alphanumeric.
+        :type name: str
+        :param prefixes: The prefixes of the blobs, starting with their
+        container, e.g. "logs/2024/". Defaults to every blob.
+        :type prefixes: Iterable[str]
+        :param tags: The blob index tags blobs need, e.g. {"retain": "no"}.
+        :type tags: Dict[str, str]
+        :param coolAfterDays: The days after modification to move blobs to
+        the cool tier, if any.
+        :type coolAfterDays: int
+        :param coldAfterDays: The days after modification to move blobs to
+        the cold tier, if any.
+        :type coldAfterDays: int
+        :param archiveAfterDays: The days after modification to move blobs to
+        the archive tier, if any.
+        :type archiveAfterDays: int
+        :param deleteAfterDays: The days after modification to delete blobs,
+        if any.
+        :type deleteAfterDays: int
+        :param blobTypes: The blob types. Defaults to block blobs.
+        :type blobTypes: Iterable[str]
+        :return: This policy.
+        :rtype: pythoneda.shared.iac.pulumi.azure.BlobLifecyclePolicy
+        """
+        self._rules.append(
+            BlobLifecycleRule(
+                name,
+                tuple(prefixes or ()),
+                tuple(sorted((tags or {}).items())),
+                tuple(blobTypes or ("blockBlob",)),
+                coolAfterDays,
+                coldAfterDays,
+                archiveAfterDays,
+                deleteAfterDays,
+            )
+        )
+        return self
+
+    def problems(self, premium: bool = False, hierarchical: bool = False) -> List[str]:
+        """
+        Describes why the policy is not valid.
+        :param premium: Whether the storage account is premium, without
+        access tiers.
+        :type premium: bool
+        :param hierarchical: Whether the storage account has hierarchical
+        namespace, without blob index tags.
+        :type hierarchical: bool
+        :return: The problems found, if any.
+        :rtype: List[str]
+        """
+        result = []
+        if len(self._rules) > self.max_rules:
+            result.append(f"Policies have at most {self.max_rules} rules")
+        names = set()
+        for rule in self._rules:
+            if self._rule_name.fullmatch(rule.name or "") is None:
+                result.append(f"Rule name {rule.name!r} must be alphanumeric")
+            elif rule.name in names:
+                result.append(f"Duplicated rule name {rule.name!r}")
+            names.add(rule.name)
+            if len(rule.prefixes) > self.max_prefixes:
+                result.append(
+                    f"Rule {rule.name} has more than {self.max_prefixes} prefixes"
+                )
+            for prefix in rule.prefixes:
+                if not prefix or prefix.startswith("/"):
+                    result.append(
+                        f"Rule {rule.name} prefix {prefix!r} must start with "
+                        "a container name"
+                    )
+            if len(rule.tags) > self.max_tags:
+                result.append(f"Rule {rule.name} has more than {self.max_tags} tags")
+            if rule.tags and hierarchical:
+                result.append(
+                    f"Rule {rule.name} filters by blob index tags, not "
+                    "available with hierarchical namespace"
+                )
+            actions = rule.actions()
+            if not actions:
+                result.append(f"Rule {rule.name} has no action")
+            for action, days in actions:
+                if not 0 <= days <= self.max_days:
+                    result.append(
+                        f"Rule {rule.name} {action} days must be 0 to {self.max_days}"
+                    )
+                if premium and action != "delete":
+                    result.append(
+                        f"Rule {rule.name} {action} is not available on premium "
+                        "accounts, which have no access tiers"
+                    )
+            for (mild, mild_days), (drastic, drastic_days) in zip(actions, actions[1:]):
+                if drastic_days <= mild_days:
+                    result.append(f"Rule {rule.name} {drastic} must come after {mild}")
+        return result
+
+    def validate(self, premium: bool = False, hierarchical: bool = False):
+        """
+        Checks the policy is valid.
+        :param premium: Whether the storage account is premium.
+        :type premium: bool
+        :param hierarchical: Whether the storage account has hierarchical
+        namespace.
+        :type hierarchical: bool
+        :raise ValueError: If the policy is not valid.
+        """
+        problems = self.problems(premium, hierarchical)
+        if problems:
+            raise ValueError("; ".join(problems))
+
+    def args(self) -> pulumi_azure_native.storage.ManagementPolicySchemaArgs:
+        """
+        Builds the management policy.
+        :return: Such policy.
+        :rtype: pulumi_azure_native.storage.ManagementPolicySchemaArgs
+        """
+        storage = pulumi_azure_native.storage
+        rules = []
+        for rule in self._rules:
+            after = {
+                action: storage.DateAfterModificationArgs(
+                    days_after_modification_greater_than=days
+                )
+                for action, days in rule.actions()
+            }
+            rules.append(
+                storage.ManagementPolicyRuleArgs(
+                    name=rule.name,
+                    enabled=True,
+                    type="Lifecycle",
+                    definition=storage.ManagementPolicyDefinitionArgs(
+                        actions=storage.ManagementPolicyActionArgs(
+                            base_blob=storage.ManagementPolicyBaseBlobArgs(
+                                tier_to_cool=after.get("tierToCool"),
+                                tier_to_cold=after.get("tierToCold"),
+                                tier_to_archive=after.get("tierToArchive"),
+                                delete=after.get("delete"),
+                            )
+                        ),
+                        filters=storage.ManagementPolicyFilterArgs(
+                            blob_types=list(rule.blob_types),
+                            prefix_match=list(rule.prefixes) or None,
+                            blob_index_match=[
+                                storage.TagFilterArgs(name=name, op="==", value=value)
+                                for name, value in rule.tags
+                            ]
+                            or None,
+                        ),
+                    ),
+                )
+            )
+        return storage.ManagementPolicySchemaArgs(rules=rules)
+
+    @classmethod
+    def _parse_time(cls, value: str) -> datetime:
+        """
+        Parses a timestamp of an inventory, either ISO 8601 or RFC 1123.
+        :param value: The timestamp.
+        :type value: str
+        :return: The time, in UTC.
+        :rtype: datetime.datetime
+        """
+        try:
+            result = datetime.fromisoformat(value)
+        except ValueError:
+            result = parsedate_to_datetime(value)
+        if result.tzinfo is None:
+            result = result.replace(tzinfo=timezone.utc)
+        return result
+
+    @classmethod
+    def _parse_tags(cls, value: str) -> Dict[str, str]:
+        """
+        Parses the blob index tags of an inventory, either a JSON object or
+        "name=value" pairs separated by commas or ampersands.
+        :param value: The tags.
+        :type value: str
+        :return: The tags, by name.
+        :rtype: Dict[str, str]
+        """
+        value = (value or "").strip()
+        if not value:
+            return {}
+        if value.startswith("{") and ":" in value:
+            return json.loads(value)
+        result = {}
+        for pair in re.split(r"[,&]", value.strip("{}")):
+            name, _, tag = pair.partition("=")
+            if name.strip():
+                result[name.strip()] = tag.strip()
+        return result
+
+    def _decision(
+        self, path: str, blobType: str, tier: str, tags: Dict[str, str], age: float
+    ) -> Tuple[str, str]:
+        """
+        Decides what the policy does to a blob today.
+        :param path: The container name and blob name.
+        :type path: str
+        :param blobType: The blob type.
+        :type blobType: str
+        :param tier: The current access tier.
+        :type tier: str
+        :param tags: The blob index tags.
+        :type tags: Dict[str, str]
+        :param age: The days since the last modification.
+        :type age: float
+        :return: The rule and the action, or None if nothing happens.
+        :rtype: Tuple[str, str]
+        """
+        current = self._tier_order.get(tier or "Hot", 0)
+        result = None
+        for rule in self._rules:
+            if not rule.matches(path, blobType, tags):
+                continue
+            for action, days in reversed(rule.actions()):
+                if age <= days:
+                    continue
+                tier_after = self._tiers.get(action)
+                if tier_after is not None and self._tier_order[tier_after] <= current:
+                    break
+                if result is None or self.actions.index(action) > self.actions.index(
+                    result[1]
+                ):
+                    result = (rule.name, action)
+                break
+        return result
+
+    def evaluate(
+        self,
+        rows: Iterable[Dict[str, str]],
+        container: str = None,
+        asOf: datetime = None,
+    ) -> List[BlobLifecycleImpact]:
+        """
+        Evaluates the policy against the rows of a blob inventory.
+        :param rows: The rows, with the "Name", "Content-Length",
+        "Last-Modified" and, optionally, "AccessTier", "BlobType", "Tags",
+        "Snapshot" and "IsCurrentVersion" columns of Azure blob inventory
+        reports. Snapshots and previous versions are left out, since the
+        rules only act on base blobs.
+        :type rows: Iterable[Dict[str, str]]
+        :param container: The container of the blobs, if their names do not
+        start with it.
+        :type container: str
+        :param asOf: The day of the evaluation. Defaults to now.
+        :type asOf: datetime.datetime
+        :return: The blobs and bytes each rule would act on, by action.
+        :rtype: List[pythoneda.shared.iac.pulumi.azure.BlobLifecycleImpact]
+        """
+        now = asOf if asOf is not None else datetime.now(timezone.utc)
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        prefix = f"{container}/" if container else ""
+        totals: Dict[Tuple[str, str], List[int]] = {}
+        for row in rows:
+            name = row.get("Name")
+            if (
+                not name
+                or row.get("Snapshot")
+                or str(row.get("IsCurrentVersion", "")).strip().lower() == "false"
+            ):
+                continue
+            age = (now - self._parse_time(row["Last-Modified"])).total_seconds() / 86400
+            decision = self._decision(
+                prefix + name,
+                row.get("BlobType", ""),
+                row.get("AccessTier", ""),
+                self._parse_tags(row.get("Tags")),
+                age,
+            )
+            if decision is not None:
+                total = totals.setdefault(decision, [0, 0])
+                total[0] += 1
+                total[1] += int(row.get("Content-Length") or 0)
+        return [
+            BlobLifecycleImpact(rule.name, action, *totals[(rule.name, action)])
+            for rule in self._rules
+            for action in self.actions
+            if (rule.name, action) in totals
+        ]
+
+    def evaluate_inventory(
+        self, inventoryPath: str, container: str = None, asOf: datetime = None
+    ) -> List[BlobLifecycleImpact]:
+        """
+        Evaluates the policy against a CSV blob inventory report.
+        :param inventoryPath: The path of the report.
+        :type inventoryPath: str
+        :param container: The container of the blobs, if their names do not
+        start with it.
+        :type container: str
+        :param asOf: The day of the evaluation. Defaults to now.
+        :type asOf: datetime.datetime
+        :return: The blobs and bytes each rule would act on, by action.
+        :rtype: List[pythoneda.shared.iac.pulumi.azure.BlobLifecycleImpact]
+        """
+        if inventoryPath.lower().endswith(".parquet"):
+            raise ValueError(
+                f"Cannot read {inventoryPath}: export Parquet inventories to CSV"
+            )
+        with open(inventoryPath, "r", encoding="utf-8", newline="") as inventory:
+            return self.evaluate(csv.DictReader(inventory), container, asOf)
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,145 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/blob_management_policy.py
+
+This script defines the BlobManagementPolicy class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .azure_resource import AzureResource
+from .blob_lifecycle_policy import BlobLifecyclePolicy
+from .outputs import Outputs
+import pulumi
+import pulumi_azure_native
+from .resource_group import ResourceGroup
+from .storage_account import StorageAccount
+
+
+class BlobManagementPolicy(AzureResource):
+    """
+    The lifecycle management policy of a storage account.
+
+    Class name: BlobManagementPolicy
+
+    Responsibilities:
+        - Declare the lifecycle rules of the blobs of a storage account.
+        - Check them against the features of the account.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.BlobLifecyclePolicy
+        - pythoneda.shared.iac.pulumi.azure.StorageAccount
+    """
+
+    def __init__(
+        self,
+        stackName: str,
+        projectName: str,
+        location: str,
+        policy: BlobLifecyclePolicy,
+        storageAccount: StorageAccount,
+        resourceGroup: ResourceGroup,
+    ):
+        """
+        Creates a new BlobManagementPolicy instance.
+        :param stackName: The name of the stack.
+        :type stackName: str
+        :param projectName: The name of the project.
+        :type projectName: str
+        :param location: The Azure location.
+        :type location: str
+        :param policy: The lifecycle rules.
+        :type policy: pythoneda.shared.iac.pulumi.azure.BlobLifecyclePolicy
+        :param storageAccount: The storage account.
+        :type storageAccount: pythoneda.shared.iac.pulumi.azure.StorageAccount
+        :param resourceGroup: The ResourceGroup.
+        :type resourceGroup: pythoneda.iac.pulumi.azure.ResourceGroup
+        """
+        policy.validate(
+            storageAccount.sku_type in StorageAccount.premium_sku_types,
+            storageAccount.is_hns_enabled,
+        )
+        self._policy = policy
+        super().__init__(
+            stackName,
+            projectName,
+            location,
+            {"storage_account": storageAccount, "resource_group": resourceGroup},
+        )
+
+    @property
+    def policy(self) -> BlobLifecyclePolicy:
+        """
+        Retrieves the lifecycle rules.
+        :return: Such rules.
+        :rtype: pythoneda.shared.iac.pulumi.azure.BlobLifecyclePolicy
+        """
+        return self._policy
+
+    @classmethod
+    @property
+    def type(cls) -> str:
+        """
+        Retrieves the type of resource.
+        :return: Such type.
+        :rtype: str
+        """
+        return "Microsoft.Storage/storageAccounts/managementPolicies"
+
+    # @override
+    @classmethod
+    def _resource_name(cls, stackName: str, projectName: str, location: str) -> str:
+        """
+        Builds the resource name.
+        :param stackName: The name of the stack.
+        :type stackName: str
+        :param projectName: The name of the project.
+        :type projectName: str
+        :param location: The Azure location.
+        :type location: str
+        :return: The resource name.
+        :rtype: str
+        """
+        return "bmp"
+
+    # @override
+    def _create(self, name: str) -> pulumi_azure_native.storage.ManagementPolicy:
+        """
+        Creates the management policy.
+        :param name: The name of the resource.
+        :type name: str
+        :return: The management policy.
+        :rtype: pulumi_azure_native.storage.ManagementPolicy
+        """
+        return pulumi_azure_native.storage.ManagementPolicy(
+            name,
+            account_name=self.storage_account.name,
+            resource_group_name=self.resource_group.name,
+            management_policy_name="default",
+            policy=self.policy.args(),
+        )
+
+    # @override
+    def _post_create(self, resource: pulumi_azure_native.storage.ManagementPolicy):
+        """
+        Post-create hook.
+        :param resource: The resource.
+        :type resource: pulumi_azure_native.storage.ManagementPolicy
+        """
+        pulumi.export(Outputs.BLOB_MANAGEMENT_POLICY.value, resource.name)
+        pulumi.export(Outputs.BLOB_MANAGEMENT_POLICY_ID.value, resource.id)
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -20,11 +20,10 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from .azure_resource import AzureResource
+from .invoke_cache import InvokeCache
 from .outputs import Outputs
 import pulumi
-from pulumi import Output
 import pulumi_azure_native
-from pulumi_azure_native.containerregistry import list_registry_credentials
 from .resource_group import ResourceGroup
 
 
@@ -128,6 +127,7 @@ class ContainerRegistry(AzureResource):
         :return: The container registry.
         :rtype: pulumi_azure_native.containerregistry.Registry
         """
+        self._validate_name(name)
         return pulumi_azure_native.containerregistry.Registry(
             name,
             resource_group_name=self.resource_group.name,
@@ -148,10 +148,8 @@ class ContainerRegistry(AzureResource):
         """
         pulumi.export(Outputs.CONTAINER_REGISTRY.value, resource.name)
         pulumi.export(Outputs.CONTAINER_REGISTRY_ID.value, resource.id)
-        credentials = Output.all(self.resource_group.name, resource.name).apply(
-            lambda args: list_registry_credentials(
-                resource_group_name=args[0], registry_name=args[1]
-            )
+        credentials = InvokeCache.instance().registry_credentials(
+            self.resource_group.name, resource.name
         )
         pulumi.export(Outputs.CONTAINER_REGISTRY_USERNAME.value, credentials.username)
         pulumi.export(
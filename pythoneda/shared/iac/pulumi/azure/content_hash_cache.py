@@ -0,0 +1,215 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/content_hash_cache.py
+
+This script defines the ContentHashCache class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import base64
+import hashlib
+import json
+import mmap
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class ContentHashCache:
+    """
+    Digests of local files, cached by (path, size, mtime) in a sidecar file.
+
+    Digests are base64-encoded MD5 hashes, the format Azure Storage expects in
+    the Content-MD5 of a blob. The sidecar file also records the digest each
+    target, e.g. a blob, was last deployed with, so unchanged sources can be
+    skipped. It is only written when asked to, i.e. after a deployment.
+
+    Class name: ContentHashCache
+
+    Responsibilities:
+        - Reuse the digest of files that did not change since last computed.
+        - Hash the rest through memory maps, in chunks.
+        - Count cache hits and misses.
+        - Record the digests deployed.
+        - Write the sidecar file back, on demand.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.Blob
+    """
+
+    _chunk_size = 8 * 1024 * 1024
+
+    def __init__(self, sidecarPath: str):
+        """
+        Creates a new ContentHashCache instance.
+        :param sidecarPath: The path of the JSON file storing the digests.
+        :type sidecarPath: str
+        """
+        self._sidecar_path = sidecarPath
+        self._entries: Optional[Dict[str, List]] = None
+        self._deployed: Optional[Dict[str, str]] = None
+        self._dirty = False
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def sidecar_path(self) -> str:
+        """
+        Retrieves the path of the sidecar file.
+        :return: Such path.
+        :rtype: str
+        """
+        return self._sidecar_path
+
+    @property
+    def hits(self) -> int:
+        """
+        Retrieves the number of digests reused.
+        :return: Such number.
+        :rtype: int
+        """
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """
+        Retrieves the number of digests computed.
+        :return: Such number.
+        :rtype: int
+        """
+        return self._misses
+
+    def _load(self) -> Dict[str, List]:
+        """
+        Loads the sidecar file, the first time.
+        :return: The entries, by absolute path: [size, mtime in ns, digest].
+        :rtype: Dict[str, List]
+        """
+        if self._entries is None:
+            try:
+                with open(self._sidecar_path, "r", encoding="utf-8") as sidecar:
+                    content = json.load(sidecar)
+            except (FileNotFoundError, ValueError):
+                content = {}
+            self._entries = content.get("digests", {})
+            self._deployed = content.get("deployed", {})
+        return self._entries
+
+    @classmethod
+    def compute(cls, path: str) -> str:
+        """
+        Computes the digest of a file.
+        :param path: The path of the file.
+        :type path: str
+        :return: The base64-encoded MD5 digest.
+        :rtype: str
+        """
+        digest = hashlib.md5(usedforsecurity=False)
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size > 0:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for offset in range(0, len(view), cls._chunk_size):
+                            digest.update(view[offset : offset + cls._chunk_size])
+                    finally:
+                        view.release()
+        return base64.b64encode(digest.digest()).decode("ascii")
+
+    def lookup(self, path: str) -> Tuple[str, bool]:
+        """
+        Retrieves the digest of a file.
+        :param path: The path of the file.
+        :type path: str
+        :return: The digest, and whether it came from the cache.
+        :rtype: Tuple[str, bool]
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        with self._lock:
+            entry = self._load().get(key)
+            if (
+                entry is not None
+                and entry[0] == stat.st_size
+                and entry[1] == stat.st_mtime_ns
+            ):
+                self._hits += 1
+                return entry[2], True
+        result = self.compute(key)
+        with self._lock:
+            self._misses += 1
+            self._entries[key] = [stat.st_size, stat.st_mtime_ns, result]
+            self._dirty = True
+        return result, False
+
+    def digest(self, path: str) -> str:
+        """
+        Retrieves the digest of a file.
+        :param path: The path of the file.
+        :type path: str
+        :return: The base64-encoded MD5 digest.
+        :rtype: str
+        """
+        return self.lookup(path)[0]
+
+    def deployed(self, target: str) -> Optional[str]:
+        """
+        Retrieves the digest a target was last deployed with.
+        :param target: The target, e.g. the Pulumi name of a blob.
+        :type target: str
+        :return: Such digest, or None if never recorded.
+        :rtype: str
+        """
+        with self._lock:
+            self._load()
+            return self._deployed.get(target)
+
+    def record(self, target: str, digest: str):
+        """
+        Records the digest a target was deployed with.
+        :param target: The target, e.g. the Pulumi name of a blob.
+        :type target: str
+        :param digest: The digest.
+        :type digest: str
+        """
+        with self._lock:
+            self._load()
+            if self._deployed.get(target) != digest:
+                self._deployed[target] = digest
+                self._dirty = True
+
+    def save(self):
+        """
+        Writes the sidecar file, if any digest was computed or recorded.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(os.path.abspath(self._sidecar_path))
+            os.makedirs(directory, exist_ok=True)
+            temporary = f"{self._sidecar_path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as sidecar:
+                json.dump(
+                    {"digests": self._entries, "deployed": self._deployed},
+                    sidecar,
+                    separators=(",", ":"),
+                )
+            os.replace(temporary, self._sidecar_path)
+            self._dirty = False
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
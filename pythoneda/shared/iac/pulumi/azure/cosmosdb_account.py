@@ -19,23 +19,29 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from .azure_regions import AzureRegions
 from .azure_resource import AzureResource
 from .outputs import Outputs
 import pulumi
 import pulumi_azure_native
-from pulumi_azure_native import apimanagement, resources, storage, web, sql, network
 from .resource_group import ResourceGroup
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple, Union
 
 
 class CosmosdbAccount(AzureResource):
     """
     Azure CosmosDB Account for Licdata.
 
+    The account is written in its location, and optionally replicated to
+    read regions. With multiple write locations, every region accepts
+    writes. Failover priorities default to the order of the regions, the
+    write region first.
+
     Class name: CosmosdbAccount
 
     Responsibilities:
         - Define the Azure CosmosDB Account for Licdata.
+        - Validate its regions, failover priorities and zone redundancy.
 
     Collaborators:
         - None
@@ -51,6 +57,10 @@ class CosmosdbAccount(AzureResource):
         consistencyPolicy: Dict[str, str],
         enableFreeTier: bool,
         resourceGroup: ResourceGroup,
+        readRegions: List[str] = None,
+        multipleWriteLocations: bool = None,
+        failoverPriorities: Dict[str, int] = None,
+        zoneRedundant: Union[bool, List[str]] = None,
     ):
         """
         Creates a new Azure instance.
@@ -70,14 +80,29 @@ class CosmosdbAccount(AzureResource):
         :type enableFreeTier: bool
         :param resourceGroup: The Azure Resource Group.
         :type resourceGroup: pulumi_azure_native.resources.ResourceGroup
+        :param readRegions: The regions to replicate to, besides the location.
+        :type readRegions: List[str]
+        :param multipleWriteLocations: Whether every region accepts writes.
+        :type multipleWriteLocations: bool
+        :param failoverPriorities: The failover priority of each region, from
+        0 (the location) to the number of regions minus one.
+        :type failoverPriorities: Dict[str, int]
+        :param zoneRedundant: Whether regions are zone redundant: True or
+        False for all of them, or the list of the zone-redundant ones.
+        :type zoneRedundant: Union[bool, List[str]]
         """
         self._kind = kind
         self._offer_type = offerType
         self._consistency_policy = consistencyPolicy
         self._enable_free_tier = enableFreeTier
+        self._read_regions = readRegions
+        self._multiple_write_locations = multipleWriteLocations
+        self._failover_priorities = failoverPriorities
+        self._zone_redundant = zoneRedundant
         super().__init__(
             stackName, projectName, location, {"resource_group": resourceGroup}
         )
+        self._locations = self._build_locations()
 
     @property
     def kind(self) -> str:
@@ -105,11 +130,9 @@ class CosmosdbAccount(AzureResource):
         :rtype: Dict[str,str]
         """
         return (
-            (
-                self._consistency_policy
-                if self._consistency_policy
-                else {"defaultConsistencyLevel": "Session"}
-            ),
+            self._consistency_policy
+            if self._consistency_policy
+            else {"defaultConsistencyLevel": "Session"}
         )
 
     @property
@@ -121,6 +144,121 @@ class CosmosdbAccount(AzureResource):
         """
         return self._enable_free_tier if self._enable_free_tier is not None else True
 
+    @property
+    def read_regions(self) -> List[str]:
+        """
+        Retrieves the regions replicated to, besides the location.
+        :return: Such regions.
+        :rtype: List[str]
+        """
+        return list(self._read_regions) if self._read_regions is not None else []
+
+    @property
+    def multiple_write_locations(self) -> bool:
+        """
+        Retrieves whether every region accepts writes.
+        :return: Such flag.
+        :rtype: bool
+        """
+        return (
+            self._multiple_write_locations
+            if self._multiple_write_locations is not None
+            else False
+        )
+
+    @property
+    def failover_priorities(self) -> Dict[str, int]:
+        """
+        Retrieves the failover priority of each region.
+        :return: Such priorities, by region name.
+        :rtype: Dict[str, int]
+        """
+        return {region: priority for region, priority, _ in self._locations}
+
+    @property
+    def locations(self) -> List[Tuple[str, int, bool]]:
+        """
+        Retrieves the regions of the account, by failover priority.
+        :return: The region name, failover priority and zone redundancy of
+        each region.
+        :rtype: List[Tuple[str, int, bool]]
+        """
+        return list(self._locations)
+
+    @classmethod
+    def _region_name(cls, location: str) -> str:
+        """
+        Resolves a region name or display name.
+        :param location: The region.
+        :type location: str
+        :return: The region name, or the location itself if not in
+        AzureRegions, so regions missing from the table still work.
+        :rtype: str
+        """
+        region = AzureRegions.region(location)
+        return region.name if region is not None else location
+
+    def _build_locations(self) -> List[Tuple[str, int, bool]]:
+        """
+        Resolves and validates the regions of the account.
+        :return: The region name, failover priority and zone redundancy of
+        each region, by failover priority.
+        :rtype: List[Tuple[str, int, bool]]
+        """
+        regions = [self._region_name(self.location)]
+        for location in self.read_regions:
+            region = self._region_name(location)
+            if region in regions:
+                raise ValueError(f"Cosmos DB region {region} is listed twice")
+            regions.append(region)
+
+        if self._failover_priorities is None:
+            priorities = {region: index for index, region in enumerate(regions)}
+        else:
+            priorities = {
+                self._region_name(region): priority
+                for region, priority in self._failover_priorities.items()
+            }
+            if priorities.keys() != set(regions):
+                raise ValueError(
+                    "Cosmos DB failover priorities must cover exactly the "
+                    f"regions {', '.join(regions)}"
+                )
+            if sorted(priorities.values()) != list(range(len(regions))):
+                raise ValueError(
+                    "Cosmos DB failover priorities must be unique, from 0 to "
+                    f"{len(regions) - 1}"
+                )
+            if priorities[regions[0]] != 0:
+                raise ValueError(
+                    f"The write region {regions[0]} must have failover priority 0"
+                )
+
+        if isinstance(self._zone_redundant, bool) or self._zone_redundant is None:
+            zone_redundant = {region: bool(self._zone_redundant) for region in regions}
+        else:
+            redundant = {self._region_name(region) for region in self._zone_redundant}
+            unknown = redundant - set(regions)
+            if unknown:
+                raise ValueError(
+                    "Zone-redundant regions are not regions of the account: "
+                    f"{', '.join(sorted(unknown))}"
+                )
+            zone_redundant = {region: region in redundant for region in regions}
+
+        level = self.consistency_policy.get("defaultConsistencyLevel")
+        if self.multiple_write_locations and level == "Strong":
+            raise ValueError(
+                "Strong consistency is not supported with multiple write locations"
+            )
+        return sorted(
+            (
+                (region, priorities[region], zone_redundant[region])
+                for region in regions
+            ),
+            key=lambda location: location[1],
+        )
+
     @classmethod
     @property
     def type(cls) -> str:
@@ -165,9 +303,14 @@ class CosmosdbAccount(AzureResource):
             consistency_policy=self.consistency_policy,
             locations=[
                 pulumi_azure_native.documentdb.LocationArgs(
-                    location_name=self.location, failover_priority=0
+                    location_name=region,
+                    failover_priority=priority,
+                    is_zone_redundant=zone_redundant,
                 )
+                for region, priority, zone_redundant in self.locations
             ],
+            enable_multiple_write_locations=self.multiple_write_locations,
+            enable_automatic_failover=len(self.locations) > 1,
             enable_free_tier=self.enable_free_tier,
         )
 
@@ -22,26 +22,46 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 from .azure_resource import AzureResource
 from .cosmosdb_account import CosmosdbAccount
 from .cosmosdb_database import CosmosdbDatabase
+from .cosmosdb_indexing_policy import CosmosdbIndexingPolicy
+from .cosmosdb_throughput import CosmosdbThroughput
 from .outputs import Outputs
 import pulumi
 import pulumi_azure_native
 from .resource_group import ResourceGroup
-from typing import Dict
+from typing import Any, Dict, List, Union
 
 
 class CosmosdbContainer(AzureResource):
     """
     Azure CosmosDB Container for Licdata.
 
+    The container can provision dedicated throughput, manual or autoscale;
+    otherwise it uses the throughput shared by its database. Changing it
+    updates the container in place.
+
+    Its indexing policy, if any, is validated when the container is defined,
+    against sample documents when the policy has them.
+
+    Documents expire after the default time to live, if any, and are deleted
+    server-side without consuming provisioned request units. Unique keys and
+    the last-writer-wins conflict resolution path are fixed once the
+    container is created.
+
     Class name: CosmosdbContainer
 
     Responsibilities:
         - Define the Azure CosmosDB Container for Licdata.
+        - Provision its dedicated throughput.
+        - Define its indexing policy.
+        - Define its time to live, unique keys and conflict resolution.
 
     Collaborators:
-        - None
+        - pythoneda.shared.iac.pulumi.azure.CosmosdbThroughput
+        - pythoneda.shared.iac.pulumi.azure.CosmosdbIndexingPolicy
     """
 
+    max_default_ttl = 2147483647
+
     def __init__(
         self,
         stackName: str,
@@ -51,6 +71,12 @@ class CosmosdbContainer(AzureResource):
         resourceGroup: ResourceGroup,
         cosmosdbAccount: CosmosdbAccount,
         cosmosdbDatabase: CosmosdbDatabase,
+        throughput: int = None,
+        autoscaleMaxThroughput: int = None,
+        indexingPolicy: Union[CosmosdbIndexingPolicy, Dict[str, Any]] = None,
+        defaultTtl: int = None,
+        uniqueKeys: List[List[str]] = None,
+        conflictResolutionPath: str = None,
     ):
         """
         Creates a new Azure instance.
@@ -60,21 +86,70 @@ class CosmosdbContainer(AzureResource):
         :type projectName: str
         :param location: The Azure location.
         :type location: str
+        :param partitionKey: The partition key.
+        :type partitionKey: Dict[str, str]
         :param resourceGroup: The ResourceGroup.
         :type resourceGroup: pulumi_azure_native.resources.ResourceGroup
         :param cosmosdbAccount: The CosmosDB account.
         :type cosmosdbAccount: pythoneda.iac.pulumi.azure.CosmosdbAccount
         :param cosmosdbDatabase: The CosmosDB database.
         :param cosmosdbDatabase: pythoneda.iac.pulumi.azure.CosmosdbDatabase
+        :param throughput: The dedicated manual throughput, in RU/s: at least
+        400, in steps of 100.
+        :type throughput: int
+        :param autoscaleMaxThroughput: The dedicated autoscale maximum
+        throughput, in RU/s: at least 1000, in steps of 1000.
+        :type autoscaleMaxThroughput: int
+        :param indexingPolicy: The indexing policy, or its CosmosDB JSON form.
+        Defaults to indexing every path.
+        :type indexingPolicy: Union[pythoneda.shared.iac.pulumi.azure.CosmosdbIndexingPolicy, Dict[str, Any]]
+        :param defaultTtl: The time to live of documents, in seconds, or -1
+        for documents to expire only when they set their own "ttl". Defaults
+        to documents never expiring.
+        :type defaultTtl: int
+        :param uniqueKeys: The paths of each unique key, e.g.
+        [["/email"], ["/firstName", "/lastName"]].
+        :type uniqueKeys: List[List[str]]
+        :param conflictResolutionPath: The numeric path whose highest value
+        wins conflicting writes. Defaults to "/_ts".
+        :type conflictResolutionPath: str
         """
+        if defaultTtl is not None and not (
+            defaultTtl == -1 or 0 < defaultTtl <= self.max_default_ttl
+        ):
+            raise ValueError(
+                f"Invalid default TTL: {defaultTtl} (-1, or 1 to "
+                f"{self.max_default_ttl} seconds)"
+            )
+        for paths in uniqueKeys or []:
+            if not paths:
+                raise ValueError("Unique keys need at least one path")
+            for path in paths:
+                self._check_path("unique key", path)
+            if len(set(paths)) != len(paths):
+                raise ValueError(f"Unique key {paths} repeats paths")
+        keys = [frozenset(paths) for paths in uniqueKeys or []]
+        if len(set(keys)) != len(keys):
+            raise ValueError("Duplicated unique keys")
+        if conflictResolutionPath is not None:
+            self._check_path("conflict resolution", conflictResolutionPath)
         self._partition_key = partitionKey
+        self._throughput = CosmosdbThroughput(throughput, autoscaleMaxThroughput)
+        if isinstance(indexingPolicy, dict):
+            indexingPolicy = CosmosdbIndexingPolicy.from_dict(indexingPolicy)
+        if indexingPolicy is not None:
+            indexingPolicy.validate()
+        self._indexing_policy = indexingPolicy
+        self._default_ttl = defaultTtl
+        self._unique_keys = uniqueKeys
+        self._conflict_resolution_path = conflictResolutionPath
         super().__init__(
             stackName,
             projectName,
             location,
             {
                 "cosmosdb_account": cosmosdbAccount,
-                "cosmosdb_database": cosmosdb_database,
+                "cosmosdb_database": cosmosdbDatabase,
                 "resource_group": resourceGroup,
             },
         )
@@ -87,16 +162,81 @@ class CosmosdbContainer(AzureResource):
         :rtype: Dict[str, str]
         """
         return (
-            (
-                self._partition_key
-                if self._partition_key is not None
-                else {
-                    "paths": ["/id"],
-                    "kind": "Hash",
-                }
-            ),
+            self._partition_key
+            if self._partition_key is not None
+            else {
+                "paths": ["/id"],
+                "kind": "Hash",
+            }
         )
 
+    @property
+    def throughput(self) -> CosmosdbThroughput:
+        """
+        Retrieves the dedicated throughput.
+        :return: Such throughput.
+        :rtype: pythoneda.shared.iac.pulumi.azure.CosmosdbThroughput
+        """
+        return self._throughput
+
+    @property
+    def indexing_policy(self) -> CosmosdbIndexingPolicy:
+        """
+        Retrieves the indexing policy.
+        :return: Such policy, or None for the default one.
+        :rtype: pythoneda.shared.iac.pulumi.azure.CosmosdbIndexingPolicy
+        """
+        return self._indexing_policy
+
+    @property
+    def default_ttl(self) -> int:
+        """
+        Retrieves the time to live of documents.
+        :return: Such time, in seconds, -1, or None if documents never expire.
+        :rtype: int
+        """
+        return self._default_ttl
+
+    @property
+    def unique_keys(self) -> List[List[str]]:
+        """
+        Retrieves the paths of each unique key.
+        :return: Such paths.
+        :rtype: List[List[str]]
+        """
+        return self._unique_keys if self._unique_keys is not None else []
+
+    @property
+    def conflict_resolution_path(self) -> str:
+        """
+        Retrieves the path whose highest value wins conflicting writes.
+        :return: Such path.
+        :rtype: str
+        """
+        return (
+            self._conflict_resolution_path
+            if self._conflict_resolution_path is not None
+            else "/_ts"
+        )
+
+    @classmethod
+    def _check_path(cls, kind: str, path: str):
+        """
+        Checks a path refers to a single property.
+        :param kind: What the path is for.
+        :type kind: str
+        :param path: The path, e.g. "/customer/email".
+        :type path: str
+        :raise ValueError: If the path is not valid.
+        """
+        if (
+            not isinstance(path, str)
+            or not path.startswith("/")
+            or "" in path[1:].split("/")
+            or path.endswith(("/?", "/*", "/[]"))
+        ):
+            raise ValueError(f"Invalid {kind} path: {path!r}")
+
     @classmethod
     @property
     def type(cls) -> str:
@@ -134,6 +274,7 @@ class CosmosdbContainer(AzureResource):
         :return: The Azure Cosmos DB Container.
         :rtype: pulumi_azure_native.documentdb.SqlResourceSqlContainer
         """
+        self._validate_name(name)
         return pulumi_azure_native.documentdb.SqlResourceSqlContainer(
             name,
             resource_group_name=self.resource_group.name,
@@ -142,8 +283,30 @@ class CosmosdbContainer(AzureResource):
             database_name=self.cosmosdb_database.name,
             location=self.location,
             resource=pulumi_azure_native.documentdb.SqlContainerResourceArgs(
-                id=self.cosmosdb_database.name, partition_key=partitionKey
+                id=name,
+                partition_key=self.partition_key,
+                indexing_policy=(
+                    self.indexing_policy.args()
+                    if self.indexing_policy is not None
+                    else None
+                ),
+                default_ttl=self.default_ttl,
+                unique_key_policy=(
+                    pulumi_azure_native.documentdb.UniqueKeyPolicyArgs(
+                        unique_keys=[
+                            pulumi_azure_native.documentdb.UniqueKeyArgs(paths=paths)
+                            for paths in self.unique_keys
+                        ]
+                    )
+                    if self.unique_keys
+                    else None
+                ),
+                conflict_resolution_policy=pulumi_azure_native.documentdb.ConflictResolutionPolicyArgs(
+                    mode="LastWriterWins",
+                    conflict_resolution_path=self.conflict_resolution_path,
+                ),
             ),
+            options=self.throughput.options(),
         )
 
     # @override
@@ -21,6 +21,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from .azure_resource import AzureResource
 from .cosmosdb_account import CosmosdbAccount
+from .cosmosdb_throughput import CosmosdbThroughput
 from .outputs import Outputs
 import pulumi
 import pulumi_azure_native
@@ -31,13 +32,18 @@ class CosmosdbDatabase(AzureResource):
     """
     Azure CosmosDB Database for Licdata.
 
+    The database can provision throughput, manual or autoscale, shared by its
+    containers without dedicated throughput. Changing it updates the database
+    in place.
+
     Class name: CosmosdbDatabase
 
     Responsibilities:
         - Define the Azure CosmosDB Database for Licdata.
+        - Provision its shared throughput.
 
     Collaborators:
-        - None
+        - pythoneda.shared.iac.pulumi.azure.CosmosdbThroughput
     """
 
     def __init__(
@@ -47,6 +53,8 @@ class CosmosdbDatabase(AzureResource):
         location: str,
         cosmosdbAccount: CosmosdbAccount,
         resourceGroup: ResourceGroup,
+        throughput: int = None,
+        autoscaleMaxThroughput: int = None,
     ):
         """
         Creates a new Azure CosmosDB database instance.
@@ -60,14 +68,30 @@ class CosmosdbDatabase(AzureResource):
         :type cosmosdbAccount: pulumi_azure_native.documentdb.DatabaseAccount
         :param resourceGroup: The Azure Resource Group.
         :type resourceGroup: pythoneda.iac.pulumi.azure.ResourceGroup
+        :param throughput: The manual throughput shared by the containers, in
+        RU/s: at least 400, in steps of 100.
+        :type throughput: int
+        :param autoscaleMaxThroughput: The autoscale maximum throughput shared
+        by the containers, in RU/s: at least 1000, in steps of 1000.
+        :type autoscaleMaxThroughput: int
         """
+        self._throughput = CosmosdbThroughput(throughput, autoscaleMaxThroughput)
         super().__init__(
             stackName,
             projectName,
             location,
-            {"cosmosdb_account": cosmosdb_account, "resource_group": resourceGroup},
+            {"cosmosdb_account": cosmosdbAccount, "resource_group": resourceGroup},
         )
 
+    @property
+    def throughput(self) -> CosmosdbThroughput:
+        """
+        Retrieves the shared throughput.
+        :return: Such throughput.
+        :rtype: pythoneda.shared.iac.pulumi.azure.CosmosdbThroughput
+        """
+        return self._throughput
+
     @classmethod
     @property
     def type(cls) -> str:
@@ -112,6 +136,7 @@ class CosmosdbDatabase(AzureResource):
             resource={
                 "id": name,
             },
+            options=self.throughput.options(),
         )
 
     # @override
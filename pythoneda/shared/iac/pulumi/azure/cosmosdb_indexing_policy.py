@@ -0,0 +1,474 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/cosmosdb_indexing_policy.py
+
+This script defines the CosmosdbIndexingPolicy class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import pulumi_azure_native
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+class CosmosdbIndexingPolicy:
+    """
+    A builder of CosmosDB container indexing policies.
+
+    By default, CosmosDB indexes every path of every document, and each
+    indexed path adds to the request units of writes. The policy lists the
+    paths to index ("/status/?", "/customer/*") and to leave out, the
+    composite indexes multi-property ORDER BY queries need, and the spatial
+    indexes of GeoJSON properties. The "none" mode disables indexing
+    altogether, leaving point reads only.
+
+    Given sample documents, paths are checked against them, so a typo or a
+    renamed property is caught before it silently drops an index queries
+    depend on.
+
+    Class name: CosmosdbIndexingPolicy
+
+    Responsibilities:
+        - Build the indexing policy of a CosmosDB container.
+        - Validate its paths, against sample documents if any.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.CosmosdbContainer
+    """
+
+    root_path = "/*"
+    indexing_modes = ("consistent", "none")
+    composite_orders = ("ascending", "descending")
+    spatial_types = ("Point", "LineString", "Polygon", "MultiPolygon")
+
+    _segment = re.compile(r'/("(?:[^"\\]|\\.)*"|[^/"]*)')
+
+    def __init__(self, indexingMode: str = None, sampleDocuments: List[Dict] = None):
+        """
+        Creates a new CosmosdbIndexingPolicy instance.
+        :param indexingMode: The indexing mode: "consistent" (the default) or
+        "none".
+        :type indexingMode: str
+        :param sampleDocuments: Documents representative of the container, if
+        any.
+        :type sampleDocuments: List[Dict]
+        """
+        self._indexing_mode = indexingMode
+        self._sample_documents = sampleDocuments
+        self._included_paths: List[str] = []
+        self._excluded_paths: List[str] = []
+        self._composite_indexes: List[List[Tuple[str, str]]] = []
+        self._spatial_indexes: List[Tuple[str, List[str]]] = []
+
+    @property
+    def indexing_mode(self) -> str:
+        """
+        Retrieves the indexing mode.
+        :return: Such mode.
+        :rtype: str
+        """
+        return self._indexing_mode if self._indexing_mode is not None else "consistent"
+
+    @property
+    def sample_documents(self) -> List[Dict]:
+        """
+        Retrieves the sample documents.
+        :return: Such documents.
+        :rtype: List[Dict]
+        """
+        return self._sample_documents if self._sample_documents is not None else []
+
+    @property
+    def included_paths(self) -> List[str]:
+        """
+        Retrieves the included paths.
+        :return: Such paths.
+        :rtype: List[str]
+        """
+        return list(self._included_paths)
+
+    @property
+    def excluded_paths(self) -> List[str]:
+        """
+        Retrieves the excluded paths.
+        :return: Such paths.
+        :rtype: List[str]
+        """
+        return list(self._excluded_paths)
+
+    @property
+    def composite_indexes(self) -> List[List[Tuple[str, str]]]:
+        """
+        Retrieves the composite indexes.
+        :return: The paths and orders of each index.
+        :rtype: List[List[Tuple[str, str]]]
+        """
+        return [list(index) for index in self._composite_indexes]
+
+    @property
+    def spatial_indexes(self) -> List[Tuple[str, List[str]]]:
+        """
+        Retrieves the spatial indexes.
+        :return: The path and the GeoJSON types of each index.
+        :rtype: List[Tuple[str, List[str]]]
+        """
+        return [(path, list(types)) for path, types in self._spatial_indexes]
+
+    def include(self, *paths: str) -> "CosmosdbIndexingPolicy":
+        """
+        Indexes some paths.
+        :param paths: The paths, e.g. "/status/?" or "/customer/*".
+        :type paths: str
+        :return: This policy.
+        :rtype: pythoneda.shared.iac.pulumi.azure.CosmosdbIndexingPolicy
+        """
+        self._included_paths.extend(paths)
+        return self
+
+    def exclude(self, *paths: str) -> "CosmosdbIndexingPolicy":
+        """
+        Leaves some paths out of the index.
+        :param paths: The paths, e.g. "/*" or "/payload/*".
+        :type paths: str
+        :return: This policy.
+        :rtype: pythoneda.shared.iac.pulumi.azure.CosmosdbIndexingPolicy
+        """
+        self._excluded_paths.extend(paths)
+        return self
+
+    def composite(self, *paths: Tuple[str, str]) -> "CosmosdbIndexingPolicy":
+        """
+        Adds a composite index.
+        :param paths: The path and order of each property, e.g.
+        ("/name", "ascending"), ("/age", "descending").
+        :type paths: Tuple[str, str]
+        :return: This policy.
+        :rtype: pythoneda.shared.iac.pulumi.azure.CosmosdbIndexingPolicy
+        """
+        self._composite_indexes.append(list(paths))
+        return self
+
+    def spatial(self, path: str, *types: str) -> "CosmosdbIndexingPolicy":
+        """
+        Adds a spatial index.
+        :param path: The path, e.g. "/location/*".
+        :type path: str
+        :param types: The GeoJSON types to index. Defaults to all of them.
+        :type types: str
+        :return: This policy.
+        :rtype: pythoneda.shared.iac.pulumi.azure.CosmosdbIndexingPolicy
+        """
+        self._spatial_indexes.append(
+            (path, list(types) if types else list(self.spatial_types))
+        )
+        return self
+
+    @classmethod
+    def from_dict(cls, policy: Dict[str, Any]) -> "CosmosdbIndexingPolicy":
+        """
+        Builds a policy from its CosmosDB JSON form, as found in stack specs.
+        Paths can also be plain strings.
+        :param policy: The policy, e.g. {"indexingMode": "consistent",
+        "includedPaths": [{"path": "/*"}], "excludedPaths": [...],
+        "compositeIndexes": [[{"path": ..., "order": ...}]],
+        "spatialIndexes": [{"path": ..., "types": [...]}],
+        "sampleDocuments": [...]}.
+        :type policy: Dict[str, Any]
+        :return: The policy.
+        :rtype: pythoneda.shared.iac.pulumi.azure.CosmosdbIndexingPolicy
+        """
+
+        def path(item):
+            return item if isinstance(item, str) else item["path"]
+
+        result = cls(policy.get("indexingMode"), policy.get("sampleDocuments"))
+        result.include(*(path(item) for item in policy.get("includedPaths", [])))
+        result.exclude(*(path(item) for item in policy.get("excludedPaths", [])))
+        for index in policy.get("compositeIndexes", []):
+            result.composite(
+                *((item["path"], item.get("order", "ascending")) for item in index)
+            )
+        for index in policy.get("spatialIndexes", []):
+            result.spatial(index["path"], *index.get("types", []))
+        return result
+
+    @classmethod
+    def _segments(cls, path: str) -> List[str]:
+        """
+        Splits a path into its segments.
+        :param path: The path.
+        :type path: str
+        :return: The segments, or None if the path is malformed.
+        :rtype: List[str]
+        """
+        if not path.startswith("/"):
+            return None
+        result = []
+        position = 0
+        while position < len(path):
+            match = cls._segment.match(path, position)
+            if match is None or not match.group(1):
+                return None
+            result.append(match.group(1))
+            position = match.end()
+        return result
+
+    def _reach(self, segments: Iterable[str]) -> List[Any]:
+        """
+        Retrieves the values of the sample documents a path leads to.
+        :param segments: The segments of the path, without its "?" or "*".
+        :type segments: Iterable[str]
+        :return: The values.
+        :rtype: List[Any]
+        """
+        values = list(self.sample_documents)
+        for segment in segments:
+            following = []
+            for value in values:
+                if segment == "[]":
+                    if isinstance(value, list):
+                        following.extend(value)
+                elif isinstance(value, dict):
+                    key = segment[1:-1] if segment.startswith('"') else segment
+                    if key in value:
+                        following.append(value[key])
+            values = following
+        return values
+
+    @classmethod
+    def _scalar(cls, value: Any) -> bool:
+        """
+        Checks whether a value is a scalar, indexable by a range index.
+        :param value: The value.
+        :type value: Any
+        :return: True in such case.
+        :rtype: bool
+        """
+        return not isinstance(value, (dict, list))
+
+    def _path_problems(self, kind: str, path: str) -> List[str]:
+        """
+        Describes why an included or excluded path is not valid.
+        :param kind: Either "included" or "excluded".
+        :type kind: str
+        :param path: The path.
+        :type path: str
+        :return: The problems found, if any.
+        :rtype: List[str]
+        """
+        segments = self._segments(path)
+        if segments is None or segments[-1] not in ("?", "*") or "?" in segments[:-1]:
+            return [f'{kind.capitalize()} path {path!r} must end with "/?" or "/*"']
+        if not self.sample_documents or path == self.root_path:
+            return []
+        values = self._reach(segments[:-1])
+        if not values:
+            return [f"{kind.capitalize()} path {path!r} matches no sample document"]
+        if segments[-1] == "?" and not any(self._scalar(value) for value in values):
+            return [
+                f"{kind.capitalize()} path {path!r} leads to no scalar value, "
+                'use "/*" or "/[]/?"'
+            ]
+        return []
+
+    def problems(self) -> List[str]:
+        """
+        Describes why the policy is not valid.
+        :return: The problems found, if any.
+        :rtype: List[str]
+        """
+        result = []
+        if self.indexing_mode not in self.indexing_modes:
+            result.append(
+                f"Unsupported indexing mode {self.indexing_mode!r}, use one of "
+                f"{', '.join(self.indexing_modes)}"
+            )
+        if self.indexing_mode == "none":
+            if (
+                self._included_paths
+                or self._excluded_paths
+                or self._composite_indexes
+                or self._spatial_indexes
+            ):
+                result.append('Indexing mode "none" allows no paths nor indexes')
+            return result
+        for path in self._included_paths:
+            result.extend(self._path_problems("included", path))
+        for path in self._excluded_paths:
+            result.extend(self._path_problems("excluded", path))
+        for path in set(self._included_paths) & set(self._excluded_paths):
+            result.append(f"Path {path!r} is both included and excluded")
+        if (self._included_paths or self._excluded_paths) and self.root_path not in (
+            self._included_paths + self._excluded_paths
+        ):
+            result.append(
+                f"The root path {self.root_path!r} must be included or excluded"
+            )
+        for index in self._composite_indexes:
+            if len(index) < 2:
+                result.append("Composite indexes need at least two paths")
+            for path, order in index:
+                segments = self._segments(path)
+                if segments is None or segments[-1] in ("?", "*"):
+                    result.append(
+                        f'Composite index path {path!r} must not end with "/?" or "/*"'
+                    )
+                elif self.sample_documents and not any(
+                    self._scalar(value) for value in self._reach(segments)
+                ):
+                    result.append(
+                        f"Composite index path {path!r} leads to no scalar value "
+                        "in the sample documents"
+                    )
+                if order not in self.composite_orders:
+                    result.append(
+                        f"Composite index path {path!r} has an unsupported order "
+                        f"{order!r}, use one of {', '.join(self.composite_orders)}"
+                    )
+        for path, types in self._spatial_indexes:
+            segments = self._segments(path)
+            if segments is None or segments[-1] != "*":
+                result.append(f'Spatial index path {path!r} must end with "/*"')
+                continue
+            unsupported = [name for name in types if name not in self.spatial_types]
+            if unsupported:
+                result.append(
+                    f"Spatial index path {path!r} has unsupported types "
+                    f"{', '.join(unsupported)}"
+                )
+            if self.sample_documents and not any(
+                isinstance(value, dict) and value.get("type") in types
+                for value in self._reach(segments[:-1])
+            ):
+                result.append(
+                    f"Spatial index path {path!r} leads to no GeoJSON "
+                    f"{'/'.join(types)} in the sample documents"
+                )
+        return result
+
+    def validate(self):
+        """
+        Checks the policy is valid.
+        :raise ValueError: If the policy is not valid.
+        """
+        problems = self.problems()
+        if problems:
+            raise ValueError("; ".join(problems))
+
+    @classmethod
+    def _leaves(cls, value: Any, prefix: Tuple[str, ...]) -> Iterator[Tuple[str, ...]]:
+        """
+        Walks the scalar values of a document.
+        :param value: The document, or one of its values.
+        :type value: Any
+        :param prefix: The segments leading to the value.
+        :type prefix: Tuple[str, ...]
+        :return: The segments leading to each scalar value.
+        :rtype: Iterator[Tuple[str, ...]]
+        """
+        if isinstance(value, dict):
+            for key, item in value.items():
+                yield from cls._leaves(item, prefix + (key,))
+        elif isinstance(value, list):
+            for item in value:
+                yield from cls._leaves(item, prefix + ("[]",))
+        else:
+            yield prefix
+
+    def _rules(self) -> List[Tuple[Tuple[str, ...], bool, bool]]:
+        """
+        Retrieves the included and excluded paths, as matching rules.
+        :return: The segments of each path, without its "?" or "*", whether
+        it matches a single value, and whether it is included.
+        :rtype: List[Tuple[Tuple[str, ...], bool, bool]]
+        """
+        result = []
+        for paths, included in (
+            (self._included_paths, True),
+            (self._excluded_paths, False),
+        ):
+            for path in paths:
+                segments = self._segments(path)
+                if segments is None:
+                    continue
+                result.append(
+                    (
+                        tuple(
+                            segment[1:-1] if segment.startswith('"') else segment
+                            for segment in segments[:-1]
+                        ),
+                        segments[-1] == "?",
+                        included,
+                    )
+                )
+        return result
+
+    def indexed_terms(self, document: Dict[str, Any]) -> int:
+        """
+        Counts the values of a document the policy indexes, each adding to
+        the request units of writing it. The most specific path matching a
+        value decides whether it is indexed.
+        :param document: The document.
+        :type document: Dict[str, Any]
+        :return: The number of values indexed.
+        :rtype: int
+        """
+        if self.indexing_mode == "none":
+            return 0
+        rules = self._rules()
+        result = 0
+        for leaf in self._leaves(document, ()):
+            best = None
+            for segments, exact, included in rules:
+                if (leaf == segments) if exact else (leaf[: len(segments)] == segments):
+                    specificity = (len(segments), exact)
+                    if best is None or specificity > best[0]:
+                        best = (specificity, included)
+            if best is None or best[1]:
+                result += 1
+        return result
+
+    def args(self) -> pulumi_azure_native.documentdb.IndexingPolicyArgs:
+        """
+        Builds the indexing policy of the container.
+        :return: Such policy.
+        :rtype: pulumi_azure_native.documentdb.IndexingPolicyArgs
+        """
+        documentdb = pulumi_azure_native.documentdb
+        return documentdb.IndexingPolicyArgs(
+            automatic=self.indexing_mode != "none",
+            indexing_mode=self.indexing_mode,
+            included_paths=[
+                documentdb.IncludedPathArgs(path=path) for path in self._included_paths
+            ],
+            excluded_paths=[
+                documentdb.ExcludedPathArgs(path=path) for path in self._excluded_paths
+            ],
+            composite_indexes=[
+                [
+                    documentdb.CompositePathArgs(path=path, order=order)
+                    for path, order in index
+                ]
+                for index in self._composite_indexes
+            ],
+            spatial_indexes=[
+                documentdb.SpatialSpecArgs(path=path, types=types)
+                for path, types in self._spatial_indexes
+            ],
+        )
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,163 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/cosmosdb_throughput.py
+
+This script defines the CosmosdbThroughput class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import pulumi_azure_native
+
+
+class CosmosdbThroughput:
+    """
+    The request units provisioned to a CosmosDB database or container.
+
+    Throughput is either manual, a fixed number of RU/s, or autoscale, which
+    scales between a tenth of its maximum and the maximum. Changing the value
+    updates the database or container in place; switching between manual and
+    autoscale is a migration Azure performs apart, not through the template.
+
+    Class name: CosmosdbThroughput
+
+    Responsibilities:
+        - Validate manual and autoscale throughput.
+        - Build the create/update options of CosmosDB databases and containers.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.CosmosdbDatabase
+        - pythoneda.shared.iac.pulumi.azure.CosmosdbContainer
+    """
+
+    min_throughput = 400
+    throughput_step = 100
+    min_autoscale_max_throughput = 1000
+    autoscale_max_throughput_step = 1000
+
+    def __init__(self, throughput: int, autoscaleMaxThroughput: int):
+        """
+        Creates a new CosmosdbThroughput instance.
+        :param throughput: The manual throughput, in RU/s, if any.
+        :type throughput: int
+        :param autoscaleMaxThroughput: The autoscale maximum throughput, in
+        RU/s, if any.
+        :type autoscaleMaxThroughput: int
+        """
+        if throughput is not None and autoscaleMaxThroughput is not None:
+            raise ValueError(
+                "Either manual or autoscale throughput can be provisioned, not both"
+            )
+        if throughput is not None and (
+            throughput < self.min_throughput or throughput % self.throughput_step
+        ):
+            raise ValueError(
+                f"Invalid throughput: {throughput} (at least "
+                f"{self.min_throughput} RU/s, in steps of {self.throughput_step})"
+            )
+        if autoscaleMaxThroughput is not None and (
+            autoscaleMaxThroughput < self.min_autoscale_max_throughput
+            or autoscaleMaxThroughput % self.autoscale_max_throughput_step
+        ):
+            raise ValueError(
+                f"Invalid autoscale maximum throughput: {autoscaleMaxThroughput} "
+                f"(at least {self.min_autoscale_max_throughput} RU/s, in steps "
+                f"of {self.autoscale_max_throughput_step})"
+            )
+        self._throughput = throughput
+        self._autoscale_max_throughput = autoscaleMaxThroughput
+
+    @property
+    def throughput(self) -> int:
+        """
+        Retrieves the manual throughput.
+        :return: Such throughput, in RU/s, or None.
+        :rtype: int
+        """
+        return self._throughput
+
+    @property
+    def autoscale_max_throughput(self) -> int:
+        """
+        Retrieves the autoscale maximum throughput.
+        :return: Such throughput, in RU/s, or None.
+        :rtype: int
+        """
+        return self._autoscale_max_throughput
+
+    @property
+    def autoscale(self) -> bool:
+        """
+        Checks whether the throughput is autoscale.
+        :return: True in such case.
+        :rtype: bool
+        """
+        return self._autoscale_max_throughput is not None
+
+    @property
+    def provisioned(self) -> bool:
+        """
+        Checks whether any throughput is provisioned.
+        :return: True in such case.
+        :rtype: bool
+        """
+        return self._throughput is not None or self.autoscale
+
+    @property
+    def min_scaled_throughput(self) -> int:
+        """
+        Retrieves the lowest throughput autoscale scales down to.
+        :return: Such throughput, in RU/s, or None if not autoscale.
+        :rtype: int
+        """
+        if not self.autoscale:
+            return None
+        return self._autoscale_max_throughput // 10
+
+    def options(self) -> pulumi_azure_native.documentdb.CreateUpdateOptionsArgs:
+        """
+        Builds the create/update options.
+        :return: Such options, or None if no throughput is provisioned.
+        :rtype: pulumi_azure_native.documentdb.CreateUpdateOptionsArgs
+        """
+        if self.autoscale:
+            return pulumi_azure_native.documentdb.CreateUpdateOptionsArgs(
+                autoscale_settings=pulumi_azure_native.documentdb.AutoscaleSettingsArgs(
+                    max_throughput=self._autoscale_max_throughput
+                )
+            )
+        if self._throughput is not None:
+            return pulumi_azure_native.documentdb.CreateUpdateOptionsArgs(
+                throughput=self._throughput
+            )
+        return None
+
+    def __repr__(self) -> str:
+        """
+        Describes the throughput.
+        :return: The description.
+        :rtype: str
+        """
+        if self.autoscale:
+            return (
+                f"autoscale {self.min_scaled_throughput}-"
+                f"{self._autoscale_max_throughput} RU/s"
+            )
+        if self._throughput is not None:
+            return f"{self._throughput} RU/s"
+        return "no provisioned throughput"
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,288 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/dependency_graph.py
+
+This script defines the DependencyGraph class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .azure_resource import AzureResource
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class DependencyGraph:
+    """
+    Stack-wide index of the dependencies among AzureResource instances.
+
+    Nodes are resources, identified by a name unique in the stack. An edge
+    goes from a resource to each AzureResource in its dependencies.
+
+    Class name: DependencyGraph
+
+    Responsibilities:
+        - Index resources by name and by type.
+        - Keep forward (dependencies) and reverse (dependents) adjacency.
+        - Detect cycles, and compute the topological order and critical path.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.AzureResource
+    """
+
+    def __init__(self):
+        """
+        Creates a new DependencyGraph instance.
+        """
+        self._by_name: Dict[str, AzureResource] = {}
+        self._names: Dict[int, str] = {}
+        self._by_type: Dict[str, List[str]] = {}
+        self._dependencies: Dict[str, List[str]] = {}
+        self._dependents: Dict[str, List[str]] = {}
+        self._order: Optional[List[str]] = None
+
+    @classmethod
+    def from_resources(cls, resources: Dict[str, AzureResource]) -> "DependencyGraph":
+        """
+        Builds a graph out of named resources, such as the ones returned by
+        StackSpecLoader.
+        :param resources: The resources, by name.
+        :type resources: Dict[str, pythoneda.shared.iac.pulumi.azure.AzureResource]
+        :return: The graph.
+        :rtype: pythoneda.shared.iac.pulumi.azure.DependencyGraph
+        """
+        result = cls()
+        for name, resource in resources.items():
+            result.add(name, resource)
+        return result
+
+    def add(self, name: str, resource: AzureResource) -> str:
+        """
+        Adds a resource, and the dependencies not added yet. These get named
+        after the dependent resource and the dependency key, e.g.
+        "api.resource_group".
+        :param name: The name of the resource.
+        :type name: str
+        :param resource: The resource.
+        :type resource: pythoneda.shared.iac.pulumi.azure.AzureResource
+        :return: The name of the resource in the graph, which is different from
+        given name if the resource had been added before.
+        :rtype: str
+        """
+        existing = self._names.get(id(resource))
+        if existing is not None:
+            return existing
+        if name in self._by_name:
+            raise ValueError(f"Duplicated resource name: {name}")
+        self._by_name[name] = resource
+        self._names[id(resource)] = name
+        for key in self._type_keys(resource):
+            self._by_type.setdefault(key, []).append(name)
+        self._dependents.setdefault(name, [])
+        dependencies = []
+        for key, dependency in (resource.dependencies or {}).items():
+            if isinstance(dependency, AzureResource):
+                dependency_name = self.add(f"{name}.{key}", dependency)
+                dependencies.append(dependency_name)
+                self._dependents[dependency_name].append(name)
+        self._dependencies[name] = dependencies
+        self._order = None
+        return name
+
+    @classmethod
+    def _type_keys(cls, resource: AzureResource) -> Tuple[str, ...]:
+        """
+        Retrieves the keys to index given resource by type: its class name
+        and its Azure resource type.
+        :param resource: The resource.
+        :type resource: pythoneda.shared.iac.pulumi.azure.AzureResource
+        :return: Such keys.
+        :rtype: Tuple[str, ...]
+        """
+        azure_type = resource.__class__.type
+        if isinstance(azure_type, str) and azure_type != resource.__class__.__name__:
+            return (resource.__class__.__name__, azure_type)
+        return (resource.__class__.__name__,)
+
+    def __len__(self) -> int:
+        """
+        Retrieves the number of resources.
+        :return: Such number.
+        :rtype: int
+        """
+        return len(self._by_name)
+
+    def __contains__(self, name: str) -> bool:
+        """
+        Checks whether a resource with given name exists.
+        :param name: The name.
+        :type name: str
+        :return: True in such case.
+        :rtype: bool
+        """
+        return name in self._by_name
+
+    def get(self, name: str) -> Optional[AzureResource]:
+        """
+        Retrieves a resource by name.
+        :param name: The name.
+        :type name: str
+        :return: The resource, or None if not found.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AzureResource
+        """
+        return self._by_name.get(name)
+
+    def name_of(self, resource: AzureResource) -> Optional[str]:
+        """
+        Retrieves the name of a resource.
+        :param resource: The resource.
+        :type resource: pythoneda.shared.iac.pulumi.azure.AzureResource
+        :return: Its name, or None if not in the graph.
+        :rtype: str
+        """
+        return self._names.get(id(resource))
+
+    def by_type(self, typeName: str) -> List[str]:
+        """
+        Retrieves the names of the resources of given type.
+        :param typeName: The class name (e.g. "WebApp") or the Azure resource
+        type (e.g. "Microsoft.Web/sites").
+        :type typeName: str
+        :return: The names.
+        :rtype: List[str]
+        """
+        return list(self._by_type.get(typeName, ()))
+
+    def dependencies_of(self, name: str) -> List[str]:
+        """
+        Retrieves the names of the resources given one depends upon.
+        :param name: The name of the resource.
+        :type name: str
+        :return: Such names.
+        :rtype: List[str]
+        """
+        return list(self._dependencies[name])
+
+    def dependents_of(self, name: str) -> List[str]:
+        """
+        Retrieves the names of the resources depending on given one.
+        :param name: The name of the resource.
+        :type name: str
+        :return: Such names.
+        :rtype: List[str]
+        """
+        return list(self._dependents[name])
+
+    def topological_order(self) -> List[str]:
+        """
+        Retrieves the names of the resources, dependencies first.
+        :return: Such names.
+        :rtype: List[str]
+        """
+        if self._order is None:
+            pending = {
+                name: len(dependencies)
+                for name, dependencies in self._dependencies.items()
+            }
+            ready = deque(name for name, count in pending.items() if count == 0)
+            order = []
+            while ready:
+                name = ready.popleft()
+                order.append(name)
+                for dependent in self._dependents[name]:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        ready.append(dependent)
+            if len(order) < len(self._by_name):
+                cycle = self.find_cycle()
+                raise ValueError(f"Circular dependency: {' -> '.join(cycle)}")
+            self._order = order
+        return list(self._order)
+
+    def find_cycle(self) -> Optional[List[str]]:
+        """
+        Finds a dependency cycle.
+        :return: The names along the cycle, first one repeated at the end, or
+        None if the graph is acyclic.
+        :rtype: List[str]
+        """
+        visiting, done = 1, 2
+        state: Dict[str, int] = {}
+        for root in self._by_name:
+            if root in state:
+                continue
+            path = [root]
+            iterators = [iter(self._dependencies[root])]
+            state[root] = visiting
+            while iterators:
+                child = next(iterators[-1], None)
+                if child is None:
+                    state[path.pop()] = done
+                    iterators.pop()
+                elif state.get(child) == visiting:
+                    return path[path.index(child) :] + [child]
+                elif child not in state:
+                    state[child] = visiting
+                    path.append(child)
+                    iterators.append(iter(self._dependencies[child]))
+        return None
+
+    def critical_path(
+        self, duration: Callable[[AzureResource], float] = None
+    ) -> Tuple[float, List[str]]:
+        """
+        Retrieves the longest chain of resources that have to be created one
+        after the other.
+        :param duration: The expected creation time of a resource. Defaults to
+        1 for all of them, so the length is the number of resources.
+        :type duration: Callable[[pythoneda.shared.iac.pulumi.azure.AzureResource], float]
+        :return: The length of the chain, and its names, dependencies first.
+        :rtype: Tuple[float, List[str]]
+        """
+        if not self._by_name:
+            return 0, []
+        length: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for name in self.topological_order():
+            best = None
+            for dependency in self._dependencies[name]:
+                if best is None or length[dependency] > length[best]:
+                    best = dependency
+            own = duration(self._by_name[name]) if duration else 1
+            length[name] = own + (length[best] if best is not None else 0)
+            previous[name] = best
+        last = max(length, key=length.get)
+        path = []
+        current = last
+        while current is not None:
+            path.append(current)
+            current = previous[current]
+        path.reverse()
+        return length[last], path
+
+    def critical_path_length(
+        self, duration: Callable[[AzureResource], float] = None
+    ) -> float:
+        """
+        Retrieves the length of the critical path.
+        :param duration: The expected creation time of a resource.
+        :type duration: Callable[[pythoneda.shared.iac.pulumi.azure.AzureResource], float]
+        :return: Such length.
+        :rtype: float
+        """
+        return self.critical_path(duration)[0]
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -140,6 +140,7 @@ class DnsRecord(AzureResource):
         :return: The DNS record.
         :rtype: pulumi_azure_native.network.RecordSet
         """
+        self._validate_name(name)
         return pulumi_azure_native.network.RecordSet(
             resource_name=name,
             zone_name=self.dns_zone.name,
@@ -0,0 +1,269 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/dns_record_sets.py
+
+This script defines the DnsRecordSets class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .azure_resource import AzureResource
+from .dns_zone import DnsZone
+from .outputs import Outputs
+from .resource_group import ResourceGroup
+from .zone_file_reader import ZoneFileReader, ZoneRecordGroup
+import os
+import pulumi
+import pulumi_azure_native
+from typing import Any, Dict, List
+
+
+class DnsRecordSets(AzureResource):
+    """
+    Azure DNS record sets, in bulk, out of a zone file or a CSV file.
+
+    Class name: DnsRecordSets
+
+    Responsibilities:
+        - Read the records of a file, grouped by name and type.
+        - Create a RecordSet for each A, AAAA, CNAME, TXT, MX and SRV group.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.ZoneFileReader
+    """
+
+    _supported_types = ("A", "AAAA", "CNAME", "TXT", "MX", "SRV")
+
+    def __init__(
+        self,
+        stackName: str,
+        projectName: str,
+        location: str,
+        filePath: str,
+        fileFormat: str,
+        origin: str,
+        ttl: int,
+        dnsZone: DnsZone,
+        resourceGroup: ResourceGroup,
+    ):
+        """
+        Creates a new DnsRecordSets instance.
+        :param stackName: The name of the stack.
+        :type stackName: str
+        :param projectName: The name of the project.
+        :type projectName: str
+        :param location: The Azure location.
+        :type location: str
+        :param filePath: The path of the zone file or CSV file.
+        :type filePath: str
+        :param fileFormat: Either "zone" or "csv". Defaults to "csv" for files
+        ending in ".csv", "zone" otherwise.
+        :type fileFormat: str
+        :param origin: The zone the records belong to, e.g. "example.com".
+        :type origin: str
+        :param ttl: The default TTL.
+        :type ttl: int
+        :param dnsZone: The DnsZone.
+        :type dnsZone: pythoneda.shared.iac.pulumi.azure.DnsZone
+        :param resourceGroup: The ResourceGroup.
+        :type resourceGroup: pythoneda.shared.iac.pulumi.azure.ResourceGroup
+        """
+        self._file_path = filePath
+        self._file_format = fileFormat
+        self._origin = origin
+        self._ttl = ttl
+        super().__init__(
+            stackName,
+            projectName,
+            location,
+            {"dns_zone": dnsZone, "resource_group": resourceGroup},
+        )
+
+    @property
+    def file_path(self) -> str:
+        """
+        Retrieves the path of the file.
+        :return: Such path.
+        :rtype: str
+        """
+        return self._file_path
+
+    @property
+    def file_format(self) -> str:
+        """
+        Retrieves the format of the file.
+        :return: Either "zone" or "csv".
+        :rtype: str
+        """
+        if self._file_format is not None:
+            return self._file_format
+        return "csv" if self.file_path.lower().endswith(".csv") else "zone"
+
+    @property
+    def origin(self) -> str:
+        """
+        Retrieves the zone the records belong to.
+        :return: Such zone.
+        :rtype: str
+        """
+        return self._origin
+
+    @property
+    def ttl(self) -> int:
+        """
+        Retrieves the default TTL.
+        :return: Such TTL.
+        :rtype: int
+        """
+        return self._ttl if self._ttl is not None else 3600
+
+    @classmethod
+    @property
+    def type(cls) -> str:
+        """
+        Retrieves the type of resource.
+        :return: Such type.
+        :rtype: str
+        """
+        return "Microsoft.Network/dnszones/recordsets"
+
+    # @override
+    @classmethod
+    def _resource_name(cls, stackName: str, projectName: str, location: str) -> str:
+        """
+        Builds the resource name.
+        :param stackName: The name of the stack.
+        :type stackName: str
+        :param projectName: The name of the project.
+        :type projectName: str
+        :param location: The Azure location.
+        :type location: str
+        :return: The resource name.
+        :rtype: str
+        """
+        return "dnsrs"
+
+    @classmethod
+    def _record_set_args(cls, group: ZoneRecordGroup) -> Dict[str, Any]:
+        """
+        Builds the type-specific arguments of a record set.
+        :param group: The records of the set.
+        :type group: pythoneda.shared.iac.pulumi.azure.ZoneRecordGroup
+        :return: The arguments.
+        :rtype: Dict[str, Any]
+        """
+        network = pulumi_azure_native.network
+        data = [record.data for record in group.records]
+        try:
+            if group.type == "A":
+                return {
+                    "a_records": [network.ARecordArgs(ipv4_address=d[0]) for d in data]
+                }
+            if group.type == "AAAA":
+                return {
+                    "aaaa_records": [
+                        network.AaaaRecordArgs(ipv6_address=d[0]) for d in data
+                    ]
+                }
+            if group.type == "CNAME":
+                if len(data) > 1:
+                    raise ValueError("a CNAME record set holds a single record")
+                return {"cname_record": network.CnameRecordArgs(cname=data[0][0])}
+            if group.type == "TXT":
+                return {"txt_records": [network.TxtRecordArgs(value=list(d)) for d in data]}
+            if group.type == "MX":
+                return {
+                    "mx_records": [
+                        network.MxRecordArgs(preference=int(d[0]), exchange=d[1])
+                        for d in data
+                    ]
+                }
+            return {
+                "srv_records": [
+                    network.SrvRecordArgs(
+                        priority=int(d[0]), weight=int(d[1]), port=int(d[2]), target=d[3]
+                    )
+                    for d in data
+                ]
+            }
+        except (IndexError, ValueError) as error:
+            raise ValueError(
+                f"Invalid {group.type} record for {group.name}: {error}"
+            ) from error
+
+    @classmethod
+    def _pulumi_name(cls, name: str, group: ZoneRecordGroup) -> str:
+        """
+        Builds the Pulumi name of a record set.
+        :param name: The name of this resource.
+        :type name: str
+        :param group: The records of the set.
+        :type group: pythoneda.shared.iac.pulumi.azure.ZoneRecordGroup
+        :return: The Pulumi name.
+        :rtype: str
+        """
+        relative = group.name.replace("@", "apex").replace("*", "wildcard")
+        return f"{name}-{relative}-{group.type.lower()}"
+
+    # @override
+    def _create(self, name: str) -> List[pulumi_azure_native.network.RecordSet]:
+        """
+        Creates the record sets.
+        :param name: The name of the resource.
+        :type name: str
+        :return: The record sets.
+        :rtype: List[pulumi_azure_native.network.RecordSet]
+        """
+        reader = ZoneFileReader(self.origin, self.ttl)
+        result = []
+        skipped = 0
+        with open(self.file_path, "r", encoding="utf-8", newline="") as lines:
+            if self.file_format == "csv":
+                records = reader.read_csv(lines)
+            else:
+                records = reader.read_zone_file(lines)
+            for group in reader.group(records):
+                if group.type not in self._supported_types:
+                    skipped += len(group.records)
+                    continue
+                result.append(
+                    pulumi_azure_native.network.RecordSet(
+                        self._pulumi_name(name, group),
+                        zone_name=self.dns_zone.name,
+                        resource_group_name=self.resource_group.name,
+                        record_type=group.type,
+                        relative_record_set_name=group.name,
+                        ttl=group.ttl,
+                        **self._record_set_args(group),
+                    )
+                )
+        if skipped:
+            pulumi.log.warn(
+                f"Skipped {skipped} records of unsupported types in "
+                f"{os.path.basename(self.file_path)}"
+            )
+        return result
+
+    # @override
+    def _post_create(self, resource: List[pulumi_azure_native.network.RecordSet]):
+        """
+        Post-create hook.
+        :param resource: The record sets.
+        :type resource: List[pulumi_azure_native.network.RecordSet]
+        """
+        pulumi.export(Outputs.DNS_RECORD_SETS.value, len(resource))
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
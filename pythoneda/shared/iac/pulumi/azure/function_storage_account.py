@@ -29,6 +29,11 @@ class FunctionStorageAccount(StorageAccount):
     """
     Azure Function Storage Account.
 
+    The Functions host keeps its triggers, leases and keys in blobs, queues
+    and tables, so the account is always a standard general-purpose v2 one:
+    premium block blob and file accounts provide neither queues nor tables.
+    Zone-redundant SKUs keep the host available when a zone fails.
+
     Class name: FunctionStorageAccount
 
     Responsibilities:
@@ -44,6 +49,7 @@ class FunctionStorageAccount(StorageAccount):
         projectName: str,
         location: str,
         resourceGroup: ResourceGroup,
+        skuType: str = None,
     ):
         """
         Creates a new FunctionStorageAccount instance.
@@ -55,14 +61,22 @@ class FunctionStorageAccount(StorageAccount):
         :type location: str
         :param resourceGroup: The ResourceGroup.
         :type resourceGroup: pythoneda.iac.pulumi.azure.ResourceGroup
+        :param skuType: The SKU type, one of the standard ones, e.g.
+        Standard_ZRS. Defaults to Standard_LRS.
+        :type skuType: str
         """
+        if skuType is not None and skuType not in self.standard_sku_types:
+            raise ValueError(
+                f"Function storage accounts need a standard SKU, not {skuType}: "
+                "the Functions host needs queues and tables"
+            )
         super().__init__(
             stackName,
             projectName,
             location,
             None,
             None,
-            None,
+            skuType,
             None,
             resourceGroup,
         )
@@ -0,0 +1,200 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/invoke_cache.py
+
+This script defines the InvokeCache class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import pulumi
+import pulumi_azure_native
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+
+class InvokeCache:
+    """
+    Per-deployment cache of Azure control-plane invokes.
+
+    Class name: InvokeCache
+
+    Responsibilities:
+        - Memoize invokes by (function, resource group, resource name).
+        - Count cache hits and misses.
+
+    Collaborators:
+        - pulumi_azure_native.containerregistry.list_registry_credentials
+        - pulumi_azure_native.storage.list_storage_account_keys
+    """
+
+    _instances: Dict[Tuple[str, str], "InvokeCache"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self):
+        """
+        Creates a new InvokeCache instance.
+        """
+        self._results = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "InvokeCache":
+        """
+        Retrieves the cache of the current deployment, i.e. Pulumi project and
+        stack.
+        :return: Such cache.
+        :rtype: pythoneda.shared.iac.pulumi.azure.InvokeCache
+        """
+        key = (pulumi.get_project(), pulumi.get_stack())
+        with cls._instances_lock:
+            result = cls._instances.get(key)
+            if result is None:
+                result = cls()
+                cls._instances[key] = result
+        return result
+
+    @classmethod
+    def reset(cls):
+        """
+        Discards the caches of all deployments.
+        """
+        with cls._instances_lock:
+            cls._instances.clear()
+
+    @property
+    def hits(self) -> int:
+        """
+        Retrieves the number of invokes served from the cache.
+        :return: Such number.
+        :rtype: int
+        """
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """
+        Retrieves the number of invokes that reached Azure.
+        :return: Such number.
+        :rtype: int
+        """
+        return self._misses
+
+    def get(
+        self,
+        function: Callable[..., Any],
+        resourceGroupName: str,
+        resourceName: str,
+        resourceParameter: str,
+    ) -> Any:
+        """
+        Retrieves the result of an invoke, calling it only the first time.
+        :param function: The invoke function.
+        :type function: Callable[..., Any]
+        :param resourceGroupName: The name of the resource group.
+        :type resourceGroupName: str
+        :param resourceName: The name of the resource.
+        :type resourceName: str
+        :param resourceParameter: The invoke parameter for the resource name.
+        :type resourceParameter: str
+        :return: The invoke result.
+        :rtype: Any
+        """
+        key = (
+            f"{function.__module__}.{function.__qualname__}",
+            resourceGroupName,
+            resourceName,
+        )
+        with self._lock:
+            if key in self._results:
+                self._hits += 1
+            else:
+                self._misses += 1
+                self._results[key] = function(
+                    resource_group_name=resourceGroupName,
+                    **{resourceParameter: resourceName},
+                )
+            return self._results[key]
+
+    def _get_output(
+        self,
+        function: Callable[..., Any],
+        resourceGroupName: pulumi.Input[str],
+        resourceName: pulumi.Input[str],
+        resourceParameter: str,
+    ) -> pulumi.Output:
+        """
+        Retrieves the result of an invoke, once given names are known.
+        :param function: The invoke function.
+        :type function: Callable[..., Any]
+        :param resourceGroupName: The name of the resource group.
+        :type resourceGroupName: pulumi.Input[str]
+        :param resourceName: The name of the resource.
+        :type resourceName: pulumi.Input[str]
+        :param resourceParameter: The invoke parameter for the resource name.
+        :type resourceParameter: str
+        :return: The invoke result.
+        :rtype: pulumi.Output
+        """
+        return pulumi.Output.all(resourceGroupName, resourceName).apply(
+            lambda args: self.get(function, args[0], args[1], resourceParameter)
+        )
+
+    def registry_credentials(
+        self,
+        resourceGroupName: pulumi.Input[str],
+        registryName: pulumi.Input[str],
+    ) -> pulumi.Output:
+        """
+        Retrieves the credentials of a container registry.
+        :param resourceGroupName: The name of the resource group.
+        :type resourceGroupName: pulumi.Input[str]
+        :param registryName: The name of the registry.
+        :type registryName: pulumi.Input[str]
+        :return: The credentials.
+        :rtype: pulumi.Output[pulumi_azure_native.containerregistry.ListRegistryCredentialsResult]
+        """
+        return self._get_output(
+            pulumi_azure_native.containerregistry.list_registry_credentials,
+            resourceGroupName,
+            registryName,
+            "registry_name",
+        )
+
+    def storage_account_keys(
+        self,
+        resourceGroupName: pulumi.Input[str],
+        accountName: pulumi.Input[str],
+    ) -> pulumi.Output:
+        """
+        Retrieves the keys of a storage account.
+        :param resourceGroupName: The name of the resource group.
+        :type resourceGroupName: pulumi.Input[str]
+        :param accountName: The name of the storage account.
+        :type accountName: pulumi.Input[str]
+        :return: The keys.
+        :rtype: pulumi.Output[pulumi_azure_native.storage.ListStorageAccountKeysResult]
+        """
+        return self._get_output(
+            pulumi_azure_native.storage.list_storage_account_keys,
+            resourceGroupName,
+            accountName,
+            "account_name",
+        )
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,204 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/multi_region_builder.py
+
+This script defines the MultiRegionBuilder class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .azure_regions import AzureRegions
+from .azure_resource import AzureResource
+from .stack_spec_loader import StackSpecLoader
+from typing import Any, Dict, Iterable, List, Set
+
+
+class MultiRegionBuilder:
+    """
+    Fans a template of resources out to several Azure regions.
+
+    The template is a list of stack spec entries, as read by StackSpecLoader.
+    The first region gets every entry; global resources (DnsZone, FrontDoor
+    and ContainerRegistry, or entries flagged with "global": true) are built
+    there only, and shared with the other regions, which get the remaining
+    entries. An entry can be limited to some regions with "regions": [...].
+
+    Only AzureResource instances are built, no Pulumi resource is registered.
+    Building them is pure Python, so regions are built one after another: a
+    thread pool would only add threads, serialized by the interpreter lock.
+
+    Class name: MultiRegionBuilder
+
+    Responsibilities:
+        - Build per-region instances of a template.
+        - Build global resources once.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.StackSpecLoader
+        - pythoneda.shared.iac.pulumi.azure.AzureRegions
+    """
+
+    _global_types = ("DnsZone", "FrontDoor", "ContainerRegistry")
+
+    def __init__(self, stackName: str, projectName: str, regions: List[str]):
+        """
+        Creates a new MultiRegionBuilder instance.
+        :param stackName: The name of the stack.
+        :type stackName: str
+        :param projectName: The name of the project.
+        :type projectName: str
+        :param regions: The Azure regions, the one hosting global resources
+        first. Display names are accepted.
+        :type regions: List[str]
+        """
+        self._stack_name = stackName
+        self._project_name = projectName
+        self._regions = []
+        for location in regions:
+            region = AzureRegions.region(location)
+            if region is None:
+                raise ValueError(f"Unknown Azure region: {location}")
+            if region.name not in self._regions:
+                self._regions.append(region.name)
+        if not self._regions:
+            raise ValueError("At least one Azure region is required")
+
+    @property
+    def stack_name(self) -> str:
+        """
+        Retrieves the name of the stack.
+        :return: Such name.
+        :rtype: str
+        """
+        return self._stack_name
+
+    @property
+    def project_name(self) -> str:
+        """
+        Retrieves the name of the project.
+        :return: Such name.
+        :rtype: str
+        """
+        return self._project_name
+
+    @property
+    def regions(self) -> List[str]:
+        """
+        Retrieves the regions, without duplicates.
+        :return: Such regions.
+        :rtype: List[str]
+        """
+        return list(self._regions)
+
+    @property
+    def primary_region(self) -> str:
+        """
+        Retrieves the region hosting global resources.
+        :return: Such region.
+        :rtype: str
+        """
+        return self._regions[0]
+
+    @classmethod
+    def is_global(cls, entry: Dict[str, Any]) -> bool:
+        """
+        Checks whether a template entry declares a global resource.
+        :param entry: The entry.
+        :type entry: Dict[str, Any]
+        :return: True in such case.
+        :rtype: bool
+        """
+        flag = entry.get("global")
+        if flag is not None:
+            return bool(flag)
+        return entry.get("type", "").rpartition(":")[2] in cls._global_types
+
+    @classmethod
+    def _for_region(
+        cls, entries: List[Dict[str, Any]], region: str, excluded: Set[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Selects the entries of a region.
+        :param entries: The template entries.
+        :type entries: List[Dict[str, Any]]
+        :param region: The region.
+        :type region: str
+        :param excluded: The ids of the entries to leave out.
+        :type excluded: Set[str]
+        :return: The entries.
+        :rtype: List[Dict[str, Any]]
+        """
+        result = []
+        for entry in entries:
+            if entry.get("id") in excluded:
+                continue
+            regions = entry.get("regions")
+            if regions is not None and all(
+                getattr(AzureRegions.region(name), "name", None) != region
+                for name in regions
+            ):
+                continue
+            result.append(entry)
+        return result
+
+    def _build_region(
+        self,
+        entries: List[Dict[str, Any]],
+        region: str,
+        shared: Dict[str, AzureResource],
+    ) -> Dict[str, AzureResource]:
+        """
+        Builds the resources of a region.
+        :param entries: The entries of the region.
+        :type entries: List[Dict[str, Any]]
+        :param region: The region.
+        :type region: str
+        :param shared: The global resources, by id.
+        :type shared: Dict[str, pythoneda.shared.iac.pulumi.azure.AzureResource]
+        :return: The instances, by id, in dependency order.
+        :rtype: Dict[str, pythoneda.shared.iac.pulumi.azure.AzureResource]
+        """
+        return StackSpecLoader(self.stack_name, self.project_name, region).instantiate(
+            entries, shared
+        )
+
+    def build(
+        self, entries: Iterable[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, AzureResource]]:
+        """
+        Builds the resources of every region.
+        :param entries: The template entries.
+        :type entries: Iterable[Dict[str, Any]]
+        :return: The instances of each region, by id, global ones included,
+        by region.
+        :rtype: Dict[str, Dict[str, pythoneda.shared.iac.pulumi.azure.AzureResource]]
+        """
+        entries = list(entries)
+        global_ids = {entry.get("id") for entry in entries if self.is_global(entry)}
+        primary = self._build_region(
+            self._for_region(entries, self.primary_region, set()),
+            self.primary_region,
+            {},
+        )
+        shared = {id: primary[id] for id in primary if id in global_ids}
+        result = {self.primary_region: primary}
+        for region in self._regions[1:]:
+            result[region] = self._build_region(
+                self._for_region(entries, region, global_ids), region, shared
+            )
+        return result
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
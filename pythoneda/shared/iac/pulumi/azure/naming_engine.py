@@ -0,0 +1,598 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/naming_engine.py
+
+This script defines the NamingEngine class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import hashlib
+import re
+import threading
+import uuid
+from typing import Dict, Iterable, List, NamedTuple, Pattern, Set, Tuple
+
+
+class NamingRule(NamedTuple):
+    """
+    The constraints Azure imposes on the names of a type of resource.
+    """
+
+    min_length: int
+    max_length: int
+    pattern: Pattern
+    invalid_characters: Pattern
+    lowercase: bool
+    hyphens: bool
+    globally_unique: bool
+    guid: bool
+    description: str
+
+
+def _rule(
+    minLength: int,
+    maxLength: int,
+    pattern: str,
+    invalidCharacters: str,
+    lowercase: bool,
+    hyphens: bool,
+    globallyUnique: bool,
+    description: str,
+    guid: bool = False,
+) -> NamingRule:
+    """
+    Builds a naming rule, compiling its patterns.
+    :param minLength: The minimum length.
+    :type minLength: int
+    :param maxLength: The maximum length.
+    :type maxLength: int
+    :param pattern: The regular expression valid names match.
+    :type pattern: str
+    :param invalidCharacters: The regular expression matching each invalid
+    character.
+    :type invalidCharacters: str
+    :param lowercase: Whether names must be lowercase.
+    :type lowercase: bool
+    :param hyphens: Whether names can contain hyphens.
+    :type hyphens: bool
+    :param globallyUnique: Whether names must be unique across Azure.
+    :type globallyUnique: bool
+    :param description: The description of the allowed characters.
+    :type description: str
+    :param guid: Whether names are GUIDs.
+    :type guid: bool
+    :return: The rule.
+    :rtype: pythoneda.shared.iac.pulumi.azure.NamingRule
+    """
+    return NamingRule(
+        minLength,
+        maxLength,
+        re.compile(pattern),
+        re.compile(invalidCharacters),
+        lowercase,
+        hyphens,
+        globallyUnique,
+        guid,
+        description,
+    )
+
+
+_GUID_RULE = _rule(
+    36,
+    36,
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}",
+    r"[^0-9a-f-]",
+    True,
+    True,
+    False,
+    "a lowercase GUID",
+    True,
+)
+
+_ALPHANUMERIC_HYPHEN = r"[a-zA-Z0-9](?:[a-zA-Z0-9-]*[a-zA-Z0-9])?"
+
+
+class NamingEngine:
+    """
+    Builds and validates Azure resource names.
+
+    The rules of each type of resource are compiled once, when the module is
+    loaded. Generated names are memoized by (type, prefix, stack, project,
+    location), and validating a name is a couple of regular expression
+    matches, so thousands of names can be checked in one call, before any of
+    them reaches Azure. Names found valid are remembered, so resources
+    sharing a name are checked once.
+
+    Class name: NamingEngine
+
+    Responsibilities:
+        - Know the length, character, hyphen and uniqueness rules of Azure
+          resource names.
+        - Build valid names out of stack, project and location.
+        - Validate names, one by one or in batches.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.AzureResource
+    """
+
+    _rules: Dict[str, NamingRule] = {
+        "Microsoft.Resources/resourceGroups": _rule(
+            1,
+            90,
+            r"[\w().-]*[\w()-]",
+            r"[^\w().-]",
+            False,
+            True,
+            False,
+            "alphanumerics, underscores, parentheses, hyphens and periods, "
+            "not ending in a period",
+        ),
+        "Microsoft.Storage/storageAccounts": _rule(
+            3,
+            24,
+            r"[a-z0-9]+",
+            r"[^a-z0-9]",
+            True,
+            False,
+            True,
+            "lowercase letters and numbers",
+        ),
+        "Microsoft.Storage/storageAccounts/blobServices/containers": _rule(
+            3,
+            63,
+            r"[a-z0-9](?!.*--)[a-z0-9-]*[a-z0-9]",
+            r"[^a-z0-9-]",
+            True,
+            True,
+            False,
+            "lowercase letters, numbers and single hyphens, starting and "
+            "ending with a letter or number",
+        ),
+        "Microsoft.Storage/storageAccounts/tableServices/tables": _rule(
+            3,
+            63,
+            r"[a-zA-Z][a-zA-Z0-9]*",
+            r"[^a-zA-Z0-9]",
+            False,
+            False,
+            False,
+            "alphanumerics, starting with a letter",
+        ),
+        "Microsoft.ContainerRegistry/registries": _rule(
+            5,
+            50,
+            r"[a-z0-9]+",
+            r"[^a-z0-9]",
+            True,
+            False,
+            True,
+            "lowercase letters and numbers",
+        ),
+        "Microsoft.Web/sites": _rule(
+            2,
+            60,
+            _ALPHANUMERIC_HYPHEN,
+            r"[^a-zA-Z0-9-]",
+            False,
+            True,
+            True,
+            "alphanumerics and hyphens, not starting or ending with a hyphen",
+        ),
+        "Microsoft.Web/sites/slots": _rule(
+            2,
+            59,
+            _ALPHANUMERIC_HYPHEN,
+            r"[^a-zA-Z0-9-]",
+            False,
+            True,
+            False,
+            "alphanumerics and hyphens, not starting or ending with a hyphen",
+        ),
+        "Microsoft.Web/sites/hostNameBindings": _rule(
+            1,
+            253,
+            r"[a-zA-Z0-9.-]+",
+            r"[^a-zA-Z0-9.-]",
+            False,
+            True,
+            False,
+            "alphanumerics, hyphens and periods",
+        ),
+        "Microsoft.Web/serverfarms": _rule(
+            1,
+            60,
+            r"[a-zA-Z0-9-]+",
+            r"[^a-zA-Z0-9-]",
+            False,
+            True,
+            False,
+            "alphanumerics and hyphens",
+        ),
+        "Microsoft.Insights/components": _rule(
+            1,
+            260,
+            r"[^%&\\?/]+",
+            r"[%&\\?/]",
+            False,
+            True,
+            False,
+            "any character except %&\\?/",
+        ),
+        "Microsoft.DocumentDB/databaseAccounts": _rule(
+            3,
+            44,
+            r"[a-z0-9](?:[a-z0-9-]*[a-z0-9])?",
+            r"[^a-z0-9-]",
+            True,
+            True,
+            True,
+            "lowercase letters, numbers and hyphens, not starting or ending "
+            "with a hyphen",
+        ),
+        "Microsoft.DocumentDB/databaseAccounts/sqlDatabases": _rule(
+            1,
+            255,
+            r"[^/\\#?]*[^/\\#? ]",
+            r"[/\\#?]",
+            False,
+            True,
+            False,
+            "any character except /\\#?, not ending in a space",
+        ),
+        "Microsoft.DocumentDB/databaseAccounts/sqlContainers": _rule(
+            1,
+            255,
+            r"[^/\\#?]*[^/\\#? ]",
+            r"[/\\#?]",
+            False,
+            True,
+            False,
+            "any character except /\\#?, not ending in a space",
+        ),
+        "Microsoft.ApiManagement/service": _rule(
+            1,
+            50,
+            r"[a-zA-Z](?:[a-zA-Z0-9-]*[a-zA-Z0-9])?",
+            r"[^a-zA-Z0-9-]",
+            False,
+            True,
+            True,
+            "alphanumerics and hyphens, starting with a letter and ending with "
+            "a letter or number",
+        ),
+        "Microsoft.ApiManagement/service/apis": _rule(
+            1,
+            80,
+            _ALPHANUMERIC_HYPHEN,
+            r"[^a-zA-Z0-9-]",
+            False,
+            True,
+            False,
+            "alphanumerics and hyphens, not starting or ending with a hyphen",
+        ),
+        "Microsoft.Network/dnsZones": _rule(
+            1,
+            253,
+            r"[a-zA-Z0-9_](?:[a-zA-Z0-9_.-]*[a-zA-Z0-9])?",
+            r"[^a-zA-Z0-9_.-]",
+            False,
+            True,
+            False,
+            "alphanumerics, underscores, hyphens and periods",
+        ),
+        "Microsoft.Network/dnszones/A": _rule(
+            1,
+            253,
+            r"[a-zA-Z0-9_@*.-]+",
+            r"[^a-zA-Z0-9_@*.-]",
+            False,
+            True,
+            False,
+            "alphanumerics, underscores, hyphens, periods, @ and *",
+        ),
+        "Microsoft.Network/dnszones/recordsets": _rule(
+            1,
+            253,
+            r"[a-zA-Z0-9_@*.-]+",
+            r"[^a-zA-Z0-9_@*.-]",
+            False,
+            True,
+            False,
+            "alphanumerics, underscores, hyphens, periods, @ and *",
+        ),
+        "Microsoft.Network/frontDoors": _rule(
+            5,
+            64,
+            _ALPHANUMERIC_HYPHEN,
+            r"[^a-zA-Z0-9-]",
+            False,
+            True,
+            True,
+            "alphanumerics and hyphens, not starting or ending with a hyphen",
+        ),
+        "Microsoft.Cdn/profiles/endpoints": _rule(
+            1,
+            50,
+            _ALPHANUMERIC_HYPHEN,
+            r"[^a-zA-Z0-9-]",
+            False,
+            True,
+            True,
+            "alphanumerics and hyphens, not starting or ending with a hyphen",
+        ),
+        "Microsoft.Network/networkSecurityGroups": _rule(
+            1,
+            80,
+            r"[a-zA-Z0-9](?:[\w.-]*\w)?",
+            r"[^\w.-]",
+            False,
+            True,
+            False,
+            "alphanumerics, underscores, periods and hyphens, starting with an "
+            "alphanumeric and ending with an alphanumeric or underscore",
+        ),
+        "Microsoft.Network/publicIPAddresses": _rule(
+            1,
+            80,
+            r"[a-zA-Z0-9](?:[\w.-]*\w)?",
+            r"[^\w.-]",
+            False,
+            True,
+            False,
+            "alphanumerics, underscores, periods and hyphens, starting with an "
+            "alphanumeric and ending with an alphanumeric or underscore",
+        ),
+        "Microsoft.Authorization/roleAssignments": _GUID_RULE,
+        "Microsoft.Authorization/roleDefinitions": _GUID_RULE,
+    }
+
+    _default_rule = _rule(
+        1,
+        80,
+        r"[a-zA-Z0-9](?:[\w.-]*\w)?",
+        r"[^\w.-]",
+        False,
+        True,
+        False,
+        "alphanumerics, underscores, periods and hyphens",
+    )
+
+    _suffix_length = 6
+    _hyphens = re.compile(r"-{2,}")
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        """
+        Creates a new NamingEngine instance.
+        """
+        self._names: Dict[Tuple[str, str, str, str, str], str] = {}
+        self._valid: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "NamingEngine":
+        """
+        Retrieves the shared engine.
+        :return: Such engine.
+        :rtype: pythoneda.shared.iac.pulumi.azure.NamingEngine
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def rule(cls, resourceType: str) -> NamingRule:
+        """
+        Retrieves the naming rule of a type of resource.
+        :param resourceType: The Azure type, e.g. "Microsoft.Web/sites".
+        :type resourceType: str
+        :return: The rule, or a permissive default for unknown types.
+        :rtype: pythoneda.shared.iac.pulumi.azure.NamingRule
+        """
+        return cls._rules.get(resourceType, cls._default_rule)
+
+    @classmethod
+    def _sanitize(cls, rule: NamingRule, text: str) -> str:
+        """
+        Adapts a name segment to a rule.
+        :param rule: The rule.
+        :type rule: pythoneda.shared.iac.pulumi.azure.NamingRule
+        :param text: The segment.
+        :type text: str
+        :return: The segment, without invalid characters, nor leading,
+        trailing or repeated hyphens.
+        :rtype: str
+        """
+        if rule.lowercase:
+            text = text.lower()
+        text = rule.invalid_characters.sub("", text)
+        if rule.hyphens:
+            text = cls._hyphens.sub("-", text).strip("-")
+        return text
+
+    @classmethod
+    def _fit(cls, rule: NamingRule, name: str, seed: str) -> str:
+        """
+        Fits a name within the length limits of a rule. Names too long are cut
+        and end in a hash of the full name, so cutting does not make distinct
+        names collide; names too short are padded with such hash.
+        :param rule: The rule.
+        :type rule: pythoneda.shared.iac.pulumi.azure.NamingRule
+        :param name: The name.
+        :type name: str
+        :param seed: The text the hash is computed from.
+        :type seed: str
+        :return: The name.
+        :rtype: str
+        """
+        if rule.min_length <= len(name) <= rule.max_length:
+            return name
+        digest = hashlib.sha1(seed.encode("utf-8")).hexdigest()
+        if len(name) < rule.min_length:
+            return name + digest[: rule.min_length - len(name)]
+        separator = "-" if rule.hyphens else ""
+        suffix = separator + digest[: cls._suffix_length]
+        head = name[: rule.max_length - len(suffix)].rstrip("-.")
+        return head + suffix
+
+    def name(
+        self,
+        resourceType: str,
+        prefix: str,
+        stackName: str,
+        projectName: str,
+        location: str,
+    ) -> str:
+        """
+        Builds the name of a resource, valid for its type.
+        :param resourceType: The Azure type, e.g. "Microsoft.Web/sites".
+        :type resourceType: str
+        :param prefix: The prefix of the type, e.g. "wa".
+        :type prefix: str
+        :param stackName: The name of the stack.
+        :type stackName: str
+        :param projectName: The name of the project.
+        :type projectName: str
+        :param location: The location, usually abbreviated.
+        :type location: str
+        :return: The name.
+        :rtype: str
+        """
+        key = (resourceType, prefix, stackName, projectName, location)
+        result = self._names.get(key)
+        if result is not None:
+            return result
+        rule = self.rule(resourceType)
+        seed = "/".join(key)
+        if rule.guid:
+            result = str(uuid.uuid5(uuid.NAMESPACE_URL, seed))
+        else:
+            separator = "-" if rule.hyphens else ""
+            result = self._fit(
+                rule,
+                separator.join(
+                    segment
+                    for segment in (
+                        self._sanitize(rule, text)
+                        for text in (prefix, projectName, stackName, location)
+                        if text
+                    )
+                    if segment
+                ),
+                seed,
+            )
+        problems = self.problems(resourceType, result)
+        if problems:
+            raise ValueError(
+                f"Cannot build a valid {resourceType} name out of {seed}: "
+                + "; ".join(problems)
+            )
+        with self._lock:
+            self._names.setdefault(key, result)
+        return result
+
+    def problems(self, resourceType: str, name: str) -> List[str]:
+        """
+        Describes why a name is not valid for a type of resource.
+        :param resourceType: The Azure type.
+        :type resourceType: str
+        :param name: The name.
+        :type name: str
+        :return: The problems found, if any.
+        :rtype: List[str]
+        """
+        rule = self.rule(resourceType)
+        result = []
+        if not (rule.min_length <= len(name) <= rule.max_length):
+            result.append(
+                f"{resourceType} name {name!r} must be {rule.min_length}-"
+                f"{rule.max_length} characters long"
+            )
+        if rule.pattern.fullmatch(name) is None:
+            result.append(
+                f"{resourceType} name {name!r} must be made of {rule.description}"
+                if not rule.guid
+                else f"{resourceType} name {name!r} must be {rule.description}"
+            )
+        return result
+
+    def validate(self, resourceType: str, name: str):
+        """
+        Checks a name is valid for a type of resource.
+        :param resourceType: The Azure type.
+        :type resourceType: str
+        :param name: The name.
+        :type name: str
+        :raise ValueError: If the name is not valid.
+        """
+        key = (resourceType, name)
+        if key in self._valid:
+            return
+        problems = self.problems(resourceType, name)
+        if problems:
+            raise ValueError("; ".join(problems))
+        with self._lock:
+            self._valid.add(key)
+
+    def validate_all(self, names: Iterable[Tuple[str, str]]) -> List[str]:
+        """
+        Checks many names at once. Names of globally unique types must also be
+        unique within the batch.
+        :param names: Pairs of (Azure type, name).
+        :type names: Iterable[Tuple[str, str]]
+        :return: The problems found, if any.
+        :rtype: List[str]
+        """
+        result = []
+        seen: Dict[Tuple[str, str], int] = {}
+        for resource_type, name in names:
+            rule = self.rule(resource_type)
+            if (
+                rule.min_length <= len(name) <= rule.max_length
+                and rule.pattern.fullmatch(name) is not None
+            ):
+                problems = []
+            else:
+                problems = self.problems(resource_type, name)
+            result.extend(problems)
+            if rule.globally_unique:
+                key = (resource_type, name.lower())
+                seen[key] = seen.get(key, 0) + 1
+                if seen[key] == 2:
+                    result.append(
+                        f"{resource_type} name {name!r} must be globally "
+                        "unique, but is used more than once"
+                    )
+        return result
+
+    def check_all(self, names: Iterable[Tuple[str, str]]):
+        """
+        Checks many names at once.
+        :param names: Pairs of (Azure type, name).
+        :type names: Iterable[Tuple[str, str]]
+        :raise ValueError: If any name is not valid.
+        """
+        problems = self.validate_all(names)
+        if problems:
+            raise ValueError(
+                f"{len(problems)} invalid resource names: " + "; ".join(problems)
+            )
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
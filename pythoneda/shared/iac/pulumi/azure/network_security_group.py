@@ -24,6 +24,9 @@ from .outputs import Outputs
 import pulumi
 import pulumi_azure_native
 from .resource_group import ResourceGroup
+from .security_rule import SecurityRule
+from .security_rule_set import SecurityRuleSet
+from typing import List
 
 
 class NetworkSecurityGroup(AzureResource):
@@ -53,6 +56,7 @@ class NetworkSecurityGroup(AzureResource):
         sourceAddressPrefix: str,
         destinationAddressPrefix: str,
         resourceGroup: ResourceGroup,
+        securityRules: List[SecurityRule] = None,
     ):
         """
         Creates a new SecurityGroup instance.
@@ -80,7 +84,37 @@ class NetworkSecurityGroup(AzureResource):
         :type destinationAddressPrefix: str
         :param resourceGroup: The ResourceGroup.
         :type resourceGroup: pythoneda.iac.pulumi.azure.ResourceGroup
+        :param securityRules: The rules, instead of the one described by the
+        previous parameters, which must then be None. They get validated right
+        away.
+        :type securityRules: List[pythoneda.shared.iac.pulumi.azure.SecurityRule]
+        :raise ValueError: If both kinds of rules are given, or the rules are
+        not valid.
         """
+        self._security_rules = None
+        if securityRules is not None:
+            legacy = [
+                parameter
+                for parameter, value in (
+                    ("priority", priority),
+                    ("direction", direction),
+                    ("access", access),
+                    ("protocol", protocol),
+                    ("sourcePortRange", sourcePortRange),
+                    ("destinationPortRange", destinationPortRange),
+                    ("sourceAddressPrefix", sourceAddressPrefix),
+                    ("destinationAddressPrefix", destinationAddressPrefix),
+                )
+                if value is not None
+            ]
+            if legacy:
+                raise ValueError(
+                    "Network security groups take either securityRules or a "
+                    f"single rule, not both: {', '.join(legacy)} given along "
+                    "with securityRules"
+                )
+            self._security_rules = SecurityRuleSet(securityRules)
+            self._security_rules.validate()
         self._priority = priority
         self._direction = direction
         self._access = access
@@ -174,9 +208,18 @@ class NetworkSecurityGroup(AzureResource):
         return (
             self._destination_address_prefix
             if self._destination_address_prefix is not None
-            else ""
+            else "*"
         )
 
+    @property
+    def security_rules(self) -> SecurityRuleSet:
+        """
+        Retrieves the security rules, if given explicitly.
+        :return: Such rules, or None.
+        :rtype: pythoneda.shared.iac.pulumi.azure.SecurityRuleSet
+        """
+        return self._security_rules
+
     @classmethod
     @property
     def type(cls) -> str:
@@ -203,6 +246,26 @@ class NetworkSecurityGroup(AzureResource):
         """
         return "nsg"
 
+    def create_security_rule(self, name: str) -> SecurityRule:
+        """
+        Creates the security rule described by this instance's properties.
+        :param name: The name of the rule.
+        :type name: str
+        :return: The security rule.
+        :rtype: pythoneda.shared.iac.pulumi.azure.SecurityRule
+        """
+        return SecurityRule(
+            name,
+            self.priority,
+            self.direction,
+            self.access,
+            self.protocol,
+            self.source_port_range,
+            self.destination_port_range,
+            self.source_address_prefix,
+            self.destination_address_prefix,
+        )
+
     def create_security_rule_args(
         self, name: str
     ) -> pulumi_azure_native.network.SecurityRuleArgs:
@@ -213,17 +276,7 @@ class NetworkSecurityGroup(AzureResource):
         :return: The security rule args.
         :rtype: pulumi_azure_native.network.SecurityRuleArgs
         """
-        return pulumi_azure_native.network.SecurityRuleArgs(
-            name=name,
-            priority=self.priority,
-            direction=self.direction,
-            access=self.access,
-            protocol=self.protocol,
-            source_port_range=self.source_port_range,
-            destination_port_range=self.destination_port_range,
-            source_address_prefix=self.source_address_prefix,
-            destination_address_prefix=self.destination_address_prefix,
-        )
+        return self.create_security_rule(name).to_args()
 
     # @override
     def _create(self, name: str) -> pulumi_azure_native.network.NetworkSecurityGroup:
@@ -234,10 +287,13 @@ class NetworkSecurityGroup(AzureResource):
         :return: The resource.
         :rtype: pulumi_azure_native.network.NetworkSecurityGroup
         """
+        rules = self.security_rules
+        if rules is None:
+            rules = SecurityRuleSet([self.create_security_rule(name)])
         return pulumi_azure_native.network.NetworkSecurityGroup(
             name,
             resource_group_name=self.resource_group.name,
-            security_rules=self.create_security_rule_args(name),
+            security_rules=rules.to_args(),
         )
 
     # @override
@@ -44,10 +44,15 @@ class Outputs(Enum):
     API_DOMAIN = "api_domain"
     APP_SERVICE_PLAN = "app_service_plan"
     APP_SERVICE_PLAN_ID = "app_service_plan_id"
+    APP_SERVICE_PLAN_AUTOSCALE = "app_service_plan_autoscale"
+    APP_SERVICE_PLAN_AUTOSCALE_ID = "app_service_plan_autoscale_id"
     BLOB = "blob"
     BLOB_ID = "blob_id"
     BLOB_CONTAINER = "blob_container"
     BLOB_CONTAINER_ID = "blob_container_id"
+    BLOB_DIRECTORY = "blob_directory"
+    BLOB_MANAGEMENT_POLICY = "blob_management_policy"
+    BLOB_MANAGEMENT_POLICY_ID = "blob_management_policy_id"
     CONTAINER_REGISTRY = "container_registry"
     CONTAINER_REGISTRY_ID = "container_registry_id"
     CONTAINER_REGISTRY_USERNAME = "container_registry_username"
@@ -66,6 +71,7 @@ class Outputs(Enum):
     DATABASES_STORAGE_ACCOUNT_ID = "databases_storage_account_id"
     DNS_RECORD = "dns_record"
     DNS_RECORD_ID = "dns_record_id"
+    DNS_RECORD_SETS = "dns_record_sets"
     DNS_ZONE = "dns_zone"
     DNS_ZONE_ID = "dns_zone_id"
     DOCKER_PULL_ROLE_ASSIGNMENT = "docker_pull_role_assignment"
@@ -0,0 +1,440 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/package_builder.py
+
+This script defines the PackageBuilder class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .content_hash_cache import ContentHashCache
+import json
+import os
+import stat
+import struct
+import zipfile
+import zlib
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class _Entry(NamedTuple):
+    """
+    An entry of the central directory.
+    """
+
+    name: bytes
+    crc: int
+    compressed_size: int
+    size: int
+    method: int
+    external_attributes: int
+    offset: int
+
+
+class PackageBuilder:
+    """
+    Zips a directory deterministically and incrementally.
+
+    Entries are sorted by path, and carry a fixed timestamp (1980-01-01) and
+    only the executable bit of their permissions, so the same inputs always
+    produce the same archive. A manifest of per-file digests is kept next to
+    the archive: when no input changed, the archive is left as is; otherwise,
+    the compressed data of unchanged entries is copied from the previous
+    archive, and only changed files are compressed again.
+
+    Class name: PackageBuilder
+
+    Responsibilities:
+        - Build reproducible zip packages.
+        - Avoid rebuilding or recompressing what did not change.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.ContentHashCache
+        - pythoneda.shared.iac.pulumi.azure.WebAppDeploymentSlot
+    """
+
+    _local_header = struct.Struct("<4s5H3L2H")
+    _central_header = struct.Struct("<4s6H3L5H2L")
+    _end_of_central_directory = struct.Struct("<4s4H2LH")
+    _dos_date = (0 << 9) | (1 << 5) | 1
+    _dos_time = 0
+    _utf8_flag = 0x800
+    _version = 20
+    _zip32_limit = 0xFFFFFFFF
+    _chunk_size = 1024 * 1024
+
+    def __init__(
+        self,
+        sourceDirectory: str,
+        archivePath: str,
+        compressLevel: int,
+        contentHashCache: ContentHashCache,
+    ):
+        """
+        Creates a new PackageBuilder instance.
+        :param sourceDirectory: The directory to zip.
+        :type sourceDirectory: str
+        :param archivePath: The path of the archive.
+        :type archivePath: str
+        :param compressLevel: The zlib compression level. Defaults to 6.
+        :type compressLevel: int
+        :param contentHashCache: The cache of file digests, if any.
+        :type contentHashCache: pythoneda.shared.iac.pulumi.azure.ContentHashCache
+        """
+        self._source_directory = sourceDirectory
+        self._archive_path = archivePath
+        self._compress_level = compressLevel
+        self._content_hash_cache = contentHashCache
+        self._reused = 0
+        self._compressed = 0
+
+    @property
+    def source_directory(self) -> str:
+        """
+        Retrieves the directory to zip.
+        :return: Such directory.
+        :rtype: str
+        """
+        return self._source_directory
+
+    @property
+    def archive_path(self) -> str:
+        """
+        Retrieves the path of the archive.
+        :return: Such path.
+        :rtype: str
+        """
+        return self._archive_path
+
+    @property
+    def manifest_path(self) -> str:
+        """
+        Retrieves the path of the manifest.
+        :return: Such path.
+        :rtype: str
+        """
+        return f"{self.archive_path}.manifest.json"
+
+    @property
+    def compress_level(self) -> int:
+        """
+        Retrieves the zlib compression level.
+        :return: Such level.
+        :rtype: int
+        """
+        return self._compress_level if self._compress_level is not None else 6
+
+    @property
+    def content_hash_cache(self) -> ContentHashCache:
+        """
+        Retrieves the cache of file digests.
+        :return: Such cache, or None.
+        :rtype: pythoneda.shared.iac.pulumi.azure.ContentHashCache
+        """
+        return self._content_hash_cache
+
+    @property
+    def reused(self) -> int:
+        """
+        Retrieves the number of entries copied from the previous archive in
+        the last build.
+        :return: Such number.
+        :rtype: int
+        """
+        return self._reused
+
+    @property
+    def compressed(self) -> int:
+        """
+        Retrieves the number of entries compressed in the last build.
+        :return: Such number.
+        :rtype: int
+        """
+        return self._compressed
+
+    def _files(self) -> Iterator[Tuple[str, str]]:
+        """
+        Walks the source directory, in sorted order.
+        :return: The path of each file and its name in the archive.
+        :rtype: Iterator[Tuple[str, str]]
+        """
+        for directory, subdirectories, files in os.walk(self.source_directory):
+            subdirectories.sort()
+            relative = os.path.relpath(directory, self.source_directory)
+            prefix = "" if relative == "." else relative.replace(os.sep, "/") + "/"
+            for file in sorted(files):
+                yield os.path.join(directory, file), f"{prefix}{file}"
+
+    def _digest(self, path: str) -> str:
+        """
+        Computes the digest of a file, through the cache if any.
+        :param path: The path of the file.
+        :type path: str
+        :return: The digest.
+        :rtype: str
+        """
+        if self.content_hash_cache is not None:
+            return self.content_hash_cache.digest(path)
+        return ContentHashCache.compute(path)
+
+    def _load_manifest(self) -> Dict:
+        """
+        Loads the manifest of the previous build.
+        :return: The compression level and the digests, by entry name.
+        :rtype: Dict
+        """
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as manifest:
+                return json.load(manifest)
+        except (FileNotFoundError, ValueError):
+            return {"level": None, "files": {}}
+
+    @classmethod
+    def _external_attributes(cls, path: str) -> int:
+        """
+        Builds the external attributes of an entry: a regular file, executable
+        or not.
+        :param path: The path of the file.
+        :type path: str
+        :return: The attributes.
+        :rtype: int
+        """
+        executable = os.stat(path).st_mode & stat.S_IXUSR
+        return (stat.S_IFREG | (0o755 if executable else 0o644)) << 16
+
+    def _write_local_header(self, output: BinaryIO, entry: _Entry):
+        """
+        Writes the local header of an entry.
+        :param output: The archive being written.
+        :type output: BinaryIO
+        :param entry: The entry.
+        :type entry: _Entry
+        """
+        output.write(
+            self._local_header.pack(
+                b"PK\x03\x04",
+                self._version,
+                self._utf8_flag,
+                entry.method,
+                self._dos_time,
+                self._dos_date,
+                entry.crc,
+                entry.compressed_size,
+                entry.size,
+                len(entry.name),
+                0,
+            )
+        )
+        output.write(entry.name)
+
+    def _compress(
+        self, output: BinaryIO, path: str, name: bytes, attributes: int
+    ) -> _Entry:
+        """
+        Compresses a file into the archive.
+        :param output: The archive being written.
+        :type output: BinaryIO
+        :param path: The path of the file.
+        :type path: str
+        :param name: The entry name.
+        :type name: bytes
+        :param attributes: The external attributes.
+        :type attributes: int
+        :return: The entry.
+        :rtype: _Entry
+        """
+        offset = output.tell()
+        entry = _Entry(name, 0, 0, 0, zipfile.ZIP_DEFLATED, attributes, offset)
+        self._write_local_header(output, entry)
+        compressor = zlib.compressobj(self.compress_level, zlib.DEFLATED, -15)
+        crc = 0
+        size = 0
+        compressed_size = 0
+        with open(path, "rb") as source:
+            for chunk in iter(lambda: source.read(self._chunk_size), b""):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                data = compressor.compress(chunk)
+                compressed_size += len(data)
+                output.write(data)
+        data = compressor.flush()
+        compressed_size += len(data)
+        output.write(data)
+        if max(size, compressed_size, offset) > self._zip32_limit:
+            raise ValueError(f"{path} is too large for a package without ZIP64")
+        entry = entry._replace(crc=crc, compressed_size=compressed_size, size=size)
+        end = output.tell()
+        output.seek(offset)
+        self._write_local_header(output, entry)
+        output.seek(end)
+        return entry
+
+    def _copy(
+        self,
+        output: BinaryIO,
+        previous: BinaryIO,
+        info: zipfile.ZipInfo,
+        name: bytes,
+        attributes: int,
+    ) -> _Entry:
+        """
+        Copies the compressed data of an entry of the previous archive.
+        :param output: The archive being written.
+        :type output: BinaryIO
+        :param previous: The previous archive.
+        :type previous: BinaryIO
+        :param info: The entry in the previous archive.
+        :type info: zipfile.ZipInfo
+        :param name: The entry name.
+        :type name: bytes
+        :param attributes: The external attributes.
+        :type attributes: int
+        :return: The entry.
+        :rtype: _Entry
+        """
+        previous.seek(info.header_offset)
+        header = self._local_header.unpack(previous.read(self._local_header.size))
+        previous.seek(header[9] + header[10], os.SEEK_CUR)
+        entry = _Entry(
+            name,
+            info.CRC,
+            info.compress_size,
+            info.file_size,
+            info.compress_type,
+            attributes,
+            output.tell(),
+        )
+        if entry.offset > self._zip32_limit:
+            raise ValueError(f"{self.archive_path} is too large without ZIP64")
+        self._write_local_header(output, entry)
+        remaining = info.compress_size
+        while remaining:
+            chunk = previous.read(min(remaining, self._chunk_size))
+            if not chunk:
+                raise ValueError(f"Truncated entry {info.filename} in previous archive")
+            output.write(chunk)
+            remaining -= len(chunk)
+        return entry
+
+    def _write_central_directory(self, output: BinaryIO, entries: List[_Entry]):
+        """
+        Writes the central directory and its end record.
+        :param output: The archive being written.
+        :type output: BinaryIO
+        :param entries: The entries.
+        :type entries: List[_Entry]
+        """
+        start = output.tell()
+        for entry in entries:
+            output.write(
+                self._central_header.pack(
+                    b"PK\x01\x02",
+                    (3 << 8) | self._version,
+                    self._version,
+                    self._utf8_flag,
+                    entry.method,
+                    self._dos_time,
+                    self._dos_date,
+                    entry.crc,
+                    entry.compressed_size,
+                    entry.size,
+                    len(entry.name),
+                    0,
+                    0,
+                    0,
+                    0,
+                    entry.external_attributes,
+                    entry.offset,
+                )
+            )
+            output.write(entry.name)
+        size = output.tell() - start
+        if len(entries) > 0xFFFF or start + size > self._zip32_limit:
+            raise ValueError(f"{self.archive_path} is too large without ZIP64")
+        output.write(
+            self._end_of_central_directory.pack(
+                b"PK\x05\x06", 0, 0, len(entries), len(entries), size, start, 0
+            )
+        )
+
+    def build(self) -> bool:
+        """
+        Builds the archive, unless no input changed since the last build.
+        :return: True if the archive was written.
+        :rtype: bool
+        """
+        manifest = self._load_manifest()
+        files = [(path, name, self._digest(path)) for path, name in self._files()]
+        digests = {name: digest for _, name, digest in files}
+        self._reused = 0
+        self._compressed = 0
+        if (
+            os.path.exists(self.archive_path)
+            and manifest["level"] == self.compress_level
+            and manifest["files"] == digests
+        ):
+            return False
+        reusable = manifest["level"] == self.compress_level and os.path.exists(
+            self.archive_path
+        )
+        previous: Optional[BinaryIO] = None
+        previous_entries: Dict[str, zipfile.ZipInfo] = {}
+        temporary = f"{self.archive_path}.tmp"
+        try:
+            if reusable:
+                previous = open(self.archive_path, "rb")
+                with zipfile.ZipFile(previous) as archive:
+                    previous_entries = {info.filename: info for info in archive.infolist()}
+            entries = []
+            with open(temporary, "wb") as output:
+                for path, name, digest in files:
+                    encoded = name.encode("utf-8")
+                    attributes = self._external_attributes(path)
+                    info = None
+                    if previous is not None and manifest["files"].get(name) == digest:
+                        info = previous_entries.get(name)
+                    if info is not None:
+                        entries.append(
+                            self._copy(output, previous, info, encoded, attributes)
+                        )
+                        self._reused += 1
+                    else:
+                        entries.append(
+                            self._compress(output, path, encoded, attributes)
+                        )
+                        self._compressed += 1
+                self._write_central_directory(output, entries)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        finally:
+            if previous is not None:
+                previous.close()
+        os.replace(temporary, self.archive_path)
+        with open(f"{self.manifest_path}.tmp", "w", encoding="utf-8") as output:
+            json.dump(
+                {"level": self.compress_level, "files": digests},
+                output,
+                separators=(",", ":"),
+                sort_keys=True,
+            )
+        os.replace(f"{self.manifest_path}.tmp", self.manifest_path)
+        if self.content_hash_cache is not None:
+            self.content_hash_cache.save()
+        return True
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,831 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/partition_key_simulator.py
+
+This script defines the PartitionKeySimulator class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import json
+import math
+import os
+import struct
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+_MASK = 0xFFFFFFFFFFFFFFFF
+_C1 = 0x87C37B91114253D5
+_C2 = 0x4CF5AD432745937F
+
+
+def _rotl(value: int, bits: int) -> int:
+    """
+    Rotates a 64-bit value to the left.
+    :param value: The value.
+    :type value: int
+    :param bits: The number of bits.
+    :type bits: int
+    :return: The rotated value.
+    :rtype: int
+    """
+    return ((value << bits) | (value >> (64 - bits))) & _MASK
+
+
+def _fmix(value: int) -> int:
+    """
+    The MurmurHash3 finalization mix of a 64-bit value.
+    :param value: The value.
+    :type value: int
+    :return: The mixed value.
+    :rtype: int
+    """
+    value ^= value >> 33
+    value = (value * 0xFF51AFD7ED558CCD) & _MASK
+    value ^= value >> 33
+    value = (value * 0xC4CEB9FE1A85EC53) & _MASK
+    return value ^ (value >> 33)
+
+
+def _murmur3_128(data: bytes) -> Tuple[int, int]:
+    """
+    Computes the x64 128-bit MurmurHash3 of some bytes, with seed 0.
+    :param data: The bytes.
+    :type data: bytes
+    :return: Both halves of the hash.
+    :rtype: Tuple[int, int]
+    """
+    h1 = h2 = 0
+    blocks = len(data) // 16
+    for k1, k2 in struct.iter_unpack("<QQ", data[: blocks * 16]):
+        k1 = _rotl((k1 * _C1) & _MASK, 31)
+        h1 ^= (k1 * _C2) & _MASK
+        h1 = (_rotl(h1, 27) + h2) & _MASK
+        h1 = (h1 * 5 + 0x52DCE729) & _MASK
+        k2 = _rotl((k2 * _C2) & _MASK, 33)
+        h2 ^= (k2 * _C1) & _MASK
+        h2 = (_rotl(h2, 31) + h1) & _MASK
+        h2 = (h2 * 5 + 0x38495AB5) & _MASK
+    tail = data[blocks * 16 :]
+    k2 = int.from_bytes(tail[8:], "little")
+    h2 ^= (_rotl((k2 * _C2) & _MASK, 33) * _C1) & _MASK
+    k1 = int.from_bytes(tail[:8], "little")
+    h1 ^= (_rotl((k1 * _C1) & _MASK, 31) * _C2) & _MASK
+    h1 ^= len(data)
+    h2 ^= len(data)
+    h1 = (h1 + h2) & _MASK
+    h2 = (h2 + h1) & _MASK
+    h1 = _fmix(h1)
+    h2 = _fmix(h2)
+    h1 = (h1 + h2) & _MASK
+    h2 = (h2 + h1) & _MASK
+    return h1, h2
+
+
+@lru_cache(maxsize=1 << 16, typed=True)
+def _effective_partition_key(value: Any) -> int:
+    """
+    Hashes a partition key value as the V2 hash partitioning of CosmosDB
+    does: the value, prefixed by its type marker, is hashed with MurmurHash3,
+    and the top two bits of the result are cleared.
+    :param value: The value: a string, number, boolean, None (null) or
+    Ellipsis (undefined, for documents without the key).
+    :type value: Any
+    :return: The effective partition key, in [0, 2^126).
+    :rtype: int
+    """
+    if value is Ellipsis:
+        data = b"\x00"
+    elif value is None:
+        data = b"\x01"
+    elif value is True:
+        data = b"\x03"
+    elif value is False:
+        data = b"\x02"
+    elif isinstance(value, str):
+        data = b"\x08" + value.encode("utf-8") + b"\xff"
+    else:
+        data = b"\x05" + struct.pack("<d", float(value))
+    h1, h2 = _murmur3_128(data)
+    return ((h2 & 0x3FFFFFFFFFFFFFFF) << 64) | h1
+
+
+class _HeavyHitters:
+    """
+    Weighted Misra-Gries summary: keeps the heaviest keys of a stream, with
+    bounded memory. Weights are underestimated by at most the total weight
+    divided by the capacity. Booleans are kept apart from the numbers they
+    equal, e.g. True from 1.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Creates a new summary.
+        :param capacity: The number of keys tracked.
+        :type capacity: int
+        """
+        self._capacity = capacity
+        self._weights: Dict[Tuple[bool, Any], float] = {}
+
+    def add(self, key: Any, weight: float):
+        """
+        Adds the weight of a key.
+        :param key: The key.
+        :type key: Any
+        :param weight: The weight.
+        :type weight: float
+        """
+        weights = self._weights
+        key = (key.__class__ is bool, key)
+        weights[key] = weights.get(key, 0.0) + weight
+        if len(weights) > 2 * self._capacity:
+            self._prune()
+
+    def _prune(self):
+        """
+        Keeps the heaviest keys only, lowering their weights by the weight
+        of the first key dropped.
+        """
+        weights = self._weights
+        if len(weights) <= self._capacity:
+            return
+        threshold = sorted(weights.values(), reverse=True)[self._capacity]
+        self._weights = {
+            key: weight - threshold
+            for key, weight in weights.items()
+            if weight > threshold
+        }
+
+    def merge(self, other: "_HeavyHitters"):
+        """
+        Adds the keys of another summary.
+        :param other: The other summary.
+        :type other: _HeavyHitters
+        """
+        weights = self._weights
+        for key, weight in other._weights.items():
+            weights[key] = weights.get(key, 0.0) + weight
+        self._prune()
+
+    def top(self, count: int) -> List[Tuple[Any, float]]:
+        """
+        Retrieves the heaviest keys.
+        :param count: The number of keys.
+        :type count: int
+        :return: The keys and their weights, heaviest first.
+        :rtype: List[Tuple[Any, float]]
+        """
+        return [
+            (key, weight)
+            for (_, key), weight in sorted(
+                self._weights.items(), key=lambda item: -item[1]
+            )[:count]
+        ]
+
+
+class _DistinctCounter:
+    """
+    HyperLogLog estimate of the number of distinct hashes, in 16 KiB.
+    """
+
+    _bits = 14
+
+    def __init__(self):
+        """
+        Creates a new counter.
+        """
+        self._registers = bytearray(1 << self._bits)
+
+    def add(self, hash: int):
+        """
+        Adds a 64-bit hash.
+        :param hash: The hash.
+        :type hash: int
+        """
+        index = hash & ((1 << self._bits) - 1)
+        rank = 64 - self._bits - (hash >> self._bits).bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def merge(self, other: "_DistinctCounter"):
+        """
+        Adds the hashes of another counter.
+        :param other: The other counter.
+        :type other: _DistinctCounter
+        """
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+    def estimate(self) -> int:
+        """
+        Estimates the number of distinct hashes added.
+        :return: Such number.
+        :rtype: int
+        """
+        size = len(self._registers)
+        zeros = self._registers.count(0)
+        raw = (
+            0.7213
+            / (1 + 1.079 / size)
+            * size
+            * size
+            / sum(2.0**-rank for rank in self._registers)
+        )
+        if raw <= 2.5 * size and zeros:
+            return round(size * math.log(size / zeros))
+        return round(raw)
+
+
+class PartitionKeyReport(NamedTuple):
+    """
+    The distribution of a sample, and of a request trace, under a candidate
+    partition key. Storage and request units are listed per physical
+    partition; logical partitions are listed by value, Ellipsis standing for
+    the undefined partition of documents without the key.
+    """
+
+    partition_key: str
+    documents: int
+    requests: int
+    undefined: int
+    invalid: int
+    logical_partitions: int
+    storage: List[float]
+    request_units: List[float]
+    storage_skew: float
+    request_unit_skew: float
+    largest_logical_partitions: List[Tuple[Any, float]]
+    busiest_logical_partitions: List[Tuple[Any, float]]
+    warnings: List[str]
+
+
+class _Candidate:
+    """
+    The accumulated distribution of a candidate partition key.
+    """
+
+    def __init__(self, path: str, buckets: int, top: int):
+        """
+        Creates a new candidate.
+        :param path: The partition key path, e.g. "/tenantId".
+        :type path: str
+        :param buckets: The number of hash ranges tracked.
+        :type buckets: int
+        :param top: The number of logical partitions tracked.
+        :type top: int
+        """
+        if not path.startswith("/") or path == "/":
+            raise ValueError(f"Invalid partition key path: {path!r}")
+        self.path = path
+        self.segments = path[1:].split("/")
+        self.storage = array("d", bytes(8 * buckets))
+        self.request_units = array("d", bytes(8 * buckets))
+        self.largest = _HeavyHitters(top)
+        self.busiest = _HeavyHitters(top)
+        self.distinct = _DistinctCounter()
+        self.documents = 0
+        self.requests = 0
+        self.undefined = 0
+        self.invalid = 0
+
+    def value(self, document: Dict[str, Any]) -> Any:
+        """
+        Extracts the partition key value of a document.
+        :param document: The document.
+        :type document: Dict[str, Any]
+        :return: The value, Ellipsis if undefined, or NotImplemented if not
+        a valid partition key value.
+        :rtype: Any
+        """
+        value = document
+        for segment in self.segments:
+            if not isinstance(value, dict) or segment not in value:
+                self.undefined += 1
+                return Ellipsis
+            value = value[segment]
+        if isinstance(value, (dict, list)):
+            self.invalid += 1
+            return NotImplemented
+        return value
+
+    def merge(self, other: "_Candidate"):
+        """
+        Adds the distribution of the same candidate over other documents.
+        :param other: The other candidate.
+        :type other: _Candidate
+        """
+        for mine, theirs in (
+            (self.storage, other.storage),
+            (self.request_units, other.request_units),
+        ):
+            for index, value in enumerate(theirs):
+                if value:
+                    mine[index] += value
+        self.largest.merge(other.largest)
+        self.busiest.merge(other.busiest)
+        self.distinct.merge(other.distinct)
+        self.documents += other.documents
+        self.requests += other.requests
+        self.undefined += other.undefined
+        self.invalid += other.invalid
+
+
+def _simulate_chunk(
+    candidateKeys: List[str],
+    sampleFraction: float,
+    topLogicalPartitions: int,
+    path: str,
+    start: int,
+    end: int,
+    trace: bool,
+) -> "PartitionKeySimulator":
+    """
+    Simulates a chunk of a JSONL file, in a worker process.
+    :param candidateKeys: The candidate partition key paths.
+    :type candidateKeys: List[str]
+    :param sampleFraction: The fraction of the container the sample
+    represents.
+    :type sampleFraction: float
+    :param topLogicalPartitions: The number of heaviest logical partitions
+    reported.
+    :type topLogicalPartitions: int
+    :param path: The path of the file.
+    :type path: str
+    :param start: The offset of the first line of the chunk.
+    :type start: int
+    :param end: The offset following the chunk.
+    :type end: int
+    :param trace: Whether the file is a request trace, or a sample of
+    documents.
+    :type trace: bool
+    :return: The simulator of the chunk.
+    :rtype: pythoneda.shared.iac.pulumi.azure.PartitionKeySimulator
+    """
+    result = PartitionKeySimulator(candidateKeys, sampleFraction, topLogicalPartitions)
+    lines = PartitionKeySimulator.lines(path, start, end)
+    if trace:
+        result.add_requests(lines)
+    else:
+        result.add_documents(lines)
+    return result
+
+
+class PartitionKeySimulator:
+    """
+    Offline simulator of the partition key candidates of a CosmosDB
+    container, whose partition key cannot be changed once created.
+
+    It streams a JSONL sample of documents and a JSONL request trace, and
+    hashes the value of each candidate key as CosmosDB does, to find the
+    physical partition each document and request lands on. Storage and
+    request units are accumulated over a fixed number of hash ranges, so the
+    skew can then be reported for any number of physical partitions, by
+    default the number CosmosDB needs for the storage and throughput.
+
+    Memory does not grow with the sample: per candidate, it keeps the hash
+    ranges, a bounded summary of the heaviest logical partitions, and a
+    HyperLogLog estimate of their number, so tens of millions of rows fit in
+    a few megabytes. Hashes of repeated key values are cached. All of them
+    can be merged, so large files are split in chunks simulated by a pool of
+    processes.
+
+    Class name: PartitionKeySimulator
+
+    Responsibilities:
+        - Distribute documents and requests by candidate partition key.
+        - Report storage and request-unit skew across physical partitions.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.PartitionKeyReport
+        - pythoneda.shared.iac.pulumi.azure.CosmosdbContainer
+    """
+
+    max_partition_storage = 50 * 1024**3
+    max_partition_throughput = 10000
+    max_logical_partition_storage = 20 * 1024**3
+    hot_partition_skew = 2.0
+
+    _bucket_bits = 12
+    _min_chunk_size = 16 * 1024**2
+
+    def __init__(
+        self,
+        candidateKeys: List[str],
+        sampleFraction: float = None,
+        topLogicalPartitions: int = None,
+    ):
+        """
+        Creates a new PartitionKeySimulator instance.
+        :param candidateKeys: The candidate partition key paths, e.g.
+        ["/tenantId", "/order/customerId"].
+        :type candidateKeys: List[str]
+        :param sampleFraction: The fraction of the container the sample
+        represents, to scale storage. Defaults to 1.
+        :type sampleFraction: float
+        :param topLogicalPartitions: The number of heaviest logical
+        partitions reported. Defaults to 10.
+        :type topLogicalPartitions: int
+        """
+        if not candidateKeys:
+            raise ValueError("At least one candidate partition key is required")
+        if sampleFraction is not None and not 0 < sampleFraction <= 1:
+            raise ValueError(f"Invalid sample fraction: {sampleFraction}")
+        self._sample_fraction = sampleFraction
+        self._top_logical_partitions = topLogicalPartitions
+        self._candidates = [
+            _Candidate(path, 1 << self._bucket_bits, 4 * self.top_logical_partitions)
+            for path in dict.fromkeys(candidateKeys)
+        ]
+
+    @property
+    def candidate_keys(self) -> List[str]:
+        """
+        Retrieves the candidate partition key paths.
+        :return: Such paths.
+        :rtype: List[str]
+        """
+        return [candidate.path for candidate in self._candidates]
+
+    @property
+    def sample_fraction(self) -> float:
+        """
+        Retrieves the fraction of the container the sample represents.
+        :return: Such fraction.
+        :rtype: float
+        """
+        return self._sample_fraction if self._sample_fraction is not None else 1.0
+
+    @property
+    def top_logical_partitions(self) -> int:
+        """
+        Retrieves the number of heaviest logical partitions reported.
+        :return: Such number.
+        :rtype: int
+        """
+        return (
+            self._top_logical_partitions
+            if self._top_logical_partitions is not None
+            else 10
+        )
+
+    @classmethod
+    def effective_partition_key(cls, value: Any) -> int:
+        """
+        Hashes a partition key value as CosmosDB does.
+        :param value: The value: a string, number, boolean, None (null) or
+        Ellipsis (undefined).
+        :type value: Any
+        :return: The effective partition key, in [0, 2^126).
+        :rtype: int
+        """
+        return _effective_partition_key(value)
+
+    @classmethod
+    def physical_partition(cls, value: Any, partitions: int) -> int:
+        """
+        Retrieves the physical partition of a partition key value, when the
+        hash space is evenly split.
+        :param value: The value.
+        :type value: Any
+        :param partitions: The number of physical partitions.
+        :type partitions: int
+        :return: The index of the physical partition.
+        :rtype: int
+        """
+        return (_effective_partition_key(value) * partitions) >> 126
+
+    @classmethod
+    def _bucket(cls, key: int) -> int:
+        """
+        Retrieves the hash range of an effective partition key.
+        :param key: The effective partition key.
+        :type key: int
+        :return: The hash range.
+        :rtype: int
+        """
+        return key >> (126 - cls._bucket_bits)
+
+    def add_document(self, document: Dict[str, Any], size: int):
+        """
+        Adds a document of the sample.
+        :param document: The document.
+        :type document: Dict[str, Any]
+        :param size: Its size, in bytes.
+        :type size: int
+        """
+        for candidate in self._candidates:
+            value = candidate.value(document)
+            if value is NotImplemented:
+                continue
+            key = _effective_partition_key(value)
+            candidate.documents += 1
+            candidate.storage[self._bucket(key)] += size
+            candidate.largest.add(value, size)
+            candidate.distinct.add(key & _MASK)
+
+    def add_request(self, document: Dict[str, Any], requestCharge: float):
+        """
+        Adds a request of the trace.
+        :param document: The document addressed, or at least its candidate
+        key properties.
+        :type document: Dict[str, Any]
+        :param requestCharge: The request units charged.
+        :type requestCharge: float
+        """
+        for candidate in self._candidates:
+            value = candidate.value(document)
+            if value is NotImplemented:
+                continue
+            candidate.requests += 1
+            candidate.request_units[
+                self._bucket(_effective_partition_key(value))
+            ] += requestCharge
+            candidate.busiest.add(value, requestCharge)
+
+    def add_documents(self, lines: Iterable[Union[str, bytes]]):
+        """
+        Adds a JSONL sample of documents.
+        :param lines: The lines, one document each.
+        :type lines: Iterable[Union[str, bytes]]
+        """
+        for line in lines:
+            line = line.strip()
+            if line:
+                self.add_document(
+                    json.loads(line),
+                    len(line) if isinstance(line, bytes) else len(line.encode("utf-8")),
+                )
+
+    def add_requests(self, lines: Iterable[Union[str, bytes]]):
+        """
+        Adds a JSONL request trace. Each line is either the document
+        addressed, or {"document": {...}, "requestCharge": RUs}; requests
+        without charge count as one request unit.
+        :param lines: The lines, one request each.
+        :type lines: Iterable[Union[str, bytes]]
+        """
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            request = json.loads(line)
+            document = request.get("document")
+            if isinstance(document, dict):
+                self.add_request(document, float(request.get("requestCharge", 1.0)))
+            else:
+                self.add_request(request, 1.0)
+
+    def merge(self, other: "PartitionKeySimulator"):
+        """
+        Adds the documents and requests of another simulator.
+        :param other: The other simulator, with the same candidate keys.
+        :type other: pythoneda.shared.iac.pulumi.azure.PartitionKeySimulator
+        """
+        if other.candidate_keys != self.candidate_keys:
+            raise ValueError("Cannot merge simulators of different candidate keys")
+        for mine, theirs in zip(self._candidates, other._candidates):
+            mine.merge(theirs)
+
+    @classmethod
+    def lines(cls, path: str, start: int = 0, end: int = None) -> Iterator[bytes]:
+        """
+        Reads the lines of a chunk of a file.
+        :param path: The path of the file.
+        :type path: str
+        :param start: The offset of the first line.
+        :type start: int
+        :param end: The offset following the chunk. Defaults to the end of
+        the file.
+        :type end: int
+        :return: The lines.
+        :rtype: Iterator[bytes]
+        """
+        with open(path, "rb") as file:
+            file.seek(start)
+            position = start
+            for line in file:
+                if end is not None and position >= end:
+                    break
+                position += len(line)
+                yield line
+
+    @classmethod
+    def chunks(cls, path: str, count: int) -> List[Tuple[int, int]]:
+        """
+        Splits a file in chunks of whole lines.
+        :param path: The path of the file.
+        :type path: str
+        :param count: The number of chunks wanted.
+        :type count: int
+        :return: The start and end offsets of each chunk, at most count of
+        them, and none smaller than 16 MiB but the last one.
+        :rtype: List[Tuple[int, int]]
+        """
+        size = os.path.getsize(path)
+        count = max(1, min(count, size // cls._min_chunk_size))
+        offsets = [0]
+        with open(path, "rb") as file:
+            for index in range(1, count):
+                file.seek(max(offsets[-1], size * index // count))
+                file.readline()
+                if file.tell() < size:
+                    offsets.append(file.tell())
+        offsets.append(size)
+        return list(zip(offsets, offsets[1:]))
+
+    def physical_partitions(self, throughput: int = None) -> int:
+        """
+        Estimates the number of physical partitions CosmosDB needs.
+        :param throughput: The provisioned, or autoscale maximum, throughput
+        in RU/s, if known.
+        :type throughput: int
+        :return: The number of physical partitions.
+        :rtype: int
+        """
+        storage = max(
+            (sum(candidate.storage) for candidate in self._candidates), default=0
+        )
+        return max(
+            1,
+            math.ceil(storage / self.sample_fraction / self.max_partition_storage),
+            math.ceil((throughput or 0) / self.max_partition_throughput),
+        )
+
+    @classmethod
+    def _skew(cls, values: List[float]) -> float:
+        """
+        Computes the skew of a distribution: its maximum over its mean.
+        :param values: The values.
+        :type values: List[float]
+        :return: The skew, 1 if even, or 0 if empty.
+        :rtype: float
+        """
+        total = sum(values)
+        return max(values) * len(values) / total if total else 0.0
+
+    def _fold(self, buckets: array, partitions: int, scale: float) -> List[float]:
+        """
+        Folds the hash ranges into evenly split physical partitions.
+        :param buckets: The values of each hash range.
+        :type buckets: array.array
+        :param partitions: The number of physical partitions.
+        :type partitions: int
+        :param scale: The factor applied to values.
+        :type scale: float
+        :return: The value of each physical partition.
+        :rtype: List[float]
+        """
+        result = [0.0] * partitions
+        for index, value in enumerate(buckets):
+            if value:
+                result[index * partitions >> self._bucket_bits] += value * scale
+        return result
+
+    def report(
+        self, physicalPartitions: int = None, throughput: int = None
+    ) -> Dict[str, PartitionKeyReport]:
+        """
+        Reports the distribution of each candidate.
+        :param physicalPartitions: The number of physical partitions, at most
+        4096. Defaults to the number estimated from the storage and the
+        throughput.
+        :type physicalPartitions: int
+        :param throughput: The provisioned, or autoscale maximum, throughput
+        in RU/s, if known.
+        :type throughput: int
+        :return: The reports, by candidate key.
+        :rtype: Dict[str, pythoneda.shared.iac.pulumi.azure.PartitionKeyReport]
+        """
+        if physicalPartitions is None:
+            physicalPartitions = self.physical_partitions(throughput)
+        if not 1 <= physicalPartitions <= 1 << self._bucket_bits:
+            raise ValueError(
+                f"Invalid number of physical partitions: {physicalPartitions}"
+            )
+        scale = 1 / self.sample_fraction
+        result = {}
+        for candidate in self._candidates:
+            storage = self._fold(candidate.storage, physicalPartitions, scale)
+            request_units = self._fold(candidate.request_units, physicalPartitions, 1)
+            largest = [
+                (value, weight * scale)
+                for value, weight in candidate.largest.top(self.top_logical_partitions)
+            ]
+            busiest = candidate.busiest.top(self.top_logical_partitions)
+            warnings = []
+            if candidate.undefined:
+                warnings.append(
+                    f"{candidate.undefined} documents or requests lack "
+                    f"{candidate.path} and share the undefined partition"
+                )
+            if candidate.invalid:
+                warnings.append(
+                    f"{candidate.invalid} documents or requests have an object "
+                    f"or array at {candidate.path}"
+                )
+            for value, size in largest:
+                if size > self.max_logical_partition_storage:
+                    warnings.append(
+                        f"Logical partition {value!r} would exceed 20 GB "
+                        f"({size / 1024**3:.1f} GB)"
+                    )
+            storage_skew = self._skew(storage)
+            request_unit_skew = self._skew(request_units)
+            if storage_skew > self.hot_partition_skew:
+                warnings.append(f"Storage skew of {storage_skew:.2f}")
+            if request_unit_skew > self.hot_partition_skew:
+                warnings.append(
+                    f"Request unit skew of {request_unit_skew:.2f}: the "
+                    "busiest physical partition is throttled first"
+                )
+            result[candidate.path] = PartitionKeyReport(
+                candidate.path,
+                candidate.documents,
+                candidate.requests,
+                candidate.undefined,
+                candidate.invalid,
+                candidate.distinct.estimate(),
+                storage,
+                request_units,
+                storage_skew,
+                request_unit_skew,
+                largest,
+                busiest,
+                warnings,
+            )
+        return result
+
+    @classmethod
+    def simulate(
+        cls,
+        documentsPath: str,
+        tracePath: str,
+        candidateKeys: List[str],
+        sampleFraction: float = None,
+        physicalPartitions: int = None,
+        throughput: int = None,
+        processes: int = None,
+    ) -> Dict[str, PartitionKeyReport]:
+        """
+        Simulates candidate partition keys from files, in chunks simulated by
+        a pool of processes.
+        :param documentsPath: The path of the JSONL sample of documents.
+        :type documentsPath: str
+        :param tracePath: The path of the JSONL request trace, if any.
+        :type tracePath: str
+        :param candidateKeys: The candidate partition key paths.
+        :type candidateKeys: List[str]
+        :param sampleFraction: The fraction of the container the sample
+        represents. Defaults to 1.
+        :type sampleFraction: float
+        :param physicalPartitions: The number of physical partitions.
+        Defaults to the number estimated.
+        :type physicalPartitions: int
+        :param throughput: The provisioned throughput in RU/s, if known.
+        :type throughput: int
+        :param processes: The number of processes. Defaults to the number of
+        CPUs.
+        :type processes: int
+        :return: The reports, by candidate key.
+        :rtype: Dict[str, pythoneda.shared.iac.pulumi.azure.PartitionKeyReport]
+        """
+        simulator = cls(candidateKeys, sampleFraction)
+        processes = processes if processes is not None else os.cpu_count() or 1
+        work = [
+            (documentsPath, start, end, False)
+            for start, end in cls.chunks(documentsPath, processes)
+        ]
+        if tracePath is not None:
+            work.extend(
+                (tracePath, start, end, True)
+                for start, end in cls.chunks(tracePath, processes)
+            )
+        arguments = (candidateKeys, sampleFraction, simulator.top_logical_partitions)
+        if processes == 1 or all(start == 0 for _, start, _, _ in work):
+            for path, start, end, trace in work:
+                simulator.merge(_simulate_chunk(*arguments, path, start, end, trace))
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                futures = [
+                    executor.submit(_simulate_chunk, *arguments, *chunk)
+                    for chunk in work
+                ]
+                for future in futures:
+                    simulator.merge(future.result())
+        return simulator.report(physicalPartitions, throughput)
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,541 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/request_unit_estimator.py
+
+This script defines the RequestUnitEstimator class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .cosmosdb_container import CosmosdbContainer
+from .cosmosdb_indexing_policy import CosmosdbIndexingPolicy
+from .cosmosdb_throughput import CosmosdbThroughput
+from .partition_key_simulator import PartitionKeySimulator
+from array import array
+from datetime import datetime
+import json
+import math
+import random
+from typing import Any, Dict, Iterable, List, NamedTuple, Union
+
+
+class RequestUnitEstimate(NamedTuple):
+    """
+    The request units a trace consumes, per second. Demand is the total of
+    each second; required is the throughput to provision so the busiest
+    physical partition, which gets an even share of it, is not throttled.
+    Percentiles are keyed "p50", "p95", "p99" and "max".
+    """
+
+    operations: int
+    seconds: int
+    request_units: float
+    by_operation: Dict[str, float]
+    physical_partitions: int
+    demand: Dict[str, float]
+    required: Dict[str, float]
+    recommended_autoscale_max_throughput: int
+    recommended_throughput: int
+
+
+class RequestUnitEstimator:
+    """
+    Estimates the throughput a CosmosDB container needs from a trace of its
+    reads, writes and queries.
+
+    Each operation is charged as CosmosDB roughly does: point reads by size,
+    writes by size and by the number of values the indexing policy indexes,
+    replaces twice as much, and queries per partition visited and per result.
+    Charges measured in the trace are used as they are, and calibrate the
+    model for the operations of the same kind without them.
+
+    Charges are accumulated per second and per physical partition, the one
+    the partition key value of the operation hashes to, so a day-long trace
+    only keeps 86400 small arrays, and the percentiles are computed once
+    over them.
+
+    Class name: RequestUnitEstimator
+
+    Responsibilities:
+        - Estimate the request units of reads, writes and queries.
+        - Report RU/s percentiles, and recommend throughput.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.CosmosdbContainer
+        - pythoneda.shared.iac.pulumi.azure.CosmosdbIndexingPolicy
+        - pythoneda.shared.iac.pulumi.azure.PartitionKeySimulator
+    """
+
+    read_charge = 1.0
+    read_charge_per_kb = 0.09
+    write_charge = 4.0
+    write_charge_per_kb = 0.5
+    write_charge_per_term = 0.11
+    replace_factor = 1.9
+    query_charge_per_partition = 2.5
+    query_charge_per_result_kb = 0.3
+    default_document_size = 1024
+    default_indexed_terms = 10
+
+    operation_kinds = {
+        "read": "read",
+        "create": "create",
+        "insert": "create",
+        "upsert": "create",
+        "replace": "replace",
+        "patch": "replace",
+        "delete": "delete",
+        "query": "query",
+    }
+    _kinds = ("read", "create", "replace", "delete", "query")
+    _kind_indexes = {kind: index for index, kind in enumerate(_kinds)}
+    _decoder = json.JSONDecoder()
+
+    def __init__(
+        self,
+        partitionKey: Dict[str, Any] = None,
+        indexingPolicy: CosmosdbIndexingPolicy = None,
+        documentSizes: List[int] = None,
+        physicalPartitions: int = None,
+        headroom: float = None,
+    ):
+        """
+        Creates a new RequestUnitEstimator instance.
+        :param partitionKey: The partition key of the container, e.g.
+        {"paths": ["/tenantId"], "kind": "Hash"}. Defaults to "/id".
+        :type partitionKey: Dict[str, Any]
+        :param indexingPolicy: The indexing policy. Defaults to indexing
+        every path.
+        :type indexingPolicy: pythoneda.shared.iac.pulumi.azure.CosmosdbIndexingPolicy
+        :param documentSizes: Document sizes, in bytes, drawn for operations
+        of the trace that do not state theirs. Defaults to 1 KiB.
+        :type documentSizes: List[int]
+        :param physicalPartitions: The number of physical partitions.
+        Defaults to one.
+        :type physicalPartitions: int
+        :param headroom: The factor applied to the p99 when recommending
+        throughput. Defaults to 1.2.
+        :type headroom: float
+        """
+        if physicalPartitions is not None and physicalPartitions < 1:
+            raise ValueError(
+                f"Invalid number of physical partitions: {physicalPartitions}"
+            )
+        if headroom is not None and headroom < 1:
+            raise ValueError(f"Invalid headroom: {headroom}")
+        if documentSizes is not None and not documentSizes:
+            raise ValueError("At least one document size is required")
+        self._partition_key = partitionKey
+        self._indexing_policy = indexingPolicy
+        self._document_sizes = documentSizes
+        self._physical_partitions = physicalPartitions
+        self._headroom = headroom
+        path = self.partition_key["paths"][0]
+        self._partition_key_segments = path[1:].split("/")
+        self._policy = (
+            indexingPolicy if indexingPolicy is not None else CosmosdbIndexingPolicy()
+        )
+        self._random = random.Random(0)
+        self._buckets: Dict[int, array] = {}
+        self._measured = [0.0] * len(self._kinds)
+        self._modelled_measured = [0.0] * len(self._kinds)
+        self._operations = 0
+        self._indexed_terms = None
+
+    @classmethod
+    def for_container(
+        cls,
+        container: CosmosdbContainer,
+        documentSizes: List[int] = None,
+        physicalPartitions: int = None,
+        headroom: float = None,
+    ) -> "RequestUnitEstimator":
+        """
+        Creates an estimator for a container definition.
+        :param container: The container.
+        :type container: pythoneda.shared.iac.pulumi.azure.CosmosdbContainer
+        :param documentSizes: Document sizes, in bytes, drawn for operations
+        of the trace that do not state theirs.
+        :type documentSizes: List[int]
+        :param physicalPartitions: The number of physical partitions.
+        Defaults to the number the throughput of the container needs.
+        :type physicalPartitions: int
+        :param headroom: The factor applied to the p99 when recommending
+        throughput.
+        :type headroom: float
+        :return: The estimator.
+        :rtype: pythoneda.shared.iac.pulumi.azure.RequestUnitEstimator
+        """
+        if physicalPartitions is None and container.throughput.provisioned:
+            physicalPartitions = math.ceil(
+                (
+                    container.throughput.autoscale_max_throughput
+                    or container.throughput.throughput
+                )
+                / PartitionKeySimulator.max_partition_throughput
+            )
+        return cls(
+            container.partition_key,
+            container.indexing_policy,
+            documentSizes,
+            physicalPartitions,
+            headroom,
+        )
+
+    @property
+    def partition_key(self) -> Dict[str, Any]:
+        """
+        Retrieves the partition key.
+        :return: Such partition key.
+        :rtype: Dict[str, Any]
+        """
+        return (
+            self._partition_key
+            if self._partition_key is not None
+            else {"paths": ["/id"], "kind": "Hash"}
+        )
+
+    @property
+    def indexing_policy(self) -> CosmosdbIndexingPolicy:
+        """
+        Retrieves the indexing policy.
+        :return: Such policy, or None for the default one.
+        :rtype: pythoneda.shared.iac.pulumi.azure.CosmosdbIndexingPolicy
+        """
+        return self._indexing_policy
+
+    @property
+    def document_sizes(self) -> List[int]:
+        """
+        Retrieves the document sizes drawn for operations without size.
+        :return: Such sizes, in bytes.
+        :rtype: List[int]
+        """
+        return (
+            self._document_sizes
+            if self._document_sizes is not None
+            else [self.default_document_size]
+        )
+
+    @property
+    def physical_partitions(self) -> int:
+        """
+        Retrieves the number of physical partitions.
+        :return: Such number.
+        :rtype: int
+        """
+        return self._physical_partitions if self._physical_partitions is not None else 1
+
+    @property
+    def headroom(self) -> float:
+        """
+        Retrieves the factor applied to the p99 when recommending throughput.
+        :return: Such factor.
+        :rtype: float
+        """
+        return self._headroom if self._headroom is not None else 1.2
+
+    @property
+    def indexed_terms(self) -> float:
+        """
+        Retrieves the number of values indexed per document written, when
+        the trace does not include the document: the mean over the sample
+        documents of the policy, if any.
+        :return: Such number.
+        :rtype: float
+        """
+        if self._indexed_terms is None:
+            samples = self._policy.sample_documents
+            if self._policy.indexing_mode == "none":
+                self._indexed_terms = 0.0
+            elif samples:
+                self._indexed_terms = sum(
+                    self._policy.indexed_terms(sample) for sample in samples
+                ) / len(samples)
+            else:
+                self._indexed_terms = float(self.default_indexed_terms)
+        return self._indexed_terms
+
+    def _draw_size(self) -> int:
+        """
+        Draws a document size from the distribution.
+        :return: The size, in bytes.
+        :rtype: int
+        """
+        sizes = self.document_sizes
+        return sizes[0] if len(sizes) == 1 else self._random.choice(sizes)
+
+    def charge(
+        self, kind: str, size: int, terms: float, partitions: int, results: int
+    ) -> float:
+        """
+        Models the request units of an operation.
+        :param kind: The kind: read, create, replace, delete or query.
+        :type kind: str
+        :param size: The size of the document, or of each result, in bytes.
+        :type size: int
+        :param terms: The number of values indexed, for writes.
+        :type terms: float
+        :param partitions: The number of physical partitions visited, for
+        queries.
+        :type partitions: int
+        :param results: The number of results, for queries.
+        :type results: int
+        :return: The request units.
+        :rtype: float
+        """
+        kilobytes = max(1.0, size / 1024)
+        if kind == "read":
+            return self.read_charge + self.read_charge_per_kb * (kilobytes - 1)
+        if kind == "query":
+            return (
+                self.query_charge_per_partition * partitions
+                + self.query_charge_per_result_kb * results * kilobytes
+            )
+        result = (
+            self.write_charge
+            + self.write_charge_per_kb * (kilobytes - 1)
+            + self.write_charge_per_term * terms
+        )
+        return result * self.replace_factor if kind == "replace" else result
+
+    @classmethod
+    def _second(cls, timestamp: Union[int, float, str]) -> int:
+        """
+        Retrieves the second of a timestamp.
+        :param timestamp: Seconds since the epoch, or an ISO 8601 timestamp.
+        :type timestamp: Union[int, float, str]
+        :return: The second since the epoch.
+        :rtype: int
+        """
+        if isinstance(timestamp, str):
+            return int(datetime.fromisoformat(timestamp).timestamp())
+        return int(timestamp)
+
+    def _partition(self, operation: Dict[str, Any]) -> int:
+        """
+        Retrieves the physical partition of an operation.
+        :param operation: The operation.
+        :type operation: Dict[str, Any]
+        :return: The index of the partition, or None if the operation has no
+        partition key value.
+        :rtype: int
+        """
+        if "partitionKey" in operation:
+            value = operation["partitionKey"]
+        else:
+            value = operation.get("document")
+            for segment in self._partition_key_segments:
+                if not isinstance(value, dict):
+                    return None
+                value = value.get(segment, Ellipsis)
+            if isinstance(value, (dict, list)):
+                return None
+        return PartitionKeySimulator.physical_partition(value, self.physical_partitions)
+
+    def add(self, operation: Dict[str, Any]):
+        """
+        Adds an operation of the trace.
+        :param operation: The operation: {"timestamp": ..., "operation":
+        "read" | "create" | "upsert" | "replace" | "patch" | "delete" |
+        "query", and optionally "size", "document", "partitionKey",
+        "crossPartition", "results" and "requestCharge"}. Operations without
+        partition key value are spread over every partition.
+        :type operation: Dict[str, Any]
+        """
+        kind = self.operation_kinds.get(operation.get("operation"))
+        if kind is None:
+            raise ValueError(f"Unknown operation: {operation.get('operation')!r}")
+        if "timestamp" not in operation:
+            raise ValueError("Operations need a timestamp")
+        document = operation.get("document")
+        size = operation.get("size")
+        if size is None:
+            size = (
+                len(json.dumps(document, separators=(",", ":")).encode("utf-8"))
+                if isinstance(document, dict)
+                else self._draw_size()
+            )
+        partitions = self.physical_partitions
+        partition = None
+        if kind != "query" or not operation.get("crossPartition", False):
+            partition = self._partition(operation)
+        modelled = self.charge(
+            kind,
+            size,
+            (
+                self._policy.indexed_terms(document)
+                if isinstance(document, dict) and kind != "read"
+                else self.indexed_terms
+            ),
+            partitions if partition is None else 1,
+            operation.get("results", 1),
+        )
+        index = self._kind_indexes[kind]
+        measured = operation.get("requestCharge")
+        if measured is not None:
+            self._measured[index] += measured
+            self._modelled_measured[index] += modelled
+        column = 0 if measured is not None else 1 + index
+        charge = measured if measured is not None else modelled
+        second = self._second(operation["timestamp"])
+        bucket = self._buckets.get(second)
+        if bucket is None:
+            bucket = array("d", bytes(8 * partitions * (1 + len(self._kinds))))
+            self._buckets[second] = bucket
+        offset = column * partitions
+        if partition is None:
+            share = charge / partitions
+            for target in range(offset, offset + partitions):
+                bucket[target] += share
+        else:
+            bucket[offset + partition] += charge
+        self._operations += 1
+
+    def add_trace(self, lines: Iterable[Union[str, bytes]]):
+        """
+        Adds a JSONL trace, one operation per line.
+        :param lines: The lines.
+        :type lines: Iterable[Union[str, bytes]]
+        """
+        for line in lines:
+            line = line.strip()
+            if line:
+                self.add(
+                    self._decoder.decode(
+                        line.decode("utf-8") if isinstance(line, bytes) else line
+                    )
+                )
+
+    def calibration(self) -> Dict[str, float]:
+        """
+        Retrieves the factors applied to the modelled charges, from the
+        operations whose charge was measured.
+        :return: The factor of each kind of operation.
+        :rtype: Dict[str, float]
+        """
+        return {
+            kind: (
+                self._measured[index] / self._modelled_measured[index]
+                if self._modelled_measured[index]
+                else 1.0
+            )
+            for index, kind in enumerate(self._kinds)
+        }
+
+    @classmethod
+    def _percentiles(cls, values: List[float]) -> Dict[str, float]:
+        """
+        Computes nearest-rank percentiles.
+        :param values: The values.
+        :type values: List[float]
+        :return: The p50, p95, p99 and maximum.
+        :rtype: Dict[str, float]
+        """
+        ordered = sorted(values)
+        result = {
+            f"p{rank}": ordered[max(0, math.ceil(rank / 100 * len(ordered)) - 1)]
+            for rank in (50, 95, 99)
+        }
+        result["max"] = ordered[-1]
+        return result
+
+    def estimate(self) -> RequestUnitEstimate:
+        """
+        Estimates the throughput the trace needs.
+        :return: The estimate.
+        :rtype: pythoneda.shared.iac.pulumi.azure.RequestUnitEstimate
+        """
+        if not self._buckets:
+            raise ValueError("The trace has no operations")
+        partitions = self.physical_partitions
+        factors = [1.0] + list(self.calibration().values())
+        first = min(self._buckets)
+        seconds = max(self._buckets) - first + 1
+        demand = [0.0] * seconds
+        required = [0.0] * seconds
+        by_operation = [0.0] * len(self._kinds)
+        for second, bucket in self._buckets.items():
+            loads = [0.0] * partitions
+            for column, factor in enumerate(factors):
+                offset = column * partitions
+                for partition in range(partitions):
+                    value = bucket[offset + partition]
+                    if value:
+                        loads[partition] += value * factor
+                        if column:
+                            by_operation[column - 1] += value * factor
+            demand[second - first] = sum(loads)
+            required[second - first] = max(loads) * partitions
+        for index in range(len(self._kinds)):
+            by_operation[index] += self._measured[index]
+        required_percentiles = self._percentiles(required)
+        target = required_percentiles["p99"] * self.headroom
+        return RequestUnitEstimate(
+            self._operations,
+            seconds,
+            sum(demand),
+            dict(zip(self._kinds, by_operation)),
+            partitions,
+            self._percentiles(demand),
+            required_percentiles,
+            max(
+                CosmosdbThroughput.min_autoscale_max_throughput,
+                math.ceil(target / CosmosdbThroughput.autoscale_max_throughput_step)
+                * CosmosdbThroughput.autoscale_max_throughput_step,
+            ),
+            max(
+                CosmosdbThroughput.min_throughput,
+                math.ceil(target / CosmosdbThroughput.throughput_step)
+                * CosmosdbThroughput.throughput_step,
+            ),
+        )
+
+    @classmethod
+    def estimate_trace(
+        cls,
+        container: CosmosdbContainer,
+        tracePath: str,
+        documentSizes: List[int] = None,
+        physicalPartitions: int = None,
+        headroom: float = None,
+    ) -> RequestUnitEstimate:
+        """
+        Estimates the throughput a container needs from a trace file.
+        :param container: The container.
+        :type container: pythoneda.shared.iac.pulumi.azure.CosmosdbContainer
+        :param tracePath: The path of the JSONL trace.
+        :type tracePath: str
+        :param documentSizes: Document sizes, in bytes, drawn for operations
+        of the trace that do not state theirs.
+        :type documentSizes: List[int]
+        :param physicalPartitions: The number of physical partitions.
+        Defaults to the number the throughput of the container needs.
+        :type physicalPartitions: int
+        :param headroom: The factor applied to the p99 when recommending
+        throughput.
+        :type headroom: float
+        :return: The estimate.
+        :rtype: pythoneda.shared.iac.pulumi.azure.RequestUnitEstimate
+        """
+        estimator = cls.for_container(
+            container, documentSizes, physicalPartitions, headroom
+        )
+        with open(tracePath, "rb") as trace:
+            estimator.add_trace(trace)
+        return estimator.estimate()
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -85,6 +85,7 @@ class ResourceGroup(AzureResource):
         :return: The Azure Resource Group.
         :rtype: pulumi_azure_native.resources.ResourceGroup
         """
+        self._validate_name(name)
         return pulumi_azure_native.resources.ResourceGroup(
             name, location=self.location, resource_group_name=name
         )
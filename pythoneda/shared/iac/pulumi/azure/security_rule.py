@@ -0,0 +1,423 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/security_rule.py
+
+This script defines the SecurityRule class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import ipaddress
+import pulumi_azure_native
+from typing import Tuple
+
+
+class SecurityRule:
+    """
+    A rule of an Azure Network Security Group.
+
+    Port ranges and address prefixes are parsed once into intervals, so rules
+    can be compared without reparsing them.
+
+    Class name: SecurityRule
+
+    Responsibilities:
+        - Validate the fields of a security rule.
+        - Check whether a rule overlaps or covers another.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.SecurityRuleSet
+    """
+
+    _min_priority = 100
+    _max_priority = 4096
+    _directions = ("Inbound", "Outbound")
+    _accesses = ("Allow", "Deny")
+    _protocols = ("*", "Tcp", "Udp", "Icmp", "Esp", "Ah")
+    _any_address = ("*", "Any", "0.0.0.0/0")
+
+    def __init__(
+        self,
+        name: str,
+        priority: int,
+        direction: str,
+        access: str,
+        protocol: str,
+        sourcePortRange: str,
+        destinationPortRange: str,
+        sourceAddressPrefix: str,
+        destinationAddressPrefix: str,
+    ):
+        """
+        Creates a new SecurityRule instance.
+        :param name: The name of the rule.
+        :type name: str
+        :param priority: The priority, from 100 (evaluated first) to 4096.
+        :type priority: int
+        :param direction: Either "Inbound" or "Outbound".
+        :type direction: str
+        :param access: Either "Allow" or "Deny".
+        :type access: str
+        :param protocol: "*", "Tcp", "Udp", "Icmp", "Esp" or "Ah".
+        :type protocol: str
+        :param sourcePortRange: "*", a port, or a range such as "1000-2000".
+        :type sourcePortRange: str
+        :param destinationPortRange: "*", a port, or a range.
+        :type destinationPortRange: str
+        :param sourceAddressPrefix: "*", a CIDR, an address, or a service tag.
+        :type sourceAddressPrefix: str
+        :param destinationAddressPrefix: "*", a CIDR, an address, or a service tag.
+        :type destinationAddressPrefix: str
+        """
+        if not name:
+            raise ValueError("Security rules need a name")
+        if not isinstance(priority, int) or not (
+            self._min_priority <= priority <= self._max_priority
+        ):
+            raise ValueError(
+                f"Invalid priority for security rule {name}: {priority} "
+                f"(expected {self._min_priority}-{self._max_priority})"
+            )
+        for field, value, allowed in (
+            ("direction", direction, self._directions),
+            ("access", access, self._accesses),
+            ("protocol", protocol, self._protocols),
+        ):
+            if value not in allowed:
+                raise ValueError(
+                    f"Invalid {field} for security rule {name}: {value} "
+                    f"(expected one of {', '.join(allowed)})"
+                )
+        self._name = name
+        self._priority = priority
+        self._direction = direction
+        self._access = access
+        self._protocol = protocol
+        self._source_port_range = sourcePortRange
+        self._destination_port_range = destinationPortRange
+        self._source_address_prefix = sourceAddressPrefix
+        self._destination_address_prefix = destinationAddressPrefix
+        self._source_ports = self._parse_port_range(name, sourcePortRange)
+        self._destination_ports = self._parse_port_range(name, destinationPortRange)
+        self._source_addresses = self._parse_address_prefix(name, sourceAddressPrefix)
+        self._destination_addresses = self._parse_address_prefix(
+            name, destinationAddressPrefix
+        )
+
+    @property
+    def name(self) -> str:
+        """
+        Retrieves the name.
+        :return: Such name.
+        :rtype: str
+        """
+        return self._name
+
+    @property
+    def priority(self) -> int:
+        """
+        Retrieves the priority.
+        :return: Such priority.
+        :rtype: int
+        """
+        return self._priority
+
+    @property
+    def direction(self) -> str:
+        """
+        Retrieves the direction.
+        :return: Such direction.
+        :rtype: str
+        """
+        return self._direction
+
+    @property
+    def access(self) -> str:
+        """
+        Retrieves the access.
+        :return: Such access.
+        :rtype: str
+        """
+        return self._access
+
+    @property
+    def protocol(self) -> str:
+        """
+        Retrieves the protocol.
+        :return: Such protocol.
+        :rtype: str
+        """
+        return self._protocol
+
+    @property
+    def source_port_range(self) -> str:
+        """
+        Retrieves the source port range.
+        :return: Such range.
+        :rtype: str
+        """
+        return self._source_port_range
+
+    @property
+    def destination_port_range(self) -> str:
+        """
+        Retrieves the destination port range.
+        :return: Such range.
+        :rtype: str
+        """
+        return self._destination_port_range
+
+    @property
+    def source_address_prefix(self) -> str:
+        """
+        Retrieves the source address prefix.
+        :return: Such prefix.
+        :rtype: str
+        """
+        return self._source_address_prefix
+
+    @property
+    def destination_address_prefix(self) -> str:
+        """
+        Retrieves the destination address prefix.
+        :return: Such prefix.
+        :rtype: str
+        """
+        return self._destination_address_prefix
+
+    @property
+    def destination_ports(self) -> Tuple[int, int]:
+        """
+        Retrieves the destination ports, as an inclusive interval.
+        :return: Such interval.
+        :rtype: Tuple[int, int]
+        """
+        return self._destination_ports
+
+    @property
+    def source_addresses(self) -> Tuple:
+        """
+        Retrieves the source address prefix, parsed.
+        :return: ("*",), ("tag", name) or (ip version, first, last address).
+        :rtype: Tuple
+        """
+        return self._source_addresses
+
+    @property
+    def destination_addresses(self) -> Tuple:
+        """
+        Retrieves the destination address prefix, parsed.
+        :return: ("*",), ("tag", name) or (ip version, first, last address).
+        :rtype: Tuple
+        """
+        return self._destination_addresses
+
+    @classmethod
+    def _parse_port_range(cls, name: str, value: str) -> Tuple[int, int]:
+        """
+        Parses a port range.
+        :param name: The name of the rule.
+        :type name: str
+        :param value: The port range.
+        :type value: str
+        :return: The inclusive interval.
+        :rtype: Tuple[int, int]
+        """
+        text = str(value).strip()
+        if text == "*":
+            return (0, 65535)
+        low, _, high = text.partition("-")
+        try:
+            result = (int(low), int(high or low))
+        except ValueError:
+            raise ValueError(f"Invalid port range for security rule {name}: {value}")
+        if not (0 <= result[0] <= result[1] <= 65535):
+            raise ValueError(f"Invalid port range for security rule {name}: {value}")
+        return result
+
+    @classmethod
+    def _parse_address_prefix(cls, name: str, value: str) -> Tuple:
+        """
+        Parses an address prefix.
+        :param name: The name of the rule.
+        :type name: str
+        :param value: The prefix.
+        :type value: str
+        :return: ("*",) for any address, ("tag", name) for service tags, or
+        (ip version, first address, last address) for CIDRs.
+        :rtype: Tuple
+        """
+        text = str(value).strip()
+        if text in cls._any_address:
+            return ("*",)
+        if not text:
+            raise ValueError(f"Empty address prefix for security rule {name}")
+        if text[0].isdigit() or ":" in text:
+            try:
+                network = ipaddress.ip_network(text, strict=False)
+            except ValueError:
+                raise ValueError(
+                    f"Invalid address prefix for security rule {name}: {value}"
+                )
+            return (
+                network.version,
+                int(network.network_address),
+                int(network.broadcast_address),
+            )
+        return ("tag", text)
+
+    @classmethod
+    def _ports_cover(cls, outer: Tuple[int, int], inner: Tuple[int, int]) -> bool:
+        """
+        Checks whether a port interval contains another.
+        :param outer: The containing interval.
+        :type outer: Tuple[int, int]
+        :param inner: The contained interval.
+        :type inner: Tuple[int, int]
+        :return: True in such case.
+        :rtype: bool
+        """
+        return outer[0] <= inner[0] and inner[1] <= outer[1]
+
+    @classmethod
+    def _ports_intersect(cls, first: Tuple[int, int], second: Tuple[int, int]) -> bool:
+        """
+        Checks whether two port intervals intersect.
+        :param first: The first interval.
+        :type first: Tuple[int, int]
+        :param second: The second interval.
+        :type second: Tuple[int, int]
+        :return: True in such case.
+        :rtype: bool
+        """
+        return first[0] <= second[1] and second[0] <= first[1]
+
+    @classmethod
+    def _addresses_cover(cls, outer: Tuple, inner: Tuple) -> bool:
+        """
+        Checks whether an address prefix contains another.
+        :param outer: The containing prefix, parsed.
+        :type outer: Tuple
+        :param inner: The contained prefix, parsed.
+        :type inner: Tuple
+        :return: True in such case.
+        :rtype: bool
+        """
+        if outer[0] == "*":
+            return True
+        if inner[0] == "*" or outer[0] != inner[0]:
+            return False
+        if outer[0] == "tag":
+            return outer[1] == inner[1]
+        return outer[1] <= inner[1] and inner[2] <= outer[2]
+
+    @classmethod
+    def _addresses_intersect(cls, first: Tuple, second: Tuple) -> bool:
+        """
+        Checks whether two address prefixes may intersect. Service tags are
+        assumed to intersect with any CIDR.
+        :param first: The first prefix, parsed.
+        :type first: Tuple
+        :param second: The second prefix, parsed.
+        :type second: Tuple
+        :return: True in such case.
+        :rtype: bool
+        """
+        if first[0] == "*" or second[0] == "*":
+            return True
+        if first[0] == "tag" and second[0] == "tag":
+            return first[1] == second[1]
+        if first[0] == "tag" or second[0] == "tag":
+            return True
+        if first[0] != second[0]:
+            return False
+        return first[1] <= second[2] and second[1] <= first[2]
+
+    def covers(self, other: "SecurityRule") -> bool:
+        """
+        Checks whether every packet matching another rule matches this one.
+        :param other: The other rule.
+        :type other: pythoneda.shared.iac.pulumi.azure.SecurityRule
+        :return: True in such case.
+        :rtype: bool
+        """
+        return (
+            self.direction == other.direction
+            and self.protocol in ("*", other.protocol)
+            and self._ports_cover(self._source_ports, other._source_ports)
+            and self._ports_cover(self._destination_ports, other._destination_ports)
+            and self._addresses_cover(self._source_addresses, other._source_addresses)
+            and self._addresses_cover(
+                self._destination_addresses, other._destination_addresses
+            )
+        )
+
+    def overlaps(self, other: "SecurityRule") -> bool:
+        """
+        Checks whether some packet may match both this and another rule.
+        :param other: The other rule.
+        :type other: pythoneda.shared.iac.pulumi.azure.SecurityRule
+        :return: True in such case.
+        :rtype: bool
+        """
+        return (
+            self.direction == other.direction
+            and (
+                "*" in (self.protocol, other.protocol)
+                or self.protocol == other.protocol
+            )
+            and self._ports_intersect(self._source_ports, other._source_ports)
+            and self._ports_intersect(self._destination_ports, other._destination_ports)
+            and self._addresses_intersect(
+                self._source_addresses, other._source_addresses
+            )
+            and self._addresses_intersect(
+                self._destination_addresses, other._destination_addresses
+            )
+        )
+
+    def to_args(self) -> pulumi_azure_native.network.SecurityRuleArgs:
+        """
+        Converts this rule to Pulumi arguments.
+        :return: The arguments.
+        :rtype: pulumi_azure_native.network.SecurityRuleArgs
+        """
+        return pulumi_azure_native.network.SecurityRuleArgs(
+            name=self.name,
+            priority=self.priority,
+            direction=self.direction,
+            access=self.access,
+            protocol=self.protocol,
+            source_port_range=self.source_port_range,
+            destination_port_range=self.destination_port_range,
+            source_address_prefix=self.source_address_prefix,
+            destination_address_prefix=self.destination_address_prefix,
+        )
+
+    def __repr__(self) -> str:
+        """
+        Represents this rule as text.
+        :return: Such text.
+        :rtype: str
+        """
+        return (
+            f"SecurityRule({self.name}, {self.priority}, {self.direction}, "
+            f"{self.access}, {self.protocol}, {self.source_address_prefix}:"
+            f"{self.source_port_range} -> {self.destination_address_prefix}:"
+            f"{self.destination_port_range})"
+        )
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
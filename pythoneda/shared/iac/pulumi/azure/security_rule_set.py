@@ -0,0 +1,460 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/security_rule_set.py
+
+This script defines the SecurityRuleSet class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .security_rule import SecurityRule
+from bisect import bisect_left, bisect_right
+import math
+import pulumi_azure_native
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class _PrefixIndex:
+    """
+    An index of parsed address prefixes, to find the ones intersecting a
+    prefix without scanning them all.
+
+    CIDRs are either nested or disjoint, so the ones intersecting a CIDR are
+    those starting within it, found by bisection, and its supernets, looked
+    up by prefix length. "*" intersects everything, and service tags are
+    assumed to intersect any CIDR.
+    """
+
+    _bits = {4: 32, 6: 128}
+
+    def __init__(self, prefixes: Iterable[Tuple[Tuple, int]]):
+        """
+        Creates a new _PrefixIndex instance.
+        :param prefixes: Each parsed prefix, and the position of its rule.
+        :type prefixes: Iterable[Tuple[Tuple, int]]
+        """
+        self._any: List[int] = []
+        self._tags: Dict[str, List[int]] = {}
+        self._tagged: List[int] = []
+        self._cidrs: Dict[Tuple, List[int]] = {}
+        starts: Dict[int, List[Tuple[int, int, int]]] = {}
+        for prefix, position in prefixes:
+            if prefix[0] == "*":
+                self._any.append(position)
+            elif prefix[0] == "tag":
+                self._tags.setdefault(prefix[1], []).append(position)
+                self._tagged.append(position)
+            else:
+                self._cidrs.setdefault(prefix, []).append(position)
+                starts.setdefault(prefix[0], []).append(
+                    (prefix[1], prefix[2], position)
+                )
+        self._starts = {version: sorted(entries) for version, entries in starts.items()}
+        self._cidr_count = sum(len(entries) for entries in starts.values())
+
+    def _within(self, prefix: Tuple) -> Tuple[List[Tuple[int, int, int]], int, int]:
+        """
+        Finds the CIDRs starting within a CIDR.
+        :param prefix: The CIDR, parsed.
+        :type prefix: Tuple
+        :return: The CIDRs of its version, and the range of the ones found.
+        :rtype: Tuple[List[Tuple[int, int, int]], int, int]
+        """
+        entries = self._starts.get(prefix[0], [])
+        return (
+            entries,
+            bisect_left(entries, (prefix[1],)),
+            bisect_right(entries, (prefix[2], math.inf)),
+        )
+
+    def _supernets(self, prefix: Tuple) -> Iterable[List[int]]:
+        """
+        Finds the CIDRs containing a CIDR and starting before it.
+        :param prefix: The CIDR, parsed.
+        :type prefix: Tuple
+        :return: The positions of each such CIDR.
+        :rtype: Iterable[List[int]]
+        """
+        version, first, last = prefix
+        size = (last - first + 1).bit_length() - 1
+        for length in range(size + 1, self._bits[version] + 1):
+            start = first & ~((1 << length) - 1)
+            if start < first:
+                positions = self._cidrs.get((version, start, start + (1 << length) - 1))
+                if positions is not None:
+                    yield positions
+
+    def count(self, prefix: Tuple) -> int:
+        """
+        Counts the prefixes intersecting a prefix.
+        :param prefix: The prefix, parsed.
+        :type prefix: Tuple
+        :return: Such count.
+        :rtype: int
+        """
+        if prefix[0] == "*":
+            return len(self._any) + len(self._tagged) + self._cidr_count
+        if prefix[0] == "tag":
+            return (
+                len(self._any) + len(self._tags.get(prefix[1], [])) + self._cidr_count
+            )
+        _, low, high = self._within(prefix)
+        return (
+            len(self._any)
+            + len(self._tagged)
+            + high
+            - low
+            + sum(len(positions) for positions in self._supernets(prefix))
+        )
+
+    def candidates(self, prefix: Tuple) -> Iterable[int]:
+        """
+        Finds the prefixes intersecting a prefix.
+        :param prefix: The prefix, parsed.
+        :type prefix: Tuple
+        :return: The positions of their rules.
+        :rtype: Iterable[int]
+        """
+        yield from self._any
+        if prefix[0] == "*" or prefix[0] == "tag":
+            if prefix[0] == "*":
+                yield from self._tagged
+            else:
+                yield from self._tags.get(prefix[1], [])
+            for positions in self._cidrs.values():
+                yield from positions
+            return
+        yield from self._tagged
+        entries, low, high = self._within(prefix)
+        for index in range(low, high):
+            yield entries[index][2]
+        for positions in self._supernets(prefix):
+            yield from positions
+
+
+class _PortIndex:
+    """
+    An index of port intervals, to find the ones intersecting an interval
+    without scanning them all.
+
+    The intervals intersecting [low, high] either contain low, found by
+    walking a segment tree over the 65,536 ports from its root to low, or
+    start after low and no later than high, found by bisection.
+    """
+
+    _last_port = 65535
+
+    def __init__(self, intervals: Iterable[Tuple[Tuple[int, int], int]]):
+        """
+        Creates a new _PortIndex instance.
+        :param intervals: Each inclusive port interval, and the position of
+        its rule.
+        :type intervals: Iterable[Tuple[Tuple[int, int], int]]
+        """
+        self._nodes: Dict[int, List[int]] = {}
+        starts: List[Tuple[int, int]] = []
+        ends: List[int] = []
+        for (low, high), position in intervals:
+            self._insert(low, high, position)
+            starts.append((low, position))
+            ends.append(high)
+        self._starts = sorted(starts)
+        self._ends = sorted(ends)
+
+    def _insert(self, low: int, high: int, position: int):
+        """
+        Stores an interval in the nodes of the segment tree it spans.
+        :param low: The first port.
+        :type low: int
+        :param high: The last port.
+        :type high: int
+        :param position: The position of its rule.
+        :type position: int
+        """
+        pending = [(1, 0, self._last_port)]
+        while pending:
+            node, first, last = pending.pop()
+            if low <= first and last <= high:
+                self._nodes.setdefault(node, []).append(position)
+                continue
+            middle = (first + last) // 2
+            if low <= middle:
+                pending.append((2 * node, first, middle))
+            if high > middle:
+                pending.append((2 * node + 1, middle + 1, last))
+
+    def count(self, ports: Tuple[int, int]) -> int:
+        """
+        Counts the intervals intersecting an interval: all but the ones
+        starting after it, and the ones ending before it.
+        :param ports: The interval.
+        :type ports: Tuple[int, int]
+        :return: Such count.
+        :rtype: int
+        """
+        low, high = ports
+        return bisect_right(self._starts, (high, math.inf)) - bisect_left(
+            self._ends, low
+        )
+
+    def candidates(self, ports: Tuple[int, int]) -> Iterable[int]:
+        """
+        Finds the intervals intersecting an interval.
+        :param ports: The interval.
+        :type ports: Tuple[int, int]
+        :return: The positions of their rules.
+        :rtype: Iterable[int]
+        """
+        low, high = ports
+        node, first, last = 1, 0, self._last_port
+        while True:
+            yield from self._nodes.get(node, [])
+            if first == last:
+                break
+            middle = (first + last) // 2
+            if low <= middle:
+                node, last = 2 * node, middle
+            else:
+                node, first = 2 * node + 1, middle + 1
+        for index in range(
+            bisect_right(self._starts, (low, math.inf)),
+            bisect_right(self._starts, (high, math.inf)),
+        ):
+            yield self._starts[index][1]
+
+
+class SecurityRuleSet:
+    """
+    The rules of an Azure Network Security Group.
+
+    Rules are indexed by (direction, priority) and by name. To find
+    overlaps, rules are bucketed by direction and protocol, and their source
+    and destination prefixes and destination ports are indexed; each rule is
+    compared only with the rules of compatible buckets intersecting it on
+    whichever of them selects the fewest. Counting candidates is logarithmic, so the cost follows
+    the candidates compared rather than every pair, unless most rules use
+    the same wide prefixes.
+
+    Class name: SecurityRuleSet
+
+    Responsibilities:
+        - Index security rules by priority and name.
+        - Find duplicated priorities and names, overlapping and shadowed rules.
+        - Reject invalid rule sets before they reach Azure.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.SecurityRule
+    """
+
+    def __init__(self, rules: Iterable[SecurityRule]):
+        """
+        Creates a new SecurityRuleSet instance.
+        :param rules: The rules.
+        :type rules: Iterable[pythoneda.shared.iac.pulumi.azure.SecurityRule]
+        """
+        self._rules = sorted(rules, key=lambda rule: (rule.direction, rule.priority))
+        self._by_priority: Dict[Tuple[str, int], SecurityRule] = {}
+        self._by_name: Dict[str, SecurityRule] = {}
+        self._duplicated_priorities: List[Tuple[SecurityRule, SecurityRule]] = []
+        self._duplicated_names: List[Tuple[SecurityRule, SecurityRule]] = []
+        for rule in self._rules:
+            key = (rule.direction, rule.priority)
+            existing = self._by_priority.setdefault(key, rule)
+            if existing is not rule:
+                self._duplicated_priorities.append((existing, rule))
+            existing = self._by_name.setdefault(rule.name, rule)
+            if existing is not rule:
+                self._duplicated_names.append((existing, rule))
+        self._overlaps: Optional[List[Tuple[SecurityRule, SecurityRule]]] = None
+
+    @property
+    def rules(self) -> List[SecurityRule]:
+        """
+        Retrieves the rules, by direction and priority.
+        :return: Such rules.
+        :rtype: List[pythoneda.shared.iac.pulumi.azure.SecurityRule]
+        """
+        return list(self._rules)
+
+    def __len__(self) -> int:
+        """
+        Retrieves the number of rules.
+        :return: Such number.
+        :rtype: int
+        """
+        return len(self._rules)
+
+    def by_priority(self, direction: str, priority: int) -> Optional[SecurityRule]:
+        """
+        Retrieves the rule with given direction and priority.
+        :param direction: Either "Inbound" or "Outbound".
+        :type direction: str
+        :param priority: The priority.
+        :type priority: int
+        :return: The rule, or None if not found.
+        :rtype: pythoneda.shared.iac.pulumi.azure.SecurityRule
+        """
+        return self._by_priority.get((direction, priority))
+
+    def by_name(self, name: str) -> Optional[SecurityRule]:
+        """
+        Retrieves the rule with given name.
+        :param name: The name.
+        :type name: str
+        :return: The rule, or None if not found.
+        :rtype: pythoneda.shared.iac.pulumi.azure.SecurityRule
+        """
+        return self._by_name.get(name)
+
+    def duplicated_priorities(self) -> List[Tuple[SecurityRule, SecurityRule]]:
+        """
+        Retrieves the rules sharing direction and priority.
+        :return: Pairs of such rules.
+        :rtype: List[Tuple[pythoneda.shared.iac.pulumi.azure.SecurityRule, pythoneda.shared.iac.pulumi.azure.SecurityRule]]
+        """
+        return list(self._duplicated_priorities)
+
+    def duplicated_names(self) -> List[Tuple[SecurityRule, SecurityRule]]:
+        """
+        Retrieves the rules sharing name.
+        :return: Pairs of such rules.
+        :rtype: List[Tuple[pythoneda.shared.iac.pulumi.azure.SecurityRule, pythoneda.shared.iac.pulumi.azure.SecurityRule]]
+        """
+        return list(self._duplicated_names)
+
+    def overlaps(self) -> List[Tuple[SecurityRule, SecurityRule]]:
+        """
+        Retrieves the pairs of rules some packet may match, the one evaluated
+        first (lower priority number) first.
+        :return: Such pairs.
+        :rtype: List[Tuple[pythoneda.shared.iac.pulumi.azure.SecurityRule, pythoneda.shared.iac.pulumi.azure.SecurityRule]]
+        """
+        if self._overlaps is None:
+            result = []
+            for direction in SecurityRule._directions:
+                rules = [rule for rule in self._rules if rule.direction == direction]
+                buckets: Dict[str, List[int]] = {}
+                for position, rule in enumerate(rules):
+                    buckets.setdefault(rule.protocol, []).append(position)
+                indexes = {
+                    protocol: (
+                        _PrefixIndex(
+                            (rules[position].source_addresses, position)
+                            for position in positions
+                        ),
+                        _PrefixIndex(
+                            (rules[position].destination_addresses, position)
+                            for position in positions
+                        ),
+                        _PortIndex(
+                            (rules[position].destination_ports, position)
+                            for position in positions
+                        ),
+                    )
+                    for protocol, positions in buckets.items()
+                }
+                for position, rule in enumerate(rules):
+                    keys = (
+                        rule.source_addresses,
+                        rule.destination_addresses,
+                        rule.destination_ports,
+                    )
+                    for protocol, bucket in indexes.items():
+                        if "*" not in (protocol, rule.protocol) and (
+                            protocol != rule.protocol
+                        ):
+                            continue
+                        index, key = min(
+                            zip(bucket, keys),
+                            key=lambda pair: pair[0].count(pair[1]),
+                        )
+                        for candidate in index.candidates(key):
+                            if candidate >= position:
+                                continue
+                            other = rules[candidate]
+                            if other.overlaps(rule):
+                                result.append(
+                                    (other, rule)
+                                    if other.priority <= rule.priority
+                                    else (rule, other)
+                                )
+            result.sort(key=lambda pair: (pair[0].direction, pair[0].priority))
+            self._overlaps = result
+        return list(self._overlaps)
+
+    def conflicts(self) -> List[Tuple[SecurityRule, SecurityRule]]:
+        """
+        Retrieves the overlapping rules with different access, where the
+        priority decides whether a packet is allowed.
+        :return: Such pairs, the one evaluated first first.
+        :rtype: List[Tuple[pythoneda.shared.iac.pulumi.azure.SecurityRule, pythoneda.shared.iac.pulumi.azure.SecurityRule]]
+        """
+        return [pair for pair in self.overlaps() if pair[0].access != pair[1].access]
+
+    def shadowed(self) -> List[Tuple[SecurityRule, SecurityRule]]:
+        """
+        Retrieves the rules that never match, because a single rule evaluated
+        before covers them.
+        :return: Pairs of (covering rule, shadowed rule).
+        :rtype: List[Tuple[pythoneda.shared.iac.pulumi.azure.SecurityRule, pythoneda.shared.iac.pulumi.azure.SecurityRule]]
+        """
+        return [
+            (first, second)
+            for first, second in self.overlaps()
+            if first.priority < second.priority and first.covers(second)
+        ]
+
+    def problems(self) -> List[str]:
+        """
+        Describes why this rule set would be rejected.
+        :return: The problems found, if any.
+        :rtype: List[str]
+        """
+        result = [
+            f"{first.name} and {second.name} share {first.direction} priority "
+            f"{first.priority}"
+            for first, second in self._duplicated_priorities
+        ]
+        result.extend(
+            f"Security rule name {first.name} is duplicated"
+            for first, _ in self._duplicated_names
+        )
+        result.extend(
+            f"{second.name} (priority {second.priority}) is shadowed by "
+            f"{first.name} (priority {first.priority})"
+            for first, second in self.shadowed()
+        )
+        return result
+
+    def validate(self):
+        """
+        Checks this rule set is valid.
+        :raise ValueError: If there are duplicated priorities or names, or
+        shadowed rules.
+        """
+        problems = self.problems()
+        if problems:
+            raise ValueError("Invalid security rules: " + "; ".join(problems))
+
+    def to_args(self) -> List[pulumi_azure_native.network.SecurityRuleArgs]:
+        """
+        Converts the rules to Pulumi arguments.
+        :return: The arguments.
+        :rtype: List[pulumi_azure_native.network.SecurityRuleArgs]
+        """
+        return [rule.to_args() for rule in self._rules]
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
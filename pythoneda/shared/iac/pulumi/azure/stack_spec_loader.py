@@ -0,0 +1,371 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/stack_spec_loader.py
+
+This script defines the StackSpecLoader class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .azure_resource import AzureResource
+from collections import deque
+import importlib
+import inspect
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Set
+
+
+class StackSpecLoader:
+    """
+    Builds AzureResource instances out of a declarative stack spec.
+
+    A spec is a sequence of entries such as:
+
+        {"id": "rg", "type": "ResourceGroup"}
+        {"id": "sa", "type": "FunctionStorageAccount",
+         "args": {"resourceGroup": {"ref": "rg"}}}
+
+    "type" is a class exported by pythoneda.shared.iac.pulumi.azure, or a
+    "module:Class" path. "args" are the constructor parameters, by name;
+    missing ones are None, so the resource uses its defaults. {"ref": id}
+    stands for the instance declared with that id, anywhere in "args".
+    "stackName", "projectName" and "location" default to the loader's.
+
+    Entries can come in any order. Each one is instantiated as soon as all the
+    entries it references are, so a spec is processed in a single pass, in
+    time linear to its size.
+
+    Class name: StackSpecLoader
+
+    Responsibilities:
+        - Read stack specs from JSON, JSON Lines and YAML files, incrementally.
+        - Instantiate the declared resources in dependency order.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.AzureResource
+    """
+
+    _chunk_size = 64 * 1024
+
+    def __init__(self, stackName: str, projectName: str, location: str):
+        """
+        Creates a new StackSpecLoader instance.
+        :param stackName: The default name of the stack.
+        :type stackName: str
+        :param projectName: The default name of the project.
+        :type projectName: str
+        :param location: The default Azure location.
+        :type location: str
+        """
+        self._stack_name = stackName
+        self._project_name = projectName
+        self._location = location
+        self._classes = {}
+        self._parameters = {}
+
+    @property
+    def stack_name(self) -> str:
+        """
+        Retrieves the default name of the stack.
+        :return: Such name.
+        :rtype: str
+        """
+        return self._stack_name
+
+    @property
+    def project_name(self) -> str:
+        """
+        Retrieves the default name of the project.
+        :return: Such name.
+        :rtype: str
+        """
+        return self._project_name
+
+    @property
+    def location(self) -> str:
+        """
+        Retrieves the default Azure location.
+        :return: Such location.
+        :rtype: str
+        """
+        return self._location
+
+    def load(self, path: str) -> Dict[str, AzureResource]:
+        """
+        Loads a stack spec file. The format depends on the extension:
+        ".jsonl"/".ndjson" (an entry per line), ".json" (an array of entries),
+        or ".yaml"/".yml" (documents holding an entry or a list of entries).
+        :param path: The path of the file.
+        :type path: str
+        :return: The instances, by id, in dependency order.
+        :rtype: Dict[str, pythoneda.shared.iac.pulumi.azure.AzureResource]
+        """
+        extension = os.path.splitext(path)[1].lower()
+        with open(path, "r", encoding="utf-8") as spec:
+            if extension in (".jsonl", ".ndjson"):
+                entries = self.read_json_lines(spec)
+            elif extension == ".json":
+                entries = self.read_json_array(spec)
+            elif extension in (".yaml", ".yml"):
+                entries = self.read_yaml(spec)
+            else:
+                raise ValueError(f"Unsupported stack spec format: {path}")
+            return self.instantiate(entries)
+
+    @classmethod
+    def read_json_lines(cls, stream: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Reads entries from JSON Lines.
+        :param stream: The lines.
+        :type stream: Iterable[str]
+        :return: The entries.
+        :rtype: Iterator[Dict[str, Any]]
+        """
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+    @classmethod
+    def read_json_array(cls, stream) -> Iterator[Dict[str, Any]]:
+        """
+        Reads entries from a JSON array, one element at a time, so the file is
+        never loaded whole.
+        :param stream: The text stream.
+        :type stream: io.TextIOBase
+        :return: The entries.
+        :rtype: Iterator[Dict[str, Any]]
+        """
+        decoder = json.JSONDecoder()
+        buffer = ""
+        position = 0
+        started = False
+        eof = False
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer) and not eof:
+                chunk = stream.read(cls._chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            if not started:
+                if buffer[position : position + 1] != "[":
+                    raise ValueError("A JSON stack spec must be an array of entries")
+                started = True
+                position += 1
+                continue
+            if buffer[position : position + 1] == "]":
+                return
+            if position == len(buffer):
+                raise ValueError("Unterminated JSON stack spec")
+            try:
+                entry, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = stream.read(cls._chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield entry
+            position = end
+
+    @classmethod
+    def read_yaml(cls, stream) -> Iterator[Dict[str, Any]]:
+        """
+        Reads entries from a YAML stream, one document at a time. Requires
+        PyYAML.
+        :param stream: The text stream.
+        :type stream: io.TextIOBase
+        :return: The entries.
+        :rtype: Iterator[Dict[str, Any]]
+        """
+        import yaml
+
+        for document in yaml.safe_load_all(stream):
+            if isinstance(document, list):
+                yield from document
+            elif document is not None:
+                yield document
+
+    def instantiate(
+        self,
+        entries: Iterable[Dict[str, Any]],
+        existing: Dict[str, AzureResource] = None,
+    ) -> Dict[str, AzureResource]:
+        """
+        Instantiates the resources declared by given entries.
+        :param entries: The entries.
+        :type entries: Iterable[Dict[str, Any]]
+        :param existing: Instances the entries can reference, by id, if any.
+        :type existing: Dict[str, pythoneda.shared.iac.pulumi.azure.AzureResource]
+        :return: The instances, by id, in dependency order, after the existing
+        ones.
+        :rtype: Dict[str, pythoneda.shared.iac.pulumi.azure.AzureResource]
+        """
+        instances = dict(existing) if existing else {}
+        declared: Set[str] = set(instances)
+        waiting: Dict[str, List[Dict[str, Any]]] = {}
+        unresolved: Dict[str, int] = {}
+
+        for entry in entries:
+            entry_id = entry.get("id")
+            if not entry_id:
+                raise ValueError(f"Stack spec entry without id: {entry}")
+            if entry_id in declared:
+                raise ValueError(f"Duplicated id in stack spec: {entry_id}")
+            declared.add(entry_id)
+            pending = self._references(entry.get("args", {})) - instances.keys()
+            if pending:
+                unresolved[entry_id] = len(pending)
+                for reference in pending:
+                    waiting.setdefault(reference, []).append(entry)
+                continue
+            ready = deque([entry])
+            while ready:
+                current = ready.popleft()
+                instances[current["id"]] = self._instantiate(current, instances)
+                for waiter in waiting.pop(current["id"], ()):
+                    unresolved[waiter["id"]] -= 1
+                    if unresolved[waiter["id"]] == 0:
+                        del unresolved[waiter["id"]]
+                        ready.append(waiter)
+
+        if unresolved:
+            unknown = sorted(waiting.keys() - declared)
+            if unknown:
+                raise ValueError(
+                    f"Stack spec references undeclared ids: {', '.join(unknown)}"
+                )
+            raise ValueError(
+                "Stack spec has circular dependencies among: "
+                f"{', '.join(sorted(unresolved))}"
+            )
+        return instances
+
+    @classmethod
+    def _references(cls, value: Any) -> Set[str]:
+        """
+        Collects the ids referenced by given value.
+        :param value: The value.
+        :type value: Any
+        :return: The referenced ids.
+        :rtype: Set[str]
+        """
+        result = set()
+        stack = [value]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, dict):
+                if cls._is_reference(current):
+                    result.add(current["ref"])
+                else:
+                    stack.extend(current.values())
+            elif isinstance(current, list):
+                stack.extend(current)
+        return result
+
+    @classmethod
+    def _is_reference(cls, value: Dict[str, Any]) -> bool:
+        """
+        Checks whether given mapping is a reference.
+        :param value: The mapping.
+        :type value: Dict[str, Any]
+        :return: True in such case.
+        :rtype: bool
+        """
+        return len(value) == 1 and "ref" in value
+
+    @classmethod
+    def _resolve(cls, value: Any, instances: Dict[str, AzureResource]) -> Any:
+        """
+        Replaces the references in given value with their instances.
+        :param value: The value.
+        :type value: Any
+        :param instances: The instances, by id.
+        :type instances: Dict[str, pythoneda.shared.iac.pulumi.azure.AzureResource]
+        :return: The resolved value.
+        :rtype: Any
+        """
+        if isinstance(value, dict):
+            if cls._is_reference(value):
+                return instances[value["ref"]]
+            return {key: cls._resolve(item, instances) for key, item in value.items()}
+        if isinstance(value, list):
+            return [cls._resolve(item, instances) for item in value]
+        return value
+
+    def _class_for(self, typeName: str) -> type:
+        """
+        Retrieves the class for given spec type.
+        :param typeName: The type, either a class name or a "module:Class" path.
+        :type typeName: str
+        :return: The class.
+        :rtype: type
+        """
+        result = self._classes.get(typeName)
+        if result is None:
+            module_name, _, class_name = typeName.rpartition(":")
+            module = importlib.import_module(module_name or __package__)
+            result = getattr(module, class_name, None)
+            if not (isinstance(result, type) and issubclass(result, AzureResource)):
+                raise ValueError(f"Unknown resource type in stack spec: {typeName}")
+            self._classes[typeName] = result
+            self._parameters[result] = [
+                name
+                for name in inspect.signature(result.__init__).parameters
+                if name != "self"
+            ]
+        return result
+
+    def _instantiate(
+        self, entry: Dict[str, Any], instances: Dict[str, AzureResource]
+    ) -> AzureResource:
+        """
+        Instantiates the resource declared by given entry.
+        :param entry: The entry.
+        :type entry: Dict[str, Any]
+        :param instances: The instances created so far, by id.
+        :type instances: Dict[str, pythoneda.shared.iac.pulumi.azure.AzureResource]
+        :return: The instance.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AzureResource
+        """
+        cls = self._class_for(entry.get("type", ""))
+        parameters = self._parameters[cls]
+        args = self._resolve(entry.get("args", {}), instances)
+        unknown = args.keys() - set(parameters)
+        if unknown:
+            raise ValueError(
+                f"Unknown arguments for {cls.__name__} ({entry['id']}): "
+                f"{', '.join(sorted(unknown))}"
+            )
+        defaults = {
+            "stackName": self.stack_name,
+            "projectName": self.project_name,
+            "location": self.location,
+        }
+        return cls(
+            **{
+                name: args[name] if name in args else defaults.get(name)
+                for name in parameters
+            }
+        )
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -24,21 +24,42 @@ from .azure_resource import AzureResource
 from .resource_group import ResourceGroup
 import pulumi
 import pulumi_azure_native
+from typing import List
 
 
 class StorageAccount(AzureResource, abc.ABC):
     """
     Azure Storage Account customized for Licdata.
 
+    Besides general-purpose v2 accounts, premium block blob (BlockBlobStorage)
+    and premium file (FileStorage) accounts are supported, as are zone- and
+    geo-zone-redundant SKUs, the default access tier of blobs, hierarchical
+    namespace and large file shares. Combinations Azure rejects are reported
+    when the account is defined. Hierarchical namespace and large file
+    shares cannot be disabled once the account is created.
+
     Class name: StorageAccount
 
     Responsibilities:
         - Define logic to define Azure Storage Accounts for Licdata.
+        - Validate the combination of kind, SKU and features.
 
     Collaborators:
         - None
     """
 
+    kinds = ("StorageV2", "Storage", "BlobStorage", "BlockBlobStorage", "FileStorage")
+    standard_sku_types = (
+        "Standard_LRS",
+        "Standard_GRS",
+        "Standard_RAGRS",
+        "Standard_ZRS",
+        "Standard_GZRS",
+        "Standard_RAGZRS",
+    )
+    premium_sku_types = ("Premium_LRS", "Premium_ZRS")
+    access_tiers = ("Hot", "Cool", "Cold")
+
     def __init__(
         self,
         stackName: str,
@@ -49,6 +70,9 @@ class StorageAccount(AzureResource, abc.ABC):
         skuType: str,
         allowBlobPublicAccess: bool,
         resourceGroup: ResourceGroup,
+        accessTier: str = None,
+        isHnsEnabled: bool = None,
+        largeFileShares: bool = None,
     ):
         """
         Creates a new StorageAccount instance.
@@ -68,10 +92,30 @@ class StorageAccount(AzureResource, abc.ABC):
         :type allowBlobPublicAccess: bool
         :param resourceGroup: The ResourceGroup.
         :type resourceGroup: pythoneda.iac.pulumi.azure.ResourceGroup
+        :param accessTier: The default access tier of blobs: Hot, Cool or
+        Cold. Defaults to Hot, for standard accounts.
+        :type accessTier: str
+        :param isHnsEnabled: Whether to enable hierarchical namespace (Data
+        Lake Storage Gen2).
+        :type isHnsEnabled: bool
+        :param largeFileShares: Whether to enable file shares up to 100 TiB.
+        :type largeFileShares: bool
         """
         self._kind = kind
         self._sku_type = skuType
         self._allow_blob_public_access = allowBlobPublicAccess
+        self._access_tier = accessTier
+        self._is_hns_enabled = isHnsEnabled
+        self._large_file_shares = largeFileShares
+        problems = self.problems(
+            self.kind,
+            self.sku_type,
+            self.access_tier,
+            self.is_hns_enabled,
+            self.large_file_shares,
+        )
+        if problems:
+            raise ValueError("; ".join(problems))
         super().__init__(
             stackName, projectName, location, {"resource_group": resourceGroup}
         )
@@ -107,6 +151,110 @@ class StorageAccount(AzureResource, abc.ABC):
             else True
         )
 
+    @property
+    def access_tier(self) -> str:
+        """
+        Retrieves the default access tier of blobs.
+        :return: Such tier, or None for the default one.
+        :rtype: str
+        """
+        return self._access_tier
+
+    @property
+    def is_hns_enabled(self) -> bool:
+        """
+        Retrieves whether hierarchical namespace is enabled.
+        :return: Such condition.
+        :rtype: bool
+        """
+        return self._is_hns_enabled if self._is_hns_enabled is not None else False
+
+    @property
+    def large_file_shares(self) -> bool:
+        """
+        Retrieves whether large file shares are enabled.
+        :return: Such condition.
+        :rtype: bool
+        """
+        return self._large_file_shares if self._large_file_shares is not None else False
+
+    @classmethod
+    def problems(
+        cls,
+        kind: str,
+        skuType: str,
+        accessTier: str,
+        isHnsEnabled: bool,
+        largeFileShares: bool,
+    ) -> List[str]:
+        """
+        Describes why a combination of kind, SKU and features is not valid.
+        :param kind: The account kind.
+        :type kind: str
+        :param skuType: The SKU type.
+        :type skuType: str
+        :param accessTier: The default access tier, if any.
+        :type accessTier: str
+        :param isHnsEnabled: Whether hierarchical namespace is enabled.
+        :type isHnsEnabled: bool
+        :param largeFileShares: Whether large file shares are enabled.
+        :type largeFileShares: bool
+        :return: The problems found, if any.
+        :rtype: List[str]
+        """
+        result = []
+        if kind not in cls.kinds:
+            result.append(
+                f"Unknown storage account kind {kind!r}, use one of "
+                f"{', '.join(cls.kinds)}"
+            )
+        if skuType not in cls.standard_sku_types + cls.premium_sku_types:
+            result.append(f"Unknown storage account SKU {skuType!r}")
+        if result:
+            return result
+        premium = skuType in cls.premium_sku_types
+        if kind in ("BlockBlobStorage", "FileStorage") and not premium:
+            result.append(f"{kind} accounts need a premium SKU, not {skuType}")
+        if premium and kind == "BlobStorage":
+            result.append("BlobStorage accounts support standard SKUs only")
+        if skuType == "Premium_ZRS" and kind in ("StorageV2", "Storage"):
+            result.append(
+                f"{kind} accounts support Premium_LRS only, for page blobs; use "
+                "BlockBlobStorage or FileStorage for Premium_ZRS"
+            )
+        if kind in ("Storage", "BlobStorage") and "ZRS" in skuType and not premium:
+            result.append(f"{kind} accounts do not support {skuType}")
+        if accessTier is not None:
+            if accessTier not in cls.access_tiers:
+                result.append(
+                    f"Unknown access tier {accessTier!r}, use one of "
+                    f"{', '.join(cls.access_tiers)}"
+                )
+            elif premium or kind not in ("StorageV2", "BlobStorage"):
+                result.append(
+                    "Access tiers apply to standard StorageV2 and BlobStorage "
+                    "accounts only"
+                )
+            elif accessTier == "Cold" and kind != "StorageV2":
+                result.append("The Cold access tier needs a StorageV2 account")
+        if isHnsEnabled and not (
+            (kind == "StorageV2" and not premium) or kind == "BlockBlobStorage"
+        ):
+            result.append(
+                "Hierarchical namespace needs a standard StorageV2 or a "
+                "BlockBlobStorage account"
+            )
+        if largeFileShares:
+            if kind == "FileStorage":
+                result.append("FileStorage accounts always support large file shares")
+            elif kind != "StorageV2" or premium:
+                result.append("Large file shares need a standard StorageV2 account")
+            elif skuType.startswith("Standard_RA"):
+                result.append(
+                    f"Large file shares do not support read-access SKUs like {skuType}"
+                )
+        return result
+
     @classmethod
     @property
     def type(cls) -> str:
@@ -133,6 +281,9 @@ class StorageAccount(AzureResource, abc.ABC):
             sku=pulumi_azure_native.storage.SkuArgs(name=self.sku_type),
             allow_blob_public_access=self.allow_blob_public_access,
             kind=self.kind,
+            access_tier=self.access_tier,
+            is_hns_enabled=self._is_hns_enabled,
+            large_file_shares_state="Enabled" if self.large_file_shares else None,
         )
 
     @classmethod
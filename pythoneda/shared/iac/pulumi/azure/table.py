@@ -25,6 +25,7 @@ import pulumi
 import pulumi_azure_native
 from .resource_group import ResourceGroup
 from .storage_account import StorageAccount
+from .table_partition_analyzer import TablePartitionAnalysis, TablePartitionAnalyzer
 
 
 class Table(AzureResource):
@@ -35,9 +36,10 @@ class Table(AzureResource):
 
     Responsibilities:
         - Define an Azure Table for Licdata.
+        - Analyze its partition design offline.
 
     Collaborators:
-        - None
+        - pythoneda.shared.iac.pulumi.azure.TablePartitionAnalyzer
     """
 
     def __init__(
@@ -81,6 +83,33 @@ class Table(AzureResource):
         """
         return self._name
 
+    def analyze_partitions(
+        self,
+        entitiesPath: str,
+        accessLogPath: str,
+        projectRewrites: bool = True,
+        delay: int = None,
+    ) -> TablePartitionAnalysis:
+        """
+        Analyzes the partition design of the table from a sample of its
+        entities and an access log.
+        :param entitiesPath: The path of the sample of entities, if any.
+        :type entitiesPath: str
+        :param accessLogPath: The path of the access log.
+        :type accessLogPath: str
+        :param projectRewrites: Whether to project key rewrites of the hot
+        partitions.
+        :type projectRewrites: bool
+        :param delay: The seconds lines of the log can arrive out of order.
+        Defaults to 5.
+        :type delay: int
+        :return: The analysis.
+        :rtype: pythoneda.shared.iac.pulumi.azure.TablePartitionAnalysis
+        """
+        return TablePartitionAnalyzer.analyze(
+            entitiesPath, accessLogPath, self.name, projectRewrites, delay
+        )
+
     @classmethod
     @property
     def type(cls) -> str:
@@ -0,0 +1,560 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/table_partition_analyzer.py
+
+This script defines the TablePartitionAnalyzer class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .partition_key_simulator import _DistinctCounter, _HeavyHitters
+import csv
+from datetime import datetime
+import hashlib
+import json
+import math
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+import zlib
+
+
+class TablePartitionRewrite(NamedTuple):
+    """
+    A candidate rewrite of a hot partition key, and the peak rate and
+    throttled requests projected with it, replaying the access log.
+    """
+
+    strategy: str
+    buckets: int
+    description: str
+    peak_rate: float
+    throttled_requests: float
+    fan_out_requests: float
+
+
+class TablePartitionReport(NamedTuple):
+    """
+    A partition whose request rate exceeds the per-partition target.
+    """
+
+    partition_key: str
+    requests: float
+    peak_rate: float
+    seconds_over_target: int
+    throttled_requests: float
+    rewrites: List[TablePartitionRewrite]
+
+
+class TablePartitionAnalysis(NamedTuple):
+    """
+    The partition design of a table, from a sample of its entities and an
+    access log. Rates are entities per second. Late lines arrived too far
+    out of order to be counted in the per-second rates.
+    """
+
+    table: str
+    entities: int
+    entity_partitions: int
+    largest_partitions: List[Tuple[str, float]]
+    requests: float
+    seconds: int
+    partitions: int
+    busiest_partitions: List[Tuple[str, float]]
+    request_rate_skew: float
+    peak_account_rate: float
+    seconds_over_account_target: int
+    hot_partitions: List[TablePartitionReport]
+    late_lines: int
+    late_requests: float
+
+
+class _PerSecond:
+    """
+    Counts by key and second over a roughly time-ordered stream, handing
+    each second over once no line of it is expected anymore.
+    """
+
+    def __init__(self, callback: Callable[[int, Dict[Any, float]], None], delay: int):
+        """
+        Creates a new counter.
+        :param callback: The function receiving each second and its counts.
+        :type callback: Callable[[int, Dict[Any, float]], None]
+        :param delay: The seconds lines can arrive late.
+        :type delay: int
+        """
+        self._callback = callback
+        self._delay = delay
+        self._seconds: Dict[int, Dict[Any, float]] = {}
+        self._latest = None
+        self.late = 0
+        self.late_weight = 0.0
+
+    def add(self, second: int, key: Any, weight: float):
+        """
+        Counts a key.
+        :param second: The second.
+        :type second: int
+        :param key: The key.
+        :type key: Any
+        :param weight: The weight.
+        :type weight: float
+        """
+        counts = self._seconds.get(second)
+        if counts is None:
+            if self._latest is not None and second < self._latest - self._delay:
+                self.late += 1
+                self.late_weight += weight
+                return
+            counts = self._seconds[second] = {}
+            if self._latest is None or second > self._latest:
+                self._latest = second
+                for expired in [
+                    pending
+                    for pending in self._seconds
+                    if pending < second - self._delay
+                ]:
+                    self._callback(expired, self._seconds.pop(expired))
+        counts[key] = counts.get(key, 0.0) + weight
+
+    def flush(self):
+        """
+        Hands every pending second over.
+        """
+        for second in sorted(self._seconds):
+            self._callback(second, self._seconds.pop(second))
+
+
+class TablePartitionAnalyzer:
+    """
+    Offline analyzer of the partition design of an Azure table.
+
+    Azure Table storage serves each partition from a single server, with a
+    documented target of 2,000 entities per second per partition, and 20,000
+    per account. The analyzer streams a sample of entities (PartitionKey,
+    RowKey and size) and an access log (timestamp, PartitionKey, RowKey and
+    number of entities), counts each partition second by second, and reports
+    the skew, the seconds each partition exceeds its target and the requests
+    that would be throttled then.
+
+    Hot partitions are then replayed under candidate key rewrites: a hash of
+    the RowKey appended to the PartitionKey, into enough buckets for the peak
+    to fit, and the first character of the RowKey. Requests without RowKey,
+    i.e. partition queries, fan out to every bucket.
+
+    Lines are read as CSV, for .csv files, or JSONL; the log is expected in
+    time order, give or take a few seconds (the delay). Lines arriving later
+    are left out of the per-second rates, reported as late, and fail the
+    analysis when they are more than a small share of the log. Memory does
+    not grow with the log: partitions are summarized, and only the current
+    seconds are kept.
+
+    Class name: TablePartitionAnalyzer
+
+    Responsibilities:
+        - Report the request-rate skew and the throttling of partitions.
+        - Project candidate rewrites of hot partition keys.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.Table
+    """
+
+    partition_target = 2000
+    account_target = 20000
+    bucket_utilization = 0.8
+
+    _summary_size = 10000
+
+    def __init__(
+        self,
+        tableName: str = None,
+        topPartitions: int = None,
+        delay: int = None,
+        maxLateFraction: float = None,
+    ):
+        """
+        Creates a new TablePartitionAnalyzer instance.
+        :param tableName: The name of the table, if any.
+        :type tableName: str
+        :param topPartitions: The number of busiest and largest partitions
+        reported. Defaults to 10.
+        :type topPartitions: int
+        :param delay: The seconds lines of the access log can arrive out of
+        order. Later lines are left out of the per-second rates. Defaults
+        to 5.
+        :type delay: int
+        :param maxLateFraction: The share of lines of the access log that can
+        be left out that way before the analysis fails. Defaults to 0.001.
+        :type maxLateFraction: float
+        :raise ValueError: If the delay is negative.
+        """
+        if delay is not None and delay < 0:
+            raise ValueError(f"The delay cannot be negative: {delay}")
+        self._table_name = tableName
+        self._top_partitions = topPartitions
+        self._delay = delay
+        self._max_late_fraction = maxLateFraction
+        self._lines = 0
+        self._late_lines = 0
+        self._late_requests = 0.0
+        self._entities = 0
+        self._largest = _HeavyHitters(self._summary_size)
+        self._entity_partitions = _DistinctCounter()
+        self._requests = 0.0
+        self._busiest = _HeavyHitters(self._summary_size)
+        self._partitions = _DistinctCounter()
+        self._first = None
+        self._last = None
+        self._peak_account_rate = 0.0
+        self._seconds_over_account_target = 0
+        self._over: Dict[str, List[float]] = {}
+
+    @property
+    def delay(self) -> int:
+        """
+        Retrieves the seconds lines of the access log can arrive out of order.
+        :return: Such seconds.
+        :rtype: int
+        """
+        return self._delay if self._delay is not None else 5
+
+    @property
+    def max_late_fraction(self) -> float:
+        """
+        Retrieves the share of lines of the access log that can arrive too
+        late to be counted per second.
+        :return: Such share.
+        :rtype: float
+        """
+        return self._max_late_fraction if self._max_late_fraction is not None else 0.001
+
+    @property
+    def table_name(self) -> str:
+        """
+        Retrieves the name of the table.
+        :return: Such name.
+        :rtype: str
+        """
+        return self._table_name
+
+    @property
+    def top_partitions(self) -> int:
+        """
+        Retrieves the number of busiest and largest partitions reported.
+        :return: Such number.
+        :rtype: int
+        """
+        return self._top_partitions if self._top_partitions is not None else 10
+
+    @classmethod
+    def _hash(cls, partitionKey: str) -> int:
+        """
+        Hashes a partition key, the same in every process.
+        :param partitionKey: The partition key.
+        :type partitionKey: str
+        :return: A 64-bit hash.
+        :rtype: int
+        """
+        return int.from_bytes(
+            hashlib.blake2b(partitionKey.encode("utf-8"), digest_size=8).digest(),
+            "little",
+        )
+
+    @classmethod
+    def rows(cls, path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Reads the rows of a CSV or JSONL file.
+        :param path: The path of the file; CSV if it ends with ".csv".
+        :type path: str
+        :return: The rows.
+        :rtype: Iterator[Dict[str, Any]]
+        """
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            if path.lower().endswith(".csv"):
+                yield from csv.DictReader(file)
+            else:
+                decoder = json.JSONDecoder()
+                for line in file:
+                    line = line.strip()
+                    if line:
+                        yield decoder.decode(line)
+
+    @classmethod
+    def _second(cls, timestamp: Any) -> int:
+        """
+        Retrieves the second of a timestamp.
+        :param timestamp: Seconds since the epoch, or an ISO 8601 timestamp.
+        :type timestamp: Any
+        :return: The second since the epoch.
+        :rtype: int
+        """
+        if isinstance(timestamp, str):
+            try:
+                return int(float(timestamp))
+            except ValueError:
+                return int(datetime.fromisoformat(timestamp).timestamp())
+        return int(timestamp)
+
+    def add_entities(self, rows: Iterable[Dict[str, Any]]):
+        """
+        Adds a sample of entities.
+        :param rows: The entities, with "PartitionKey" and "size", in bytes.
+        :type rows: Iterable[Dict[str, Any]]
+        """
+        for row in rows:
+            partition_key = row["PartitionKey"]
+            self._entities += 1
+            self._largest.add(partition_key, float(row.get("size") or 0))
+            self._entity_partitions.add(self._hash(partition_key))
+
+    def _account_second(self, second: int, counts: Dict[str, float]):
+        """
+        Accounts the counts of a second of the access log.
+        :param second: The second.
+        :type second: int
+        :param counts: The entities accessed, by partition.
+        :type counts: Dict[str, float]
+        """
+        total = sum(counts.values())
+        if total > self._peak_account_rate:
+            self._peak_account_rate = total
+        if total > self.account_target:
+            self._seconds_over_account_target += 1
+        for partition_key, count in counts.items():
+            if count > self.partition_target:
+                over = self._over.setdefault(partition_key, [0, 0.0, 0.0])
+                over[0] += 1
+                over[1] += count - self.partition_target
+                over[2] = max(over[2], count)
+
+    def add_accesses(self, rows: Iterable[Dict[str, Any]]):
+        """
+        Adds an access log.
+        :param rows: The accesses, with "timestamp", "PartitionKey" and,
+        optionally, "RowKey" and "entities", the number of entities read or
+        written, one by default.
+        :type rows: Iterable[Dict[str, Any]]
+        :raise ValueError: If too many lines arrive later than the delay.
+        """
+        seconds = _PerSecond(self._account_second, self.delay)
+        for row in rows:
+            self._lines += 1
+            partition_key = row["PartitionKey"]
+            second = self._second(row["timestamp"])
+            weight = float(row.get("entities") or 1)
+            self._requests += weight
+            self._busiest.add(partition_key, weight)
+            self._partitions.add(self._hash(partition_key))
+            if self._first is None or second < self._first:
+                self._first = second
+            if self._last is None or second > self._last:
+                self._last = second
+            seconds.add(second, partition_key, weight)
+        seconds.flush()
+        self._late_lines += seconds.late
+        self._late_requests += seconds.late_weight
+        if self._late_lines > self.max_late_fraction * self._lines:
+            raise ValueError(
+                f"{self._late_lines} of {self._lines} access log lines arrived "
+                f"more than {self.delay} seconds out of order, and were left "
+                "out of the per-second rates; sort the log or raise the delay"
+            )
+
+    def hot_partitions(self) -> List[str]:
+        """
+        Retrieves the partitions exceeding their target, the hottest first.
+        :return: Such partitions.
+        :rtype: List[str]
+        """
+        return sorted(self._over, key=lambda key: -self._over[key][1])
+
+    def rewrite_buckets(self, partitionKey: str) -> int:
+        """
+        Retrieves the hash buckets a hot partition needs for its peak to fit
+        within the target, with some margin.
+        :param partitionKey: The partition key.
+        :type partitionKey: str
+        :return: The number of buckets.
+        :rtype: int
+        """
+        peak = self._over[partitionKey][2]
+        return max(
+            2, math.ceil(peak / (self.partition_target * self.bucket_utilization))
+        )
+
+    def project_rewrites(
+        self, rows: Iterable[Dict[str, Any]]
+    ) -> Dict[str, List[TablePartitionRewrite]]:
+        """
+        Replays an access log for the hot partitions, under candidate key
+        rewrites.
+        :param rows: The same accesses given to add_accesses.
+        :type rows: Iterable[Dict[str, Any]]
+        :return: The rewrites of each hot partition.
+        :rtype: Dict[str, List[pythoneda.shared.iac.pulumi.azure.TablePartitionRewrite]]
+        """
+        buckets = {key: self.rewrite_buckets(key) for key in self._over}
+        strategies = ("hash", "prefix")
+        # (strategy, partition) -> [peak, throttled, fan-out, new keys seen]
+        stats = {
+            (strategy, key): [0.0, 0.0, 0.0, set()]
+            for strategy in strategies
+            for key in buckets
+        }
+
+        def account(second: int, counts: Dict[Any, float]):
+            groups = {}
+            for (strategy, key, bucket), count in counts.items():
+                groups.setdefault((strategy, key), {})[bucket] = count
+            for (strategy, key), bucket_counts in groups.items():
+                stat = stats[(strategy, key)]
+                fan_out = bucket_counts.pop(None, 0.0)
+                if fan_out:
+                    targets = stat[3] if strategy == "prefix" else range(buckets[key])
+                    rates = [
+                        bucket_counts.get(bucket, 0.0) + fan_out for bucket in targets
+                    ] or [fan_out]
+                else:
+                    rates = bucket_counts.values()
+                for rate in rates:
+                    stat[0] = max(stat[0], rate)
+                    stat[1] += max(0.0, rate - self.partition_target)
+
+        seconds = _PerSecond(account, self.delay)
+        for row in rows:
+            key = row["PartitionKey"]
+            count = buckets.get(key)
+            if count is None:
+                continue
+            second = self._second(row["timestamp"])
+            weight = float(row.get("entities") or 1)
+            row_key = row.get("RowKey")
+            if row_key:
+                seconds.add(
+                    second,
+                    ("hash", key, zlib.crc32(row_key.encode("utf-8")) % count),
+                    weight,
+                )
+                seconds.add(second, ("prefix", key, row_key[0]), weight)
+                stats[("prefix", key)][3].add(row_key[0])
+            else:
+                for strategy in strategies:
+                    seconds.add(second, (strategy, key, None), weight)
+                    stats[(strategy, key)][2] += weight
+        seconds.flush()
+        result = {}
+        for key, count in buckets.items():
+            hashed = stats[("hash", key)]
+            prefixed = stats[("prefix", key)]
+            result[key] = [
+                TablePartitionRewrite(
+                    "hash",
+                    count,
+                    f"PartitionKey = '{key}_' + str(crc32(RowKey) % {count})",
+                    hashed[0],
+                    hashed[1],
+                    hashed[2],
+                ),
+                TablePartitionRewrite(
+                    "prefix",
+                    len(prefixed[3]),
+                    f"PartitionKey = '{key}_' + RowKey[0]",
+                    prefixed[0],
+                    prefixed[1],
+                    prefixed[2],
+                ),
+            ]
+        return result
+
+    def analysis(
+        self, rewrites: Dict[str, List[TablePartitionRewrite]] = None
+    ) -> TablePartitionAnalysis:
+        """
+        Reports the partition design of the table.
+        :param rewrites: The rewrites projected for hot partitions, if any.
+        :type rewrites: Dict[str, List[pythoneda.shared.iac.pulumi.azure.TablePartitionRewrite]]
+        :return: The analysis.
+        :rtype: pythoneda.shared.iac.pulumi.azure.TablePartitionAnalysis
+        """
+        partitions = self._partitions.estimate()
+        busiest = self._busiest.top(self.top_partitions)
+        requests = dict(self._busiest.top(len(self._over) + self.top_partitions))
+        seconds = self._last - self._first + 1 if self._first is not None else 0
+        return TablePartitionAnalysis(
+            self.table_name,
+            self._entities,
+            self._entity_partitions.estimate(),
+            self._largest.top(self.top_partitions),
+            self._requests,
+            seconds,
+            partitions,
+            busiest,
+            (
+                busiest[0][1] * partitions / self._requests
+                if busiest and self._requests
+                else 0.0
+            ),
+            self._peak_account_rate,
+            self._seconds_over_account_target,
+            [
+                TablePartitionReport(
+                    key,
+                    requests.get(key, 0.0),
+                    self._over[key][2],
+                    int(self._over[key][0]),
+                    self._over[key][1],
+                    (rewrites or {}).get(key, []),
+                )
+                for key in self.hot_partitions()
+            ],
+            self._late_lines,
+            self._late_requests,
+        )
+
+    @classmethod
+    def analyze(
+        cls,
+        entitiesPath: str,
+        accessLogPath: str,
+        tableName: str = None,
+        projectRewrites: bool = True,
+        delay: int = None,
+    ) -> TablePartitionAnalysis:
+        """
+        Analyzes the partition design of a table from files.
+        :param entitiesPath: The path of the sample of entities, if any.
+        :type entitiesPath: str
+        :param accessLogPath: The path of the access log.
+        :type accessLogPath: str
+        :param tableName: The name of the table, if any.
+        :type tableName: str
+        :param projectRewrites: Whether to replay the log for the hot
+        partitions under candidate key rewrites.
+        :type projectRewrites: bool
+        :param delay: The seconds lines of the log can arrive out of order.
+        Defaults to 5.
+        :type delay: int
+        :return: The analysis.
+        :rtype: pythoneda.shared.iac.pulumi.azure.TablePartitionAnalysis
+        """
+        analyzer = cls(tableName, delay=delay)
+        if entitiesPath is not None:
+            analyzer.add_entities(cls.rows(entitiesPath))
+        analyzer.add_accesses(cls.rows(accessLogPath))
+        rewrites = None
+        if projectRewrites and analyzer.hot_partitions():
+            rewrites = analyzer.project_rewrites(cls.rows(accessLogPath))
+        return analyzer.analysis(rewrites)
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -22,14 +22,16 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 from .azure_resource import AzureResource
 from .app_insights import AppInsights
 from .app_service_plan import AppServicePlan
+from .app_service_plan_skus import AppServicePlanSku
 from .container_registry import ContainerRegistry
+from .invoke_cache import InvokeCache
 from .outputs import Outputs
 import pulumi
 import pulumi_azure_native
-from pulumi_azure_native.storage import list_storage_account_keys
 from pulumi import Output
 from .resource_group import ResourceGroup
 from .storage_account import StorageAccount
+from typing import List
 
 
 class WebApp(AzureResource):
@@ -40,11 +42,15 @@ class WebApp(AzureResource):
 
     Responsibilities:
         - Define the Azure Web App.
+        - Size its worker processes and warm instances to the plan SKU.
 
     Collaborators:
-        - None
+        - pythoneda.shared.iac.pulumi.azure.AppServicePlan
     """
 
+    max_worker_process_count = 10
+    max_pre_warmed_instance_count = 20
+
     def __init__(
         self,
         stackName: str,
@@ -59,6 +65,10 @@ class WebApp(AzureResource):
         appServicePlan: AppServicePlan,
         containerRegistry: ContainerRegistry,
         resourceGroup: ResourceGroup,
+        workerProcessCount: int = None,
+        alwaysOn: bool = None,
+        preWarmedInstanceCount: int = None,
+        elasticMaximum: int = None,
     ):
         """
         Creates a new WebApp instance.
@@ -86,11 +96,38 @@ class WebApp(AzureResource):
         :type containerRegistry: pythoneda.iac.pulumi.azure.ContainerRegistry
         :param resourceGroup: The ResourceGroup.
         :type resourceGroup: pythoneda.iac.pulumi.azure.ResourceGroup
+        :param workerProcessCount: The worker processes per instance.
+        Defaults to the vCPUs of the plan SKU.
+        :type workerProcessCount: int
+        :param alwaysOn: Whether to keep the app loaded when idle. Defaults
+        to True on dedicated plans.
+        :type alwaysOn: bool
+        :param preWarmedInstanceCount: The instances kept warm ahead of
+        scale-out, on Elastic Premium plans. Defaults to 1 there.
+        :type preWarmedInstanceCount: int
+        :param elasticMaximum: The instances the app scales out to, at most,
+        on Consumption and Elastic Premium plans. Defaults to the limit of
+        the plan.
+        :type elasticMaximum: int
         """
         self._image_name = imageName
         self._image_version = imageVersion
         self._login_server = loginServer
         self._linux_fx_version = linuxFxVersion
+        self._sku = appServicePlan.sku
+        self._worker_process_count = workerProcessCount
+        self._always_on = alwaysOn
+        self._pre_warmed_instance_count = preWarmedInstanceCount
+        self._elastic_maximum = elasticMaximum
+        problems = self.problems(
+            self._sku,
+            self.worker_process_count,
+            self.always_on,
+            self.pre_warmed_instance_count,
+            self.elastic_maximum,
+        )
+        if problems:
+            raise ValueError("; ".join(problems))
         super().__init__(
             stackName,
             projectName,
@@ -140,6 +177,129 @@ class WebApp(AzureResource):
         """
         return self._linux_fx_version
 
+    @property
+    def sku(self) -> AppServicePlanSku:
+        """
+        Retrieves the SKU of the App Service plan.
+        :return: Such SKU, or None if unknown.
+        :rtype: pythoneda.shared.iac.pulumi.azure.AppServicePlanSku
+        """
+        return self._sku
+
+    @property
+    def worker_process_count(self) -> int:
+        """
+        Retrieves the worker processes per instance.
+        :return: Such count.
+        :rtype: int
+        """
+        if self._worker_process_count is not None:
+            return self._worker_process_count
+        if self.sku is None:
+            return 1
+        return min(self.sku.vcpus, self.max_worker_process_count)
+
+    @property
+    def always_on(self) -> bool:
+        """
+        Checks whether the app is kept loaded when idle.
+        :return: True in such case; None if the plan decides.
+        :rtype: bool
+        """
+        if self._always_on is not None:
+            return self._always_on
+        if self.sku is None or self.sku.tier in ("Dynamic", "ElasticPremium"):
+            return None
+        return True
+
+    @property
+    def pre_warmed_instance_count(self) -> int:
+        """
+        Retrieves the instances kept warm ahead of scale-out.
+        :return: Such count, or None if the plan has none.
+        :rtype: int
+        """
+        if self._pre_warmed_instance_count is not None:
+            return self._pre_warmed_instance_count
+        if self.sku is not None and self.sku.tier == "ElasticPremium":
+            return 1
+        return None
+
+    @property
+    def elastic_maximum(self) -> int:
+        """
+        Retrieves the instances the app scales out to, at most.
+        :return: Such count, or None if the plan decides.
+        :rtype: int
+        """
+        return self._elastic_maximum
+
+    @classmethod
+    def problems(
+        cls,
+        sku: AppServicePlanSku,
+        workerProcessCount: int,
+        alwaysOn: bool,
+        preWarmedInstanceCount: int,
+        elasticMaximum: int,
+    ) -> List[str]:
+        """
+        Describes why the scale options do not suit an App Service plan.
+        :param sku: The SKU of the plan, if known.
+        :type sku: pythoneda.shared.iac.pulumi.azure.AppServicePlanSku
+        :param workerProcessCount: The worker processes per instance.
+        :type workerProcessCount: int
+        :param alwaysOn: Whether to keep the app loaded when idle.
+        :type alwaysOn: bool
+        :param preWarmedInstanceCount: The instances kept warm.
+        :type preWarmedInstanceCount: int
+        :param elasticMaximum: The instances the app scales out to.
+        :type elasticMaximum: int
+        :return: The problems found, if any.
+        :rtype: List[str]
+        """
+        result = []
+        if not 1 <= workerProcessCount <= cls.max_worker_process_count:
+            result.append(
+                f"Worker process count must be 1 to {cls.max_worker_process_count}"
+            )
+        tier = sku.tier if sku is not None else None
+        if alwaysOn and tier == "Dynamic":
+            result.append("Always on is not available on Consumption plans")
+        if preWarmedInstanceCount is not None:
+            if sku is not None and tier != "ElasticPremium":
+                result.append(
+                    "Pre-warmed instances are only available on Elastic "
+                    f"Premium plans, not {sku.name}"
+                )
+            elif not 0 <= preWarmedInstanceCount <= cls.max_pre_warmed_instance_count:
+                result.append(
+                    "Pre-warmed instance count must be 0 to "
+                    f"{cls.max_pre_warmed_instance_count}"
+                )
+        if elasticMaximum is not None:
+            if sku is not None and tier not in ("Dynamic", "ElasticPremium"):
+                result.append(
+                    "Elastic maximum is only available on Consumption and "
+                    f"Elastic Premium plans, not {sku.name}"
+                )
+            elif elasticMaximum < 1 or (
+                sku is not None and elasticMaximum > sku.max_instances
+            ):
+                result.append(
+                    f"Elastic maximum must be 1 to "
+                    f"{sku.max_instances if sku is not None else 'the plan limit'}"
+                )
+            elif (
+                preWarmedInstanceCount is not None
+                and elasticMaximum < preWarmedInstanceCount
+            ):
+                result.append(
+                    f"Elastic maximum {elasticMaximum} is below the "
+                    f"{preWarmedInstanceCount} pre-warmed instances"
+                )
+        return result
+
     @classmethod
     @property
     def type(cls) -> str:
@@ -185,19 +345,16 @@ class WebApp(AzureResource):
 
         pulumi.export(Outputs.LINUX_FX_VERSION.value, linux_fx_version)
 
-        acr_credentials = (
-            pulumi_azure_native.containerregistry.list_registry_credentials(
-                resource_group_name=self.resource_group.name,
-                registry_name=self.container_registry.name,
-            )
+        invoke_cache = InvokeCache.instance()
+        acr_credentials = invoke_cache.registry_credentials(
+            self.resource_group.name, self.container_registry.name
         )
 
         acr_username = acr_credentials.username
         acr_password = acr_credentials.passwords[0].value
 
-        storage_account_keys = list_storage_account_keys(
-            resource_group_name=self.resource_group.name,
-            account_name=self.storage_account.name,
+        storage_account_keys = invoke_cache.storage_account_keys(
+            self.resource_group.name, self.storage_account.name
         )
         primary_storage_key = storage_account_keys.keys[0].value
         connection_string = Output.format(
@@ -259,7 +416,8 @@ class WebApp(AzureResource):
                         name="LD_LIBRARY_PATH", value="/home/site/wwwroot"
                     ),
                     pulumi_azure_native.web.NameValuePairArgs(
-                        name="FUNCTIONS_WORKER_PROCESS_COUNT", value="1"
+                        name="FUNCTIONS_WORKER_PROCESS_COUNT",
+                        value=str(self.worker_process_count),
                     ),
                     pulumi_azure_native.web.NameValuePairArgs(
                         name="DOCKER_REGISTRY_SERVER_URL",
@@ -281,6 +439,9 @@ class WebApp(AzureResource):
                 http20_enabled=True,
                 ftps_state="AllAllowed",
                 scm_type="LocalGit",
+                always_on=self.always_on,
+                pre_warmed_instance_count=self.pre_warmed_instance_count,
+                function_app_scale_limit=self.elastic_maximum,
             ),
             client_affinity_enabled=False,
             public_network_access="Enabled",
@@ -20,7 +20,9 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from .azure_resource import AzureResource
+from .content_hash_cache import ContentHashCache
 from .outputs import Outputs
+from .package_builder import PackageBuilder
 import pulumi
 import pulumi_azure_native
 from .resource_group import ResourceGroup
@@ -31,13 +33,16 @@ class WebAppDeploymentSlot(AzureResource):
     """
     Logic to define deployment slots in Azure WebApps.
 
+    When given a source directory, the package is built out of it before
+    being deployed, reusing the previous package as much as possible.
+
     Class name: WebAppDeploymentSlot
 
     Responsibilities:
         - Deployment slots for Licdata functions.
 
     Collaborators:
-        - None
+        - pythoneda.shared.iac.pulumi.azure.PackageBuilder
     """
 
     def __init__(
@@ -49,6 +54,8 @@ class WebAppDeploymentSlot(AzureResource):
         filePath: str,
         webApp: WebApp,
         resourceGroup: ResourceGroup,
+        sourceDirectory: str = None,
+        contentHashCache: ContentHashCache = None,
     ):
         """
         Creates a new WebAppDeploymentSlot instance.
@@ -60,15 +67,22 @@ class WebAppDeploymentSlot(AzureResource):
         :type location: str
         :param name: The slot name.
         :type name: str
-        :param filePath: The file path.
+        :param filePath: The path of the package.
         :type filePath: str
         :param webApp: The WebApp.
         :type webApp: pythoneda.iac.pulumi.azure.WebApp
         :param resourceGroup: The ResourceGroup.
         :type resourceGroup: pythoneda.iac.pulumi.azure.ResourceGroup
+        :param sourceDirectory: The directory to build the package from, if
+        the package is not prebuilt.
+        :type sourceDirectory: str
+        :param contentHashCache: The cache of file digests, if any.
+        :type contentHashCache: pythoneda.shared.iac.pulumi.azure.ContentHashCache
         """
         self._name = name
         self._file_path = filePath
+        self._source_directory = sourceDirectory
+        self._content_hash_cache = contentHashCache
         super().__init__(
             stackName,
             projectName,
@@ -94,6 +108,41 @@ class WebAppDeploymentSlot(AzureResource):
         """
         return self._file_path
 
+    @property
+    def source_directory(self) -> str:
+        """
+        Retrieves the directory the package is built from.
+        :return: Such directory, or None if the package is prebuilt.
+        :rtype: str
+        """
+        return self._source_directory
+
+    @property
+    def content_hash_cache(self) -> ContentHashCache:
+        """
+        Retrieves the cache of file digests.
+        :return: Such cache, or None.
+        :rtype: pythoneda.shared.iac.pulumi.azure.ContentHashCache
+        """
+        return self._content_hash_cache
+
+    def build_package(self) -> str:
+        """
+        Builds the package out of the source directory, if any.
+        :return: The path of the package.
+        :rtype: str
+        """
+        if self.source_directory is not None:
+            builder = PackageBuilder(
+                self.source_directory, self.file_path, None, self.content_hash_cache
+            )
+            if builder.build():
+                pulumi.log.info(
+                    f"Built {self.file_path}: {builder.compressed} entries "
+                    f"compressed, {builder.reused} reused"
+                )
+        return self.file_path
+
     @classmethod
     @property
     def type(cls) -> str:
@@ -118,7 +167,7 @@ class WebAppDeploymentSlot(AzureResource):
         :return: The resource name.
         :rtype: str
         """
-        return f"wads{self.name}"
+        return "wads"
 
     # @override
     def _create(self, name: str) -> pulumi_azure_native.web.WebAppDeploymentSlot:
@@ -133,7 +182,7 @@ class WebAppDeploymentSlot(AzureResource):
             name,
             name=self.name,
             resource_group_name=self.resource_group.name,
-            package=pulumi.FileAsset(filePath),
+            package=pulumi.FileAsset(self.build_package()),
         )
 
     # @override
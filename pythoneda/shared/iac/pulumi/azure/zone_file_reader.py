@@ -0,0 +1,414 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/shared/iac/pulumi/azure/zone_file_reader.py
+
+This script defines the ZoneFileReader class.
+
+Copyright (C) 2024-today pythoneda-shared-iac/pulumi-azure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import csv
+import heapq
+import json
+import tempfile
+from typing import IO, Iterable, Iterator, List, NamedTuple, Tuple
+
+
+class ZoneRecord(NamedTuple):
+    """
+    A DNS record, with its name relative to the zone ("@" for the apex).
+    """
+
+    name: str
+    type: str
+    ttl: int
+    data: Tuple[str, ...]
+
+
+class ZoneRecordGroup(NamedTuple):
+    """
+    The records sharing name and type, i.e. an Azure record set.
+    """
+
+    name: str
+    type: str
+    ttl: int
+    records: List[ZoneRecord]
+
+
+class ZoneFileReader:
+    """
+    Streams DNS records out of RFC 1035 zone files or CSV files.
+
+    Class name: ZoneFileReader
+
+    Responsibilities:
+        - Parse zone files: $ORIGIN and $TTL directives, comments, quoted
+          strings, multi-line records, and omitted owners, TTLs and classes.
+        - Parse CSV files with name, type, ttl and value columns.
+        - Group records by name and type.
+
+    Collaborators:
+        - pythoneda.shared.iac.pulumi.azure.DnsRecordSets
+    """
+
+    _classes = ("IN", "CH", "HS", "CS")
+    _domain_name_fields = {"CNAME": 0, "MX": 1, "SRV": 3}
+    _ttl_units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+    _run_size = 100000
+
+    def __init__(self, origin: str, defaultTtl: int):
+        """
+        Creates a new ZoneFileReader instance.
+        :param origin: The zone, e.g. "example.com".
+        :type origin: str
+        :param defaultTtl: The TTL of records declaring none, if there is no
+        $TTL directive.
+        :type defaultTtl: int
+        """
+        self._origin = self._absolute(origin, ".")
+        self._default_ttl = defaultTtl
+
+    @property
+    def origin(self) -> str:
+        """
+        Retrieves the zone, as an absolute name.
+        :return: Such name.
+        :rtype: str
+        """
+        return self._origin
+
+    @property
+    def default_ttl(self) -> int:
+        """
+        Retrieves the default TTL.
+        :return: Such TTL.
+        :rtype: int
+        """
+        return self._default_ttl
+
+    @classmethod
+    def _absolute(cls, name: str, origin: str) -> str:
+        """
+        Converts a name to an absolute one, lowercase.
+        :param name: The name.
+        :type name: str
+        :param origin: The current origin.
+        :type origin: str
+        :return: The absolute name.
+        :rtype: str
+        """
+        name = name.lower()
+        if name == "@":
+            return origin
+        if name.endswith("."):
+            return name
+        if origin == ".":
+            return f"{name}."
+        return f"{name}.{origin}"
+
+    def _relative(self, name: str) -> str:
+        """
+        Converts an absolute name to one relative to the zone.
+        :param name: The absolute name.
+        :type name: str
+        :return: The relative name.
+        :rtype: str
+        """
+        if name == self._origin:
+            return "@"
+        if name.endswith(f".{self._origin}"):
+            return name[: -len(self._origin) - 1]
+        raise ValueError(f"{name} does not belong to zone {self._origin}")
+
+    @classmethod
+    def _expand_data(
+        cls, recordType: str, data: Tuple[str, ...], origin: str
+    ) -> Tuple[str, ...]:
+        """
+        Expands the domain name in the data of CNAME, MX and SRV records to a
+        fully qualified one, without the trailing dot.
+        :param recordType: The type of record.
+        :type recordType: str
+        :param data: The record data.
+        :type data: Tuple[str, ...]
+        :param origin: The current origin.
+        :type origin: str
+        :return: The expanded data.
+        :rtype: Tuple[str, ...]
+        """
+        index = cls._domain_name_fields.get(recordType)
+        if index is None or index >= len(data):
+            return data
+        expanded = cls._absolute(data[index], origin).rstrip(".")
+        return data[:index] + (expanded,) + data[index + 1 :]
+
+    @classmethod
+    def _parse_ttl(cls, text: str) -> int:
+        """
+        Parses a TTL, either in seconds or with BIND units, such as "1h30m".
+        :param text: The text.
+        :type text: str
+        :return: The TTL, in seconds.
+        :rtype: int
+        """
+        if text.isdigit():
+            return int(text)
+        result = 0
+        number = ""
+        for char in text.lower():
+            if char.isdigit():
+                number += char
+            elif char in cls._ttl_units and number:
+                result += int(number) * cls._ttl_units[char]
+                number = ""
+            else:
+                raise ValueError(f"Invalid TTL: {text}")
+        if number:
+            raise ValueError(f"Invalid TTL: {text}")
+        return result
+
+    @classmethod
+    def _is_ttl(cls, text: str) -> bool:
+        """
+        Checks whether given token is a TTL.
+        :param text: The token.
+        :type text: str
+        :return: True in such case.
+        :rtype: bool
+        """
+        try:
+            cls._parse_ttl(text)
+            return text[0].isdigit()
+        except ValueError:
+            return False
+
+    @classmethod
+    def _logical_lines(cls, lines: Iterable[str]) -> Iterator[Tuple[bool, List[str]]]:
+        """
+        Joins the physical lines of parenthesized records, and splits them into
+        tokens, dropping comments.
+        :param lines: The physical lines.
+        :type lines: Iterable[str]
+        :return: Whether the logical line starts with blank space (so it reuses
+        the previous owner), and its tokens.
+        :rtype: Iterator[Tuple[bool, List[str]]]
+        """
+        depth = 0
+        tokens: List[str] = []
+        indented = False
+        for line in lines:
+            if depth == 0:
+                indented = line[:1] in (" ", "\t")
+            token = None
+            quoted = False
+            index = 0
+            while index < len(line):
+                char = line[index]
+                if quoted:
+                    if char == "\\" and index + 1 < len(line):
+                        index += 1
+                        token += line[index]
+                    elif char == '"':
+                        quoted = False
+                    else:
+                        token += char
+                elif char == '"':
+                    quoted = True
+                    token = token or ""
+                elif char == ";":
+                    break
+                elif char in " \t\r\n()":
+                    if token is not None:
+                        tokens.append(token)
+                        token = None
+                    if char == "(":
+                        depth += 1
+                    elif char == ")":
+                        depth -= 1
+                else:
+                    token = (token or "") + char
+                index += 1
+            if quoted:
+                raise ValueError(f"Unterminated quoted string: {line.rstrip()}")
+            if token is not None:
+                tokens.append(token)
+            if depth == 0 and tokens:
+                yield indented, tokens
+                tokens = []
+        if depth != 0:
+            raise ValueError("Unbalanced parentheses in zone file")
+
+    def read_zone_file(self, lines: Iterable[str]) -> Iterator[ZoneRecord]:
+        """
+        Reads the records of a zone file.
+        :param lines: The lines of the file.
+        :type lines: Iterable[str]
+        :return: The records, in file order.
+        :rtype: Iterator[pythoneda.shared.iac.pulumi.azure.ZoneRecord]
+        """
+        origin = self._origin
+        ttl = self._default_ttl
+        owner = None
+        for indented, tokens in self._logical_lines(lines):
+            if tokens[0].startswith("$"):
+                directive = tokens[0].upper()
+                if directive == "$ORIGIN":
+                    origin = self._absolute(tokens[1], origin)
+                elif directive == "$TTL":
+                    ttl = self._parse_ttl(tokens[1])
+                else:
+                    raise ValueError(f"Unsupported zone file directive: {tokens[0]}")
+                continue
+            if not indented:
+                owner = self._absolute(tokens.pop(0), origin)
+            elif owner is None:
+                raise ValueError(f"Record without owner: {' '.join(tokens)}")
+            record_ttl = ttl
+            for _ in range(2):
+                if tokens and tokens[0].upper() in self._classes:
+                    tokens.pop(0)
+                elif tokens and self._is_ttl(tokens[0]):
+                    record_ttl = self._parse_ttl(tokens.pop(0))
+            if not tokens:
+                raise ValueError(f"Record without type: {owner}")
+            record_type = tokens.pop(0).upper()
+            yield ZoneRecord(
+                self._relative(owner),
+                record_type,
+                record_ttl,
+                self._expand_data(record_type, tuple(tokens), origin),
+            )
+
+    def read_csv(self, lines: Iterable[str]) -> Iterator[ZoneRecord]:
+        """
+        Reads the records of a CSV file with name, type, ttl and value columns.
+        The value of TXT records is a single string; for other types, its
+        fields are separated by blanks, e.g. "10 mail.example.com." for MX.
+        :param lines: The lines of the file.
+        :type lines: Iterable[str]
+        :return: The records, in file order.
+        :rtype: Iterator[pythoneda.shared.iac.pulumi.azure.ZoneRecord]
+        """
+        for row in csv.DictReader(lines):
+            record_type = row["type"].strip().upper()
+            value = row["value"]
+            ttl = row.get("ttl", "").strip()
+            yield ZoneRecord(
+                self._relative(self._absolute(row["name"].strip(), self._origin)),
+                record_type,
+                self._parse_ttl(ttl) if ttl else self._default_ttl,
+                (
+                    (value,)
+                    if record_type == "TXT"
+                    else self._expand_data(
+                        record_type, tuple(value.split()), self._origin
+                    )
+                ),
+            )
+
+    @classmethod
+    def _spill(cls, run: List[Tuple[str, str, int, ZoneRecord]]) -> IO[str]:
+        """
+        Writes a sorted run of records to a temporary file.
+        :param run: The run, as (name, type, position, record) tuples.
+        :type run: List[Tuple[str, str, int, pythoneda.shared.iac.pulumi.azure.ZoneRecord]]
+        :return: The file, rewound.
+        :rtype: IO[str]
+        """
+        result = tempfile.TemporaryFile("w+", encoding="utf-8")
+        for name, record_type, position, record in run:
+            result.write(
+                json.dumps([name, record_type, position, record.ttl, record.data])
+            )
+            result.write("\n")
+        result.seek(0)
+        return result
+
+    @classmethod
+    def _unspill(cls, run: IO[str]) -> Iterator[Tuple[str, str, int, ZoneRecord]]:
+        """
+        Reads back a run written by _spill.
+        :param run: The file.
+        :type run: IO[str]
+        :return: The run, as (name, type, position, record) tuples.
+        :rtype: Iterator[Tuple[str, str, int, pythoneda.shared.iac.pulumi.azure.ZoneRecord]]
+        """
+        for line in run:
+            name, record_type, position, ttl, data = json.loads(line)
+            yield name, record_type, position, ZoneRecord(
+                name, record_type, ttl, tuple(data)
+            )
+
+    @classmethod
+    def group(cls, records: Iterable[ZoneRecord]) -> Iterator[ZoneRecordGroup]:
+        """
+        Groups the records sharing name and type, wherever they are in the
+        file, since a record set must be declared once. Records are sorted
+        in runs of at most _run_size, spilled to temporary files once there
+        is more than one run, and merged, so memory is bounded by the run
+        size and the largest group rather than by the file. Groups come in
+        name and type order, their records in file order, and the TTL of a
+        group is the lowest of its records.
+        :param records: The records.
+        :type records: Iterable[pythoneda.shared.iac.pulumi.azure.ZoneRecord]
+        :return: The groups.
+        :rtype: Iterator[pythoneda.shared.iac.pulumi.azure.ZoneRecordGroup]
+        """
+        runs: List[IO[str]] = []
+        run: List[Tuple[str, str, int, ZoneRecord]] = []
+        try:
+            for position, record in enumerate(records):
+                run.append((record.name, record.type, position, record))
+                if len(run) >= cls._run_size:
+                    run.sort()
+                    runs.append(cls._spill(run))
+                    run = []
+            run.sort()
+            members: List[ZoneRecord] = []
+            for _, _, _, record in heapq.merge(
+                run, *(cls._unspill(spilled) for spilled in runs)
+            ):
+                if members and (record.name, record.type) != (
+                    members[0].name,
+                    members[0].type,
+                ):
+                    yield cls._group(members)
+                    members = []
+                members.append(record)
+            if members:
+                yield cls._group(members)
+        finally:
+            for spilled in runs:
+                spilled.close()
+
+    @classmethod
+    def _group(cls, members: List[ZoneRecord]) -> ZoneRecordGroup:
+        """
+        Builds the group of records sharing name and type.
+        :param members: The records.
+        :type members: List[pythoneda.shared.iac.pulumi.azure.ZoneRecord]
+        :return: The group.
+        :rtype: pythoneda.shared.iac.pulumi.azure.ZoneRecordGroup
+        """
+        return ZoneRecordGroup(
+            members[0].name,
+            members[0].type,
+            min(record.ttl for record in members),
+            members,
+        )
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et